@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Analytics Report - Season-over-season show report
+Streams audience and show_analytics in fixed-size chunks and aggregates them
+with NumPy, so memory stays flat however many seasons the database holds.
+Produces conversion funnels (scares → QR views → joins → YouTube opt-ins),
+weekday × hour heatmaps and how_heard breakdowns as self-contained HTML or JSON.
+
+Examples:
+    python analytics_report.py --output report.html
+    python analytics_report.py --db data/scarepi_audience.db --format json --output report.json
+    python analytics_report.py --tz-offset -4 --season 2025 --season 2026
+"""
+
+import argparse
+import html
+import json
+import os
+import sys
+import time
+import warnings
+from datetime import datetime
+
+import numpy as np
+
+from scarepi_db import ScareDatabase, DB_PATH_ENV, LOCAL_DB_PATH
+
+CHUNK_SIZE = 5000
+FUNNEL_STEPS = ['scares', 'qr_views', 'joins', 'youtube_opt_ins']
+FUNNEL_LABELS = {
+    'scares': '👻 Scares',
+    'qr_views': '📱 QR Views',
+    'joins': '👥 Joins',
+    'youtube_opt_ins': '📺 YouTube Opt-ins'
+}
+# show_analytics event types that feed the report
+EVENT_TYPES = {'scare_sequence': 'scares', 'qr_viewed': 'qr_views'}
+HEATMAPS = ['scares', 'joins']
+WEEKDAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+UNKNOWN_SOURCE = 'unknown'
+# The only columns the report reads; all in the base schema, so any show's database works
+REQUIRED_COLUMNS = {
+    'show_analytics': ('event_type', 'timestamp'),
+    'audience': ('join_date', 'how_heard', 'subscribe_youtube')
+}
+
+
+def local_utc_offset_hours():
+    """This machine's current UTC offset in hours."""
+    return round((datetime.now() - datetime.utcnow()).total_seconds() / 3600, 2)
+
+
+def missing_columns(db):
+    """'table.column' names the report needs that the database lacks."""
+    missing = []
+    with db.connection() as conn:
+        for table, columns in REQUIRED_COLUMNS.items():
+            present = {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+            missing += [f'{table}.{column}' for column in columns if column not in present]
+    return missing
+
+
+def iter_chunks(db, sql, params=(), chunk_size=CHUNK_SIZE):
+    """Yield lists of at most chunk_size rows from a query on a dedicated connection."""
+    with db.dedicated_connection() as conn:
+        cursor = conn.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+
+
+def _parse_stamp(value):
+    """One timestamp that numpy couldn't parse in bulk (NaT if unreadable)."""
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return np.datetime64('NaT', 's')
+    if parsed.tzinfo is not None:
+        parsed = parsed.replace(tzinfo=None) - parsed.utcoffset()
+    return np.datetime64(parsed, 's')
+
+
+def to_datetimes(values, tz_offset_hours):
+    """SQLite timestamps to datetime64[s] shifted into the report's time zone."""
+    try:
+        with warnings.catch_warnings():
+            # numpy only warns on UTC offsets; treat that as "parse individually"
+            warnings.simplefilter('error')
+            stamps = np.array([value or 'NaT' for value in values], dtype='datetime64[s]')
+    except (ValueError, UserWarning):
+        # Imported rows may carry offsets or odd formats; parse those one by one
+        stamps = np.array([_parse_stamp(value) for value in values], dtype='datetime64[s]')
+    return stamps + np.timedelta64(int(tz_offset_hours * 3600), 's')
+
+
+def time_parts(stamps):
+    """(season year, weekday Mon=0, hour) arrays for datetime64[s] stamps."""
+    days = stamps.astype('datetime64[D]')
+    years = stamps.astype('datetime64[Y]').astype(np.int64) + 1970
+    # 1970-01-01 was a Thursday
+    weekdays = (days.astype(np.int64) + 3) % 7
+    hours = ((stamps - days).astype('timedelta64[h]')).astype(np.int64)
+    return years, weekdays, hours
+
+
+class SeasonAggregates:
+    def __init__(self):
+        """Running totals for one season (calendar year)."""
+        self.funnel = dict.fromkeys(FUNNEL_STEPS, 0)
+        self.heatmaps = {name: np.zeros(7 * 24, dtype=np.int64) for name in HEATMAPS}
+        self.how_heard = {}
+
+    def add_heatmap(self, name, weekdays, hours):
+        """Count events into the weekday × hour grid."""
+        self.heatmaps[name] += np.bincount(weekdays * 24 + hours, minlength=7 * 24)
+
+    def add_sources(self, sources):
+        """Count how_heard answers."""
+        values, counts = np.unique(sources, return_counts=True)
+        for value, count in zip(values.tolist(), counts.tolist()):
+            self.how_heard[value] = self.how_heard.get(value, 0) + count
+
+    def merge(self, other):
+        """Fold another season's totals into this one."""
+        for step in FUNNEL_STEPS:
+            self.funnel[step] += other.funnel[step]
+        for name in HEATMAPS:
+            self.heatmaps[name] += other.heatmaps[name]
+        for value, count in other.how_heard.items():
+            self.how_heard[value] = self.how_heard.get(value, 0) + count
+
+    def to_dict(self):
+        """JSON-ready report section."""
+        funnel = []
+        previous = None
+        for step in FUNNEL_STEPS:
+            count = self.funnel[step]
+            funnel.append({
+                'step': step,
+                'count': count,
+                'conversion_from_previous': round(count / previous, 4) if previous else None
+            })
+            previous = count
+        total_sources = sum(self.how_heard.values())
+        return {
+            'funnel': funnel,
+            'heatmaps': {name: grid.reshape(7, 24).tolist() for name, grid in self.heatmaps.items()},
+            'peak_hours': {name: peak_slot(grid) for name, grid in self.heatmaps.items()},
+            'how_heard': [
+                {'source': source, 'count': count,
+                 'share': round(count / total_sources, 4) if total_sources else 0.0}
+                for source, count in sorted(self.how_heard.items(), key=lambda item: -item[1])
+            ]
+        }
+
+
+def peak_slot(grid):
+    """Busiest weekday/hour in a flattened 7 × 24 grid."""
+    if not grid.any():
+        return None
+    slot = int(grid.argmax())
+    return {'weekday': WEEKDAYS[slot // 24], 'hour': slot % 24, 'count': int(grid[slot])}
+
+
+class ReportBuilder:
+    def __init__(self, db, tz_offset_hours=0.0, seasons=None, chunk_size=CHUNK_SIZE):
+        """Aggregate db into per-season totals; seasons limits which years are kept."""
+        self.db = db
+        self.tz_offset_hours = tz_offset_hours
+        self.seasons_filter = set(seasons) if seasons else None
+        self.chunk_size = chunk_size
+        self.seasons = {}
+        self.rows_read = {'show_analytics': 0, 'audience': 0}
+
+    def _season(self, year):
+        """Aggregates for a season, created on first use."""
+        if year not in self.seasons:
+            self.seasons[year] = SeasonAggregates()
+        return self.seasons[year]
+
+    def _by_season(self, years, *arrays):
+        """Split parallel arrays by season year, honouring the season filter."""
+        for year in np.unique(years).tolist():
+            if self.seasons_filter and year not in self.seasons_filter:
+                continue
+            mask = years == year
+            yield self._season(year), [array[mask] for array in arrays]
+
+    def read_analytics(self):
+        """Stream the event types the report needs from show_analytics."""
+        placeholders = ','.join('?' for _ in EVENT_TYPES)
+        sql = f'''
+            SELECT event_type, timestamp FROM show_analytics
+            WHERE event_type IN ({placeholders}) AND timestamp IS NOT NULL
+        '''
+        for rows in iter_chunks(self.db, sql, list(EVENT_TYPES), self.chunk_size):
+            self.rows_read['show_analytics'] += len(rows)
+            stamps = to_datetimes([row[1] for row in rows], self.tz_offset_hours)
+            valid = ~np.isnat(stamps)
+            event_types = np.array([row[0] for row in rows])[valid]
+            years, weekdays, hours = time_parts(stamps[valid])
+            for season, (types, days, hrs) in self._by_season(years, event_types, weekdays, hours):
+                for event_type, step in EVENT_TYPES.items():
+                    mask = types == event_type
+                    season.funnel[step] += int(mask.sum())
+                    if step in season.heatmaps:
+                        season.add_heatmap(step, days[mask], hrs[mask])
+
+    def read_audience(self):
+        """Stream join time, source and YouTube opt-in from audience."""
+        sql = '''
+            SELECT join_date, how_heard, subscribe_youtube FROM audience
+            WHERE join_date IS NOT NULL
+        '''
+        for rows in iter_chunks(self.db, sql, (), self.chunk_size):
+            self.rows_read['audience'] += len(rows)
+            stamps = to_datetimes([row[0] for row in rows], self.tz_offset_hours)
+            valid = ~np.isnat(stamps)
+            years, weekdays, hours = time_parts(stamps[valid])
+            sources = np.array([(row[1] or '').strip().lower() or UNKNOWN_SOURCE
+                                for row in rows])[valid]
+            youtube = np.array([bool(row[2]) for row in rows])[valid]
+            for season, (days, hrs, srcs, yt) in self._by_season(
+                    years, weekdays, hours, sources, youtube):
+                season.funnel['joins'] += len(days)
+                season.funnel['youtube_opt_ins'] += int(yt.sum())
+                season.add_heatmap('joins', days, hrs)
+                season.add_sources(srcs)
+
+    def build(self):
+        """Read both tables and return the report dict."""
+        started = time.perf_counter()
+        self.read_analytics()
+        self.read_audience()
+        overall = SeasonAggregates()
+        for season in self.seasons.values():
+            overall.merge(season)
+        return {
+            'generated_at': datetime.now().isoformat(),
+            'database': self.db.db_path,
+            'tz_offset_hours': self.tz_offset_hours,
+            'rows_read': self.rows_read,
+            'build_seconds': round(time.perf_counter() - started, 3),
+            'overall': overall.to_dict(),
+            'seasons': {str(year): self.seasons[year].to_dict() for year in sorted(self.seasons)}
+        }
+
+
+def _heat_color(value, peak):
+    """Background colour for a heatmap cell."""
+    if not peak or not value:
+        return 'transparent'
+    return f'rgba(255, 107, 53, {0.15 + 0.85 * value / peak:.2f})'
+
+
+def _html_section(title, section):
+    """HTML for one season (or the overall totals)."""
+    parts = [f'<section><h2>{html.escape(title)}</h2>', '<h3>Conversion Funnel</h3>',
+             '<table><tr><th>Step</th><th>Count</th><th>From previous</th></tr>']
+    for step in section['funnel']:
+        conversion = step['conversion_from_previous']
+        parts.append(f"<tr><td>{FUNNEL_LABELS[step['step']]}</td><td>{step['count']}</td>"
+                     f"<td>{'' if conversion is None else f'{conversion:.1%}'}</td></tr>")
+    parts.append('</table>')
+
+    for name, grid in section['heatmaps'].items():
+        peak = max(max(row) for row in grid)
+        parts.append(f'<h3>{FUNNEL_LABELS[name]} by Weekday and Hour</h3>')
+        parts.append('<table class="heatmap"><tr><th></th>' +
+                     ''.join(f'<th>{hour}</th>' for hour in range(24)) + '</tr>')
+        for weekday, row in zip(WEEKDAYS, grid):
+            cells = ''.join(f'<td style="background:{_heat_color(value, peak)}">{value or ""}</td>'
+                            for value in row)
+            parts.append(f'<tr><th>{weekday}</th>{cells}</tr>')
+        parts.append('</table>')
+
+    parts.append('<h3>How They Heard About Us</h3><table>')
+    for source in section['how_heard']:
+        parts.append(f"<tr><td>{html.escape(source['source'])}</td><td>{source['count']}</td>"
+                     f"<td><div class=\"bar\" style=\"width:{source['share'] * 300:.0f}px\"></div>"
+                     f"{source['share']:.1%}</td></tr>")
+    parts.append('</table></section>')
+    return '\n'.join(parts)
+
+
+def render_html(report):
+    """Self-contained HTML report (inline styles, no external assets)."""
+    sections = [_html_section('All Seasons', report['overall'])]
+    sections.extend(_html_section(f'Season {year}', season)
+                    for year, season in reversed(list(report['seasons'].items())))
+    return f'''<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<title>🎃 ScarePi Season Report</title>
+<style>
+body {{ background: #0a0a0a; color: #eee; font-family: sans-serif; margin: 30px; }}
+h1, h2 {{ color: #ff6b35; }}
+section {{ border: 2px solid #333; border-radius: 15px; padding: 20px; margin-bottom: 30px; }}
+table {{ border-collapse: collapse; margin-bottom: 20px; }}
+th, td {{ padding: 4px 8px; border: 1px solid #333; text-align: right; }}
+.heatmap td {{ min-width: 22px; font-size: 0.8rem; }}
+.bar {{ display: inline-block; height: 10px; background: #ff6b35; margin-right: 8px; }}
+</style>
+</head>
+<body>
+<h1>🎃 ScarePi Season Report</h1>
+<p>Generated {html.escape(report['generated_at'])} from {html.escape(report['database'])}
+({report['rows_read']['show_analytics']} events, {report['rows_read']['audience']} audience members,
+UTC{report['tz_offset_hours']:+g}h)</p>
+{chr(10).join(sections)}
+</body>
+</html>
+'''
+
+
+def main():
+    """Build the report and write it out."""
+    parser = argparse.ArgumentParser(description='ScarePi season-over-season analytics report')
+    parser.add_argument('--db', default=None, help='Database path (default: $SCAREPI_DB_PATH or local)')
+    parser.add_argument('--output', default='scarepi_report.html', help='Output file')
+    parser.add_argument('--format', choices=['html', 'json'], default=None,
+                        help='Report format (default: from the output file extension)')
+    parser.add_argument('--tz-offset', type=float, default=None,
+                        help='Hours from UTC for heatmaps (default: this machine\'s offset)')
+    parser.add_argument('--season', type=int, action='append',
+                        help='Only include this season (year); repeat for several')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Rows per fetch')
+    args = parser.parse_args()
+
+    report_format = args.format or ('json' if args.output.endswith('.json') else 'html')
+    tz_offset = local_utc_offset_hours() if args.tz_offset is None else args.tz_offset
+
+    # Read-only: a report never creates, migrates or writes to the database (or a backup)
+    db_path = args.db or os.environ.get(DB_PATH_ENV) or LOCAL_DB_PATH
+    if not os.path.isfile(db_path):
+        print(f"❌ No database at {db_path}")
+        return 1
+    db = ScareDatabase(db_path, read_only=True)
+    missing = missing_columns(db)
+    if missing:
+        print(f"❌ {db_path} is not a ScarePi database (missing {', '.join(missing)})")
+        db.close()
+        return 1
+    print(f"📊 Building report from {db.db_path}...")
+    report = ReportBuilder(db, tz_offset, args.season, args.chunk_size).build()
+    db.close()
+
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        if report_format == 'json':
+            json.dump(report, f, indent=2)
+        else:
+            f.write(render_html(report))
+    print(f"✅ Report written to {args.output} "
+          f"({report['rows_read']['show_analytics']} events, "
+          f"{report['rows_read']['audience']} audience members in {report['build_seconds']}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,302 +4,310 @@ ScarePi Enhanced Docker Version - Marketing Platform
 Optimized for Docker containers and Unraid deployment
 """
 
-from flask import Flask, render_template, jsonify, request, redirect, url_for, send_file
+from flask import (Flask, render_template, jsonify, request, redirect, url_for, Response,
+                   stream_with_context)
 import threading
-import time
-import json
 import os
-import qrcode
 import io
-import base64
-from datetime import datetime, timedelta
+from datetime import datetime
 import sqlite3
-import hashlib
-import secrets
+from scarepi_analytics import AnalyticsWriter
+from scarepi_events import EventBroadcaster
+from scarepi_core import ScareController
+from scarepi_timeline import build_scare_timeline
+from scarepi_actions import ActionDispatcher, describe_dispatch, QUEUED
+from scarepi_async import ControllerLoop
+from scarepi_zones import ZoneManager
+from scarepi_media import MediaPipeline
+from scarepi_metrics import install_flask_metrics, DB_WRITE_SECONDS
+from scarepi_ratelimit import RateLimiter, rate_limited
+from scarepi_auth import admin_required
+from scarepi_state import SharedState, ControllerElection, StateSync, reset_show_state
+from scarepi_rollups import parse_timeseries_args, read_timeseries
+from scarepi_audience_io import (EXPORT_FORMATS, EmailIndex, export_audience, parse_records,
+                                 import_audience, AudienceImportError)
+from scarepi_qr import render_qr_png, audience_url, prewarm_qr_cache, QR_SOURCE_TAG
+from scarepi_db import (ScareDatabase, resolve_db_path, migrate, schema_version,
+                        read_stats_counters, normalize_email, DOCKER_DB_PATH, LOCAL_DB_PATH)
 
 app = Flask(__name__)
+# Per-route latency histograms and the Prometheus /metrics endpoint
+install_flask_metrics(app)
+
+# Live updates for every open control panel / analytics tab
+events = EventBroadcaster()
+
+# Hardware actions are coroutines on one scare loop, one at a time per actuator
+scare_loop = ControllerLoop()
+actions = ActionDispatcher(max_queue=4, loop=scare_loop)
+FULL_SCARE_ACTUATORS = ('camera', 'prop', 'sound')
+
+# Token buckets per client IP and overall, ahead of every write endpoint
+join_limiter = RateLimiter.from_env('join')
+write_limiter = RateLimiter.from_env('write')
+
+# Lock file electing the one worker process that owns the motion loop and props
+CONTROLLER_LOCK_NAME = 'scarepi_controller.lock'
 
 # Docker-optimized ScarePi with marketing features
-class DockerScarePi:
-    def __init__(self):
+class DockerScarePi(ScareController):
+    name = 'Docker ScarePi'
+    clip_prefix = 'docker_scare'
+
+    def __init__(self, backends=None):
         """Initialize Docker-optimized ScarePi."""
-        self.running = True
-        self.show_stats = {
-            'total_scares': 0,
-            'audience_count': 0,
-            'show_start_time': None,
-            'last_scare_time': None
-        }
+        super().__init__(backends=backends)
         
         # Initialize database
+        self.db = ScareDatabase(resolve_db_path(DOCKER_DB_PATH))
         self.init_database()
+        # Show/motion state lives in the database so every worker sees the same show
+        self.state = SharedState(self.db)
+        self.election = ControllerElection(os.path.join(
+            os.path.dirname(os.path.abspath(self.db.db_path)), CONTROLLER_LOCK_NAME))
+        # Registered emails in memory so re-submits never reach the write path
+        self.email_index = EmailIndex.load(self.db)
+        self.analytics = AnalyticsWriter(self.db, on_flush=self._on_analytics_flush).start()
         
-        print("🎃 Docker ScarePi initialized with marketing features!")
         print("📊 Analytics and audience engagement ready!")
         print("🌙 Ready to spook and grow your following!")
         print("🐳 Running in Docker container mode!")
     
     def init_database(self):
         """Initialize SQLite database for audience data."""
-        import os
-        
         try:
-            # Ensure data directory exists
-            data_dir = '/app/data'
-            if not os.path.exists(data_dir):
-                os.makedirs(data_dir, exist_ok=True)
-                print(f"📁 Created data directory: {data_dir}")
-            
-            # Set database path
-            db_path = os.path.join(data_dir, 'scarepi_audience.db')
-            print(f"🗄️ Database path: {db_path}")
-            
-            # Connect to database
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            print("✅ Database connection successful!")
-            
-            # Create audience table
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS audience (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                email TEXT UNIQUE NOT NULL,
-                phone TEXT,
-                social_media TEXT,
-                how_heard TEXT,
-                interests TEXT,
-                subscribe_youtube BOOLEAN DEFAULT 0,
-                subscribe_updates BOOLEAN DEFAULT 1,
-                join_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                ip_address TEXT,
-                user_agent TEXT
-            )
-        ''')
-        
-        # Create show analytics table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS show_analytics (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                event_type TEXT NOT NULL,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                details TEXT
-            )
-        ''')
-            
-            conn.commit()
-            conn.close()
-            print("✅ Database tables created successfully!")
+            print(f"🗄️ Database path: {self.db.db_path}")
+            migrate(self.db)
+            print(f"✅ Database ready at schema version {schema_version(self.db)}")
             
         except Exception as e:
             print(f"❌ Database initialization error: {e}")
             print("🔄 Attempting to create database in current directory...")
             try:
                 # Fallback to current directory
-                conn = sqlite3.connect('scarepi_audience.db')
-                cursor = conn.cursor()
-                
-                # Create tables
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS audience (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        name TEXT NOT NULL,
-                        email TEXT UNIQUE NOT NULL,
-                        phone TEXT,
-                        social_media TEXT,
-                        how_heard TEXT,
-                        interests TEXT,
-                        subscribe_youtube BOOLEAN DEFAULT 0,
-                        subscribe_updates BOOLEAN DEFAULT 1,
-                        join_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        ip_address TEXT,
-                        user_agent TEXT
-                    )
-                ''')
-                
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS show_analytics (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        event_type TEXT NOT NULL,
-                        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        details TEXT
-                    )
-                ''')
-                
-                conn.commit()
-                conn.close()
+                self.db.close()
+                self.db = ScareDatabase(LOCAL_DB_PATH)
+                migrate(self.db)
                 print("✅ Fallback database created successfully!")
                 
             except Exception as fallback_error:
                 print(f"❌ Fallback database creation failed: {fallback_error}")
                 raise
     
-    def motion_detected(self):
-        """Mock motion detection for Docker demo."""
-        import random
-        return random.choice([True, False, False, False, False])  # 20% chance
-    
-    def trigger_prop(self, duration=2.0):
-        """Mock prop trigger for Docker demo."""
-        print("🦇 BOO! Docker prop triggered!")
-        self.log_analytics('prop_triggered', f'Duration: {duration}s')
-        time.sleep(duration)
-        print("⚡ Docker prop finished!")
-    
-    def play_scary_sound(self, sound_file="scary_sound.ogg"):
-        """Mock sound playing for Docker demo."""
-        print(f"🔊 Docker playing scary sound: {sound_file}")
-        self.log_analytics('sound_played', f'Sound: {sound_file}')
-        time.sleep(1)
-    
-    def record_scare(self, filename=None):
-        """Mock video recording for Docker demo."""
-        if filename is None:
-            current = datetime.now()
-            filename = f"docker_scare_{current.strftime('%Y%m%d_%H%M%S')}.h264"
-        
-        print(f"📹 Docker recording scare: {filename}")
-        self.log_analytics('recording_started', f'File: {filename}')
-        time.sleep(2)
-        print(f"🎬 Docker scare recorded: {filename}")
-        return filename
-    
     def log_analytics(self, event_type, details=""):
         """Log show analytics to database."""
-        conn = sqlite3.connect('/app/data/scarepi_audience.db')
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO show_analytics (event_type, details)
-            VALUES (?, ?)
-        ''', (event_type, details))
-        conn.commit()
-        conn.close()
-        
-        # Update show stats
-        if event_type == 'scare_sequence':
-            self.show_stats['total_scares'] += 1
-            self.show_stats['last_scare_time'] = datetime.now()
+        # Queued for the background writer so callers never wait on disk
+        self.analytics.log(event_type, details)
     
     def add_audience_member(self, data):
         """Add new audience member to database."""
-        import os
-        db_path = os.path.join('/app/data', 'scarepi_audience.db')
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
+        email = (data.get('email') or '').strip()
+        if email in self.email_index:
+            return False  # Email already exists
         try:
-            cursor.execute('''
-                INSERT INTO audience (name, email, phone, social_media, how_heard, 
-                                    interests, subscribe_youtube, subscribe_updates, 
-                                    ip_address, user_agent)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                data.get('name'),
-                data.get('email'),
-                data.get('phone', ''),
-                data.get('social_media', ''),
-                data.get('how_heard', ''),
-                data.get('interests', ''),
-                data.get('subscribe_youtube', False),
-                data.get('subscribe_updates', True),
-                data.get('ip_address', ''),
-                data.get('user_agent', '')
-            ))
-            conn.commit()
-            self.show_stats['audience_count'] += 1
+            with DB_WRITE_SECONDS.labels('audience_insert').time():
+                self.db.execute('''
+                    INSERT INTO audience (name, email, email_normalized, phone, social_media,
+                                        how_heard, interests, subscribe_youtube,
+                                        subscribe_updates, ip_address, user_agent)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    data.get('name'),
+                    email or None,
+                    normalize_email(email) or None,
+                    data.get('phone', ''),
+                    data.get('social_media', ''),
+                    data.get('how_heard', ''),
+                    data.get('interests', ''),
+                    data.get('subscribe_youtube', False),
+                    data.get('subscribe_updates', True),
+                    data.get('ip_address', ''),
+                    data.get('user_agent', '')
+                ))
+            self.email_index.add(email)
             self.log_analytics('audience_joined', f'Email: {data.get("email")}')
             return True
-        except sqlite3.IntegrityError:
+        except sqlite3.IntegrityError as e:
+            if 'UNIQUE' in str(e):
+                # Registered through another worker since this index was loaded
+                self.email_index.add(email)
             return False  # Email already exists
-        finally:
-            conn.close()
+    
+    def _on_analytics_flush(self, batch):
+        """Push fresh stats once counted events have reached the database."""
+        if any(event_type in ('scare_sequence', 'audience_joined') for event_type, _, _ in batch):
+            broadcast('audience', self.get_audience_stats())
     
     def get_audience_stats(self):
         """Get audience statistics."""
-        import os
-        db_path = os.path.join('/app/data', 'scarepi_audience.db')
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT COUNT(*) FROM audience')
-        total_audience = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM audience WHERE subscribe_youtube = 1')
-        youtube_subscribers = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM show_analytics WHERE event_type = "scare_sequence"')
-        total_scares = cursor.fetchone()[0]
-        
-        conn.close()
+        # Trigger-maintained counters, constant cost however big the tables get
+        counters = read_stats_counters(self.db)
         
         return {
-            'total_audience': total_audience,
-            'youtube_subscribers': youtube_subscribers,
-            'total_scares': total_scares,
+            'total_audience': counters['total_audience'],
+            'youtube_subscribers': counters['youtube_subscribers'],
+            'total_scares': counters['total_scares'],
             'show_duration': self.get_show_duration()
         }
     
     def get_show_duration(self):
         """Get current show duration."""
-        if self.show_stats['show_start_time']:
-            return str(datetime.now() - self.show_stats['show_start_time']).split('.')[0]
+        show_start_time = self.state.get('show_start_time')
+        if show_start_time:
+            return str(datetime.now() - datetime.fromisoformat(show_start_time)).split('.')[0]
         return "0:00:00"
 
-# Global Docker ScarePi instance
+# Per-process handles; show state itself is shared through scarepi.state
 scarepi = None
-motion_enabled = False
-motion_thread = None
-show_active = False
+state_sync = None
+zones = None
+media = None
+zone_status_version = None
+media_status_version = None
 
 def init_scarepi():
     """Initialize the Docker ScarePi system."""
-    global scarepi
+    global scarepi, state_sync, zones, media
     try:
         scarepi = DockerScarePi()
+        # Every worker knows the zones; only the controller arms them
+        zones = ZoneManager.from_config(scarepi, loop=scare_loop, dispatcher=actions,
+                                        on_motion=zone_motion, on_scare=zone_scared)
+        # Saved clips are remuxed to MP4 with thumbnails by low-priority workers
+        media = MediaPipeline.from_env()
+        if media:
+            media.attach(scarepi)
+        state_sync = StateSync(scarepi.state, scarepi.election, events,
+                               on_tick=reconcile_controller).start()
+        # Render QR codes off the startup path (in every gunicorn worker too)
+        threading.Thread(target=prewarm_qr_cache, name='qr-prewarm', daemon=True).start()
         return True
     except Exception as e:
         print(f"Failed to initialize Docker ScarePi: {e}")
         return False
 
-def motion_detection_loop():
-    """Background thread for motion detection."""
-    global motion_enabled, scarepi
-    print("Docker motion detection thread started...")
-    
-    while motion_enabled and scarepi:
-        try:
-            motion_detected = scarepi.motion_detected()
-            if motion_detected:
-                print("DOCKER MOTION DETECTED! BOO!")
-                trigger_full_scare()
-                time.sleep(5)  # Cooldown period
-            time.sleep(0.1)
-        except Exception as e:
-            print(f"Docker motion detection error: {e}")
-            break
+def is_controller():
+    """True if this worker process owns the motion loop and hardware."""
+    return scarepi is not None and scarepi.election.is_leader
+
+def motion_enabled():
+    """Shared motion detection flag."""
+    return bool(scarepi and scarepi.state.get('motion_enabled', False))
+
+def broadcast(event, data):
+    """Publish to this worker's subscribers and relay to the other workers."""
+    events.publish(event, data)
+    if scarepi:
+        scarepi.state.append_event(event, data)
+
+def reconcile_controller(leader):
+    """Controller only: follow the shared motion flag and zone settings, run queued commands."""
+    global zone_status_version, media_status_version
+    if not leader:
+        zones.disarm()
+        return
+    zones.apply_settings(scarepi.state.get('zone_settings', {}))
+    if motion_enabled():
+        zones.arm()
+    else:
+        zones.disarm()
+    for name in scarepi.state.claim_commands():
+        if name in HARDWARE_ACTIONS:
+            dispatch_action(name)
+        elif name.startswith('zone:') and name[len('zone:'):] in zones.zones:
+            zones.trigger(name[len('zone:'):])
+    # Other workers answer /api/zones from the last published status
+    if zones.version != zone_status_version:
+        zone_status_version = zones.version
+        scarepi.state.set('zone_status', zones.status())
+    if media and media.version != media_status_version:
+        media_status_version = media.version
+        scarepi.state.set('media_status', media.status())
+
+def zone_status():
+    """Live zone status on the controller, the last published one elsewhere."""
+    if is_controller():
+        return zones.status()
+    return scarepi.state.get('zone_status') or zones.status()
+
+def media_status():
+    """Post-processing status: live on the controller, last published elsewhere."""
+    if is_controller():
+        return media.status()
+    return scarepi.state.get('media_status') or media.status()
+
+def zone_motion(zone):
+    """Zone loop: a zone's sensor started a scare."""
+    timestamp = datetime.now().isoformat()
+    broadcast('motion', {'zone': zone.name, 'timestamp': timestamp})
+    broadcast('scare', {'stage': 'started', 'zone': zone.name, 'timestamp': timestamp})
 
-def trigger_full_scare():
+def zone_scared(zone, timing):
+    """Zone loop: a zone's scare finished."""
+    scarepi.state.set('last_scare_timing', timing)
+    scarepi.log_analytics('scare_sequence',
+                          f"Zone {zone.name} scare (max skew {timing['max_skew_ms']} ms)")
+    broadcast('scare', {'stage': 'finished', 'zone': zone.name,
+                        'timestamp': datetime.now().isoformat(), 'timing': timing})
+
+async def trigger_full_scare():
     """Trigger the complete Docker scare sequence."""
     if scarepi:
-        scarepi.record_scare()
-        scarepi.trigger_prop()
-        scarepi.play_scary_sound()
-        scarepi.log_analytics('scare_sequence', 'Full scare sequence triggered')
+        # Shared-state writes hit SQLite, so they run off the scare loop
+        await scare_loop.offload(broadcast, 'scare', {'stage': 'started',
+                                                      'timestamp': datetime.now().isoformat()})
+        # Camera, prop and sound start together on one clock
+        timing = await build_scare_timeline(scarepi).run()
+        await scare_loop.offload(finish_full_scare, timing)
+
+def finish_full_scare(timing):
+    """Record and announce a finished full scare (worker thread)."""
+    scarepi.state.set('last_scare_timing', timing)
+    scarepi.log_analytics('scare_sequence',
+                          f"Full scare sequence triggered (max skew {timing['max_skew_ms']} ms)")
+    broadcast('scare', {'stage': 'finished', 'timestamp': datetime.now().isoformat(),
+                        'timing': timing})
+
+# Hardware actions by name, so any worker can hand one to the controller
+HARDWARE_ACTIONS = {
+    'full': (trigger_full_scare, FULL_SCARE_ACTUATORS),
+    'prop': (lambda: scarepi.trigger_prop_async(), ('prop',)),
+    'sound': (lambda: scarepi.play_scary_sound(), ('sound',)),
+    'record': (lambda: scarepi.record_scare(), ('camera',))
+}
+
+def dispatch_action(name):
+    """Run a hardware action on the controller's pool, or queue it for the controller."""
+    fn, actuators = HARDWARE_ACTIONS[name]
+    if is_controller():
+        return actions.submit(name, fn, actuators=actuators)
+    scarepi.state.enqueue_command(name)
+    return {'status': QUEUED, 'action': name, 'busy': [],
+            'queue_depth': scarepi.state.pending_commands()}
+
+def current_status():
+    """Snapshot of system status shared by /api/status and the event stream."""
+    shared = scarepi.state.snapshot() if scarepi else {}
+    return {
+        'motion_enabled': shared.get('motion_enabled', False),
+        'scarepi_initialized': scarepi is not None,
+        'actions': actions.stats(),
+        'zones': zone_status() if scarepi else None,
+        'media': media_status()['stats'] if media else None,
+        'show_active': shared.get('show_active', False),
+        'worker': {'pid': os.getpid(), 'controller': is_controller()},
+        'analytics_writer': scarepi.analytics.stats() if scarepi else None,
+        'email_index': scarepi.email_index.stats() if scarepi else None,
+        'rate_limits': {'join': join_limiter.stats(), 'write': write_limiter.stats()},
+        'motion': scarepi.motion_source.stats() if scarepi else None,
+        'hardware': scarepi.hardware_status() if scarepi else None,
+        'event_subscribers': events.subscriber_count(),
+        'timestamp': datetime.now().isoformat()
+    }
 
 def generate_qr_code(data, size=200):
-    """Generate QR code for show access."""
-    qr = qrcode.QRCode(version=1, box_size=10, border=5)
-    qr.add_data(data)
-    qr.make(fit=True)
-    
-    img = qr.make_image(fill_color="orange", back_color="black")
-    
-    # Convert to base64 for web display
-    buffer = io.BytesIO()
-    img.save(buffer, format='PNG')
-    buffer.seek(0)
-    
-    return base64.b64encode(buffer.getvalue()).decode()
+    """Generate QR code for show access (served from the render cache)."""
+    return render_qr_png(data).base64
 
 # Routes
 @app.route('/')
@@ -310,6 +318,9 @@ def index():
 @app.route('/audience')
 def audience_form():
     """Audience engagement form."""
+    # Scans arrive tagged from the QR payload; feeds the scares → QR → join funnel
+    if scarepi and request.args.get('src') == QR_SOURCE_TAG:
+        scarepi.log_analytics('qr_viewed', request.headers.get('User-Agent', '')[:200])
     return render_template('audience_form.html')
 
 @app.route('/analytics')
@@ -324,21 +335,36 @@ def analytics_dashboard():
 def qr_code():
     """Generate QR code for show access."""
     # Get the current server URL
-    base_url = request.url_root.rstrip('/')
-    qr_data = f"{base_url}/audience"
+    qr_data = audience_url(request.url_root)
     
-    qr_code_b64 = generate_qr_code(qr_data)
-    return render_template('qr_display.html', qr_code=qr_code_b64, qr_data=qr_data)
+    # The image itself is served (and browser-cached) by /qr.png
+    qr_image = render_qr_png(qr_data)
+    return render_template('qr_display.html', qr_data=qr_data, qr_etag=qr_image.etag)
+
+@app.route('/qr.png')
+def qr_png():
+    """Serve the cached QR code image with a strong ETag."""
+    qr_image = render_qr_png(audience_url(request.url_root))
+    response = Response(qr_image.png, mimetype='image/png')
+    response.set_etag(qr_image.etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = 300
+    return response.make_conditional(request)
 
 @app.route('/api/status')
 def get_status():
     """Get current system status."""
-    return jsonify({
-        'motion_enabled': motion_enabled,
-        'scarepi_initialized': scarepi is not None,
-        'show_active': show_active,
-        'timestamp': datetime.now().isoformat()
-    })
+    return jsonify(current_status())
+
+@app.route('/api/events')
+def event_stream():
+    """Server-Sent Events stream of status, motion, scare and audience changes."""
+    initial = [('status', current_status())]
+    if scarepi:
+        initial.append(('audience', scarepi.get_audience_stats()))
+    return Response(stream_with_context(events.stream(initial)),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @app.route('/api/audience/stats')
 def get_audience_stats():
@@ -347,7 +373,19 @@ def get_audience_stats():
         return jsonify(scarepi.get_audience_stats())
     return jsonify({'error': 'ScarePi not initialized'}), 500
 
+@app.route('/api/analytics/timeseries')
+def get_analytics_timeseries():
+    """Event counts per minute/hour/day from the rollup tables."""
+    if not scarepi:
+        return jsonify({'error': 'ScarePi not initialized'}), 500
+    
+    try:
+        return jsonify(read_timeseries(scarepi.db, **parse_timeseries_args(request.args)))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
 @app.route('/api/audience/join', methods=['POST'])
+@rate_limited(join_limiter)
 def join_audience():
     """Add new audience member."""
     if not scarepi:
@@ -370,73 +408,196 @@ def join_audience():
             'success': False
         })
 
+@app.route('/api/audience/export')
+@admin_required
+def export_audience_data():
+    """Stream the audience table as CSV (default) or NDJSON."""
+    if not scarepi:
+        return jsonify({'error': 'ScarePi not initialized'}), 500
+    
+    export_format = request.args.get('format', 'csv').lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f'Unsupported format: {export_format}'}), 400
+    
+    filename = f"scarepi_audience_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{export_format}"
+    return Response(stream_with_context(export_audience(scarepi.db, export_format)),
+                    mimetype=EXPORT_FORMATS[export_format],
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
+@app.route('/api/audience/import', methods=['POST'])
+@admin_required
+@rate_limited(write_limiter)
+def import_audience_data():
+    """Bulk import audience rows from an uploaded CSV or NDJSON file."""
+    if not scarepi:
+        return jsonify({'error': 'ScarePi not initialized'}), 500
+    
+    upload = request.files.get('file')
+    stream = upload.stream if upload else request.stream
+    import_format = request.args.get('format')
+    if not import_format:
+        name = upload.filename if upload else ''
+        import_format = 'ndjson' if name.endswith(('.ndjson', '.jsonl')) else 'csv'
+    if import_format not in EXPORT_FORMATS:
+        return jsonify({'error': f'Unsupported format: {import_format}'}), 400
+    
+    # Decode incrementally so large files are never held in memory
+    text_stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    try:
+        report = import_audience(scarepi.db, parse_records(text_stream, import_format),
+                                 email_index=scarepi.email_index)
+    except AudienceImportError as e:
+        return jsonify(dict(e.report, error=f'Could not parse import: {e}')), 400
+    
+    scarepi.log_analytics('audience_imported',
+                          f"Inserted: {report['inserted']}, duplicates: {report['duplicates']}")
+    broadcast('audience', scarepi.get_audience_stats())
+    return jsonify(report)
+
 @app.route('/api/show/start', methods=['POST'])
+@rate_limited(write_limiter)
 def start_show():
     """Start the Halloween show."""
-    global show_active
     if scarepi:
-        show_active = True
-        scarepi.show_stats['show_start_time'] = datetime.now()
+        scarepi.state.update(show_active=True, show_start_time=datetime.now().isoformat())
         scarepi.log_analytics('show_started', 'Halloween show began')
+        broadcast('status', current_status())
         return jsonify({'message': '🎃 Halloween show started! 👻'})
     return jsonify({'error': 'ScarePi not initialized'}), 500
 
 @app.route('/api/show/stop', methods=['POST'])
+@rate_limited(write_limiter)
 def stop_show():
     """Stop the Halloween show."""
-    global show_active, motion_enabled
     if scarepi:
-        show_active = False
-        motion_enabled = False
+        scarepi.state.update(show_active=False, motion_enabled=False)
         scarepi.log_analytics('show_stopped', 'Halloween show ended')
+        broadcast('status', current_status())
         return jsonify({'message': '🛑 Halloween show stopped! 🎃'})
     return jsonify({'error': 'ScarePi not initialized'}), 500
 
 @app.route('/api/motion/toggle', methods=['POST'])
+@rate_limited(write_limiter)
 def toggle_motion():
     """Toggle motion detection on/off."""
-    global motion_enabled, motion_thread
+    if not scarepi:
+        return jsonify({'error': 'ScarePi not initialized'}), 500
     
-    motion_enabled = not motion_enabled
+    enabled = scarepi.state.toggle('motion_enabled')
+    # The controller starts the loop now; other workers leave it to its next sync
+    reconcile_controller(is_controller())
+    broadcast('status', current_status())
     
-    if motion_enabled:
-        if motion_thread is None or not motion_thread.is_alive():
-            motion_thread = threading.Thread(target=motion_detection_loop, daemon=True)
-            motion_thread.start()
+    if enabled:
         return jsonify({'status': 'enabled', 'message': 'Motion detection activated! 👻'})
     else:
         return jsonify({'status': 'disabled', 'message': 'Motion detection deactivated 🛑'})
 
+@app.route('/api/zones')
+def get_zones():
+    """Every zone's settings, live state and counters."""
+    if scarepi:
+        return jsonify(zone_status())
+    return jsonify({'error': 'ScarePi not initialized'}), 500
+
+@app.route('/api/zones/<name>', methods=['POST'])
+@rate_limited(write_limiter)
+def configure_zone(name):
+    """Enable/disable a zone or change its cooldown and prop duration."""
+    if not scarepi:
+        return jsonify({'error': 'ScarePi not initialized'}), 500
+    settings = request.get_json(silent=True) or {}
+    try:
+        # Validate against this worker's copy, then share for the controller
+        zone = zones.configure(name, **settings)
+    except KeyError:
+        return jsonify({'error': f'No zone named {name}'}), 404
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    scarepi.state.merge('zone_settings', {name: {key: zone[key] for key in settings}})
+    reconcile_controller(is_controller())
+    broadcast('status', current_status())
+    return jsonify(zone)
+
+@app.route('/api/zones/<name>/trigger', methods=['POST'])
+@rate_limited(write_limiter)
+def trigger_zone(name):
+    """Fire one zone's scare as if its sensor tripped."""
+    if not scarepi:
+        return jsonify({'error': 'ScarePi not initialized'}), 500
+    if name not in zones.zones:
+        return jsonify({'error': f'No zone named {name}'}), 404
+    if is_controller():
+        zones.trigger(name)
+        return jsonify({'message': f'Zone {name} triggered! 🎃'})
+    scarepi.state.enqueue_command(f'zone:{name}')
+    return jsonify({'message': f'Zone {name} trigger sent to the controller 🎃'})
+
+@app.route('/api/media')
+def get_media():
+    """Clip post-processing counters and recent jobs."""
+    if media:
+        return jsonify(media_status())
+    return jsonify({'error': 'Clip post-processing is off'}), 404
+
+@app.route('/api/media/<int:job_id>')
+def get_media_job(job_id):
+    """One post-processing job."""
+    if not media:
+        job = None
+    elif is_controller():
+        job = media.get(job_id)
+    else:
+        job = next((job for job in media_status()['jobs'] if job['id'] == job_id), None)
+    if job:
+        return jsonify(job)
+    return jsonify({'error': f'No media job {job_id}'}), 404
+
 @app.route('/api/scare/full', methods=['POST'])
+@rate_limited(write_limiter)
 def trigger_full_scare_api():
     """Manually trigger full scare sequence."""
     if scarepi:
-        threading.Thread(target=trigger_full_scare, daemon=True).start()
-        return jsonify({'message': 'Full Docker scare sequence triggered! 🎃💀'})
+        result = dispatch_action('full')
+        body, status = describe_dispatch(result, 'Full Docker scare sequence triggered! 🎃💀')
+        return jsonify(body), status
     return jsonify({'error': 'ScarePi not initialized'}), 500
 
 @app.route('/api/scare/prop', methods=['POST'])
+@rate_limited(write_limiter)
 def trigger_prop():
     """Manually trigger prop only."""
     if scarepi:
-        threading.Thread(target=scarepi.trigger_prop, daemon=True).start()
-        return jsonify({'message': 'Docker prop triggered! 🦇'})
+        result = dispatch_action('prop')
+        body, status = describe_dispatch(result, 'Docker prop triggered! 🦇')
+        return jsonify(body), status
     return jsonify({'error': 'ScarePi not initialized'}), 500
 
 @app.route('/api/scare/sound', methods=['POST'])
+@rate_limited(write_limiter)
 def trigger_sound():
     """Manually trigger sound only."""
     if scarepi:
-        threading.Thread(target=scarepi.play_scary_sound, daemon=True).start()
-        return jsonify({'message': 'Docker scary sound playing! 🔊👻'})
+        result = dispatch_action('sound')
+        body, status = describe_dispatch(result, 'Docker scary sound playing! 🔊👻')
+        return jsonify(body), status
     return jsonify({'error': 'ScarePi not initialized'}), 500
 
+@app.route('/api/scare/timing')
+def get_scare_timing():
+    """Per-stage start skew of the most recent full scare."""
+    return jsonify(scarepi.state.get('last_scare_timing', {}) if scarepi else {})
+
 @app.route('/api/scare/record', methods=['POST'])
+@rate_limited(write_limiter)
 def trigger_record():
     """Manually start recording."""
     if scarepi:
-        filename = scarepi.record_scare()
-        return jsonify({'message': f'Docker recording started: {filename} 📹'})
+        if is_controller():
+            filename = scarepi.record_scare()
+            return jsonify({'message': f'Docker recording started: {filename} 📹'})
+        dispatch_action('record')
+        return jsonify({'message': 'Docker recording requested from the controller 📹'})
     return jsonify({'error': 'ScarePi not initialized'}), 500
 
 if __name__ == '__main__':
@@ -445,13 +606,17 @@ if __name__ == '__main__':
     print("📊 Analytics, audience engagement, and QR codes ready!")
     print("🐳 Running in Docker container mode!")
     
+    port = int(os.environ.get('SCAREPI_PORT', '5001'))
     if init_scarepi():
+        # Single process: this one is the controller, start from a stopped show
+        reset_show_state(scarepi.state)
         print("✅ Docker ScarePi initialized successfully!")
         print("🌐 Starting enhanced web server...")
-        print("🔗 Open your browser to: http://localhost:5001")
-        print("📱 QR Code available at: http://localhost:5001/qr")
-        print("👥 Audience form at: http://localhost:5001/audience")
-        print("📊 Analytics at: http://localhost:5001/analytics")
-        app.run(host='0.0.0.0', port=5001, debug=False)
+        print(f"🔗 Open your browser to: http://localhost:{port}")
+        print(f"📱 QR Code available at: http://localhost:{port}/qr")
+        print(f"👥 Audience form at: http://localhost:{port}/audience")
+        print(f"📊 Analytics at: http://localhost:{port}/analytics")
+        print("💡 For multiple workers run: gunicorn -c gunicorn.conf.py wsgi:app")
+        app.run(host='0.0.0.0', port=port, debug=False, threaded=True)
     else:
         print("❌ Failed to initialize Docker ScarePi.")
@@ -4,32 +4,55 @@ ScarePi Enhanced Web UI - Full Marketing & Engagement Platform
 A spooky web interface with audience engagement, QR codes, and social features!
 """
 
-from flask import Flask, render_template, jsonify, request, redirect, url_for, send_file
+from flask import (Flask, render_template, jsonify, request, redirect, url_for, Response,
+                   stream_with_context)
 import threading
-import time
-import json
 import os
-import qrcode
 import io
-import base64
-from datetime import datetime, timedelta
-import csv
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from datetime import datetime
 import sqlite3
-import hashlib
-import secrets
+from scarepi_analytics import AnalyticsWriter
+from scarepi_events import EventBroadcaster
+from scarepi_core import ScareController
+from scarepi_timeline import build_scare_timeline
+from scarepi_actions import ActionDispatcher, describe_dispatch
+from scarepi_async import ControllerLoop
+from scarepi_zones import ZoneManager
+from scarepi_media import MediaPipeline
+from scarepi_metrics import install_flask_metrics, DB_WRITE_SECONDS
+from scarepi_ratelimit import RateLimiter, rate_limited
+from scarepi_auth import admin_required
+from scarepi_rollups import parse_timeseries_args, read_timeseries
+from scarepi_audience_io import (EXPORT_FORMATS, EmailIndex, export_audience, parse_records,
+                                 import_audience, AudienceImportError)
+from scarepi_qr import render_qr_png, audience_url, prewarm_qr_cache, QR_SOURCE_TAG
+from scarepi_db import (ScareDatabase, resolve_db_path, migrate, read_stats_counters,
+                        normalize_email, LOCAL_DB_PATH)
 
 app = Flask(__name__)
+# Per-route latency histograms and the Prometheus /metrics endpoint
+install_flask_metrics(app)
+
+# Live updates for every open control panel / analytics tab
+events = EventBroadcaster()
+
+# Hardware actions are coroutines on one scare loop, one at a time per actuator
+scare_loop = ControllerLoop()
+actions = ActionDispatcher(max_queue=4, loop=scare_loop)
+FULL_SCARE_ACTUATORS = ('camera', 'prop', 'sound')
+
+# Token buckets per client IP and overall, ahead of every write endpoint
+join_limiter = RateLimiter.from_env('join')
+write_limiter = RateLimiter.from_env('write')
 
 # Enhanced ScarePi with marketing features
-class EnhancedScarePi:
-    def __init__(self, motion_pin=35, relay_pin=37):
+class EnhancedScarePi(ScareController):
+    name = 'Enhanced ScarePi'
+    clip_prefix = 'enhanced_scare'
+
+    def __init__(self, motion_pin=35, relay_pin=37, backends=None):
         """Initialize enhanced ScarePi with marketing features."""
-        self.motion_pin = motion_pin
-        self.relay_pin = relay_pin
-        self.running = True
+        super().__init__(motion_pin, relay_pin, backends)
         self.show_stats = {
             'total_scares': 0,
             'audience_count': 0,
@@ -38,91 +61,23 @@ class EnhancedScarePi:
         }
         
         # Initialize database
+        self.db = ScareDatabase(resolve_db_path(LOCAL_DB_PATH))
         self.init_database()
+        # Registered emails in memory so re-submits never reach the write path
+        self.email_index = EmailIndex.load(self.db)
+        self.analytics = AnalyticsWriter(self.db, on_flush=self._on_analytics_flush).start()
         
-        print("🎃 Enhanced ScarePi initialized with marketing features!")
-        print(f"👁️ Motion sensor on pin: {self.motion_pin}")
-        print(f"⚡ Relay on pin: {self.relay_pin}")
         print("📊 Analytics and audience engagement ready!")
         print("🌙 Ready to spook and grow your following!")
     
     def init_database(self):
         """Initialize SQLite database for audience data."""
-        conn = sqlite3.connect('scarepi_audience.db')
-        cursor = conn.cursor()
-        
-        # Create audience table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS audience (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                email TEXT UNIQUE NOT NULL,
-                phone TEXT,
-                social_media TEXT,
-                how_heard TEXT,
-                interests TEXT,
-                subscribe_youtube BOOLEAN DEFAULT 0,
-                subscribe_updates BOOLEAN DEFAULT 1,
-                join_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                ip_address TEXT,
-                user_agent TEXT
-            )
-        ''')
-        
-        # Create show analytics table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS show_analytics (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                event_type TEXT NOT NULL,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                details TEXT
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
-    
-    def motion_detected(self):
-        """Check if motion is currently detected."""
-        # Mock for testing - replace with actual GPIO on Pi
-        import random
-        return random.choice([True, False, False, False, False])  # 20% chance
-    
-    def trigger_prop(self, duration=2.0):
-        """Trigger Halloween prop and log analytics."""
-        print("🦇 BOO! Enhanced prop triggered!")
-        self.log_analytics('prop_triggered', f'Duration: {duration}s')
-        time.sleep(duration)
-        print("⚡ Enhanced prop finished!")
-    
-    def play_scary_sound(self, sound_file="scary_sound.ogg"):
-        """Play scary sound and log analytics."""
-        print(f"🔊 Enhanced playing scary sound: {sound_file}")
-        self.log_analytics('sound_played', f'Sound: {sound_file}')
-        time.sleep(1)
-    
-    def record_scare(self, filename=None):
-        """Record video and log analytics."""
-        if filename is None:
-            current = datetime.now()
-            filename = f"enhanced_scare_{current.strftime('%Y%m%d_%H%M%S')}.h264"
-        
-        print(f"📹 Enhanced recording scare: {filename}")
-        self.log_analytics('recording_started', f'File: {filename}')
-        time.sleep(2)
-        print(f"🎬 Enhanced scare recorded: {filename}")
-        return filename
+        migrate(self.db)
     
     def log_analytics(self, event_type, details=""):
         """Log show analytics to database."""
-        conn = sqlite3.connect('scarepi_audience.db')
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO show_analytics (event_type, details)
-            VALUES (?, ?)
-        ''', (event_type, details))
-        conn.commit()
-        conn.close()
+        # Queued for the background writer so callers never wait on disk
+        self.analytics.log(event_type, details)
         
         # Update show stats
         if event_type == 'scare_sequence':
@@ -131,56 +86,53 @@ class EnhancedScarePi:
     
     def add_audience_member(self, data):
         """Add new audience member to database."""
-        conn = sqlite3.connect('scarepi_audience.db')
-        cursor = conn.cursor()
-        
+        email = (data.get('email') or '').strip()
+        if email in self.email_index:
+            return False  # Email already exists
         try:
-            cursor.execute('''
-                INSERT INTO audience (name, email, phone, social_media, how_heard, 
-                                    interests, subscribe_youtube, subscribe_updates, 
-                                    ip_address, user_agent)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                data.get('name'),
-                data.get('email'),
-                data.get('phone', ''),
-                data.get('social_media', ''),
-                data.get('how_heard', ''),
-                data.get('interests', ''),
-                data.get('subscribe_youtube', False),
-                data.get('subscribe_updates', True),
-                data.get('ip_address', ''),
-                data.get('user_agent', '')
-            ))
-            conn.commit()
+            with DB_WRITE_SECONDS.labels('audience_insert').time():
+                self.db.execute('''
+                    INSERT INTO audience (name, email, email_normalized, phone, social_media,
+                                        how_heard, interests, subscribe_youtube,
+                                        subscribe_updates, ip_address, user_agent)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    data.get('name'),
+                    email or None,
+                    normalize_email(email) or None,
+                    data.get('phone', ''),
+                    data.get('social_media', ''),
+                    data.get('how_heard', ''),
+                    data.get('interests', ''),
+                    data.get('subscribe_youtube', False),
+                    data.get('subscribe_updates', True),
+                    data.get('ip_address', ''),
+                    data.get('user_agent', '')
+                ))
             self.show_stats['audience_count'] += 1
+            self.email_index.add(email)
             self.log_analytics('audience_joined', f'Email: {data.get("email")}')
             return True
-        except sqlite3.IntegrityError:
+        except sqlite3.IntegrityError as e:
+            if 'UNIQUE' in str(e):
+                # Registered through another worker since this index was loaded
+                self.email_index.add(email)
             return False  # Email already exists
-        finally:
-            conn.close()
+    
+    def _on_analytics_flush(self, batch):
+        """Push fresh stats once counted events have reached the database."""
+        if any(event_type in ('scare_sequence', 'audience_joined') for event_type, _, _ in batch):
+            events.publish('audience', self.get_audience_stats())
     
     def get_audience_stats(self):
         """Get audience statistics."""
-        conn = sqlite3.connect('scarepi_audience.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT COUNT(*) FROM audience')
-        total_audience = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM audience WHERE subscribe_youtube = 1')
-        youtube_subscribers = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM show_analytics WHERE event_type = "scare_sequence"')
-        total_scares = cursor.fetchone()[0]
-        
-        conn.close()
+        # Trigger-maintained counters, constant cost however big the tables get
+        counters = read_stats_counters(self.db)
         
         return {
-            'total_audience': total_audience,
-            'youtube_subscribers': youtube_subscribers,
-            'total_scares': total_scares,
+            'total_audience': counters['total_audience'],
+            'youtube_subscribers': counters['youtube_subscribers'],
+            'total_scares': counters['total_scares'],
             'show_duration': self.get_show_duration()
         }
     
@@ -193,58 +145,78 @@ class EnhancedScarePi:
 # Global enhanced ScarePi instance
 scarepi = None
 motion_enabled = False
-motion_thread = None
+zones = None
+media = None
+last_scare_timing = {}
 show_active = False
 
 def init_scarepi():
     """Initialize the enhanced ScarePi system."""
-    global scarepi
+    global scarepi, zones, media
     try:
         scarepi = EnhancedScarePi(motion_pin=35, relay_pin=37)
+        # Every zone's sensor feeds the scare loop
+        zones = ZoneManager.from_config(scarepi, loop=scare_loop, dispatcher=actions,
+                                        on_motion=zone_motion, on_scare=zone_scared)
+        # Saved clips are remuxed to MP4 with thumbnails by low-priority workers
+        media = MediaPipeline.from_env()
+        if media:
+            media.attach(scarepi)
+        # Render QR codes off the startup path (in every gunicorn worker too)
+        threading.Thread(target=prewarm_qr_cache, name='qr-prewarm', daemon=True).start()
         return True
     except Exception as e:
         print(f"Failed to initialize enhanced ScarePi: {e}")
         return False
 
-def motion_detection_loop():
-    """Background thread for motion detection."""
-    global motion_enabled, scarepi
-    print("Enhanced motion detection thread started...")
-    
-    while motion_enabled and scarepi:
-        try:
-            motion_detected = scarepi.motion_detected()
-            if motion_detected:
-                print("ENHANCED MOTION DETECTED! BOO!")
-                trigger_full_scare()
-                time.sleep(5)  # Cooldown period
-            time.sleep(0.1)
-        except Exception as e:
-            print(f"Enhanced motion detection error: {e}")
-            break
-
-def trigger_full_scare():
+def zone_motion(zone):
+    """Zone loop: a zone's sensor started a scare."""
+    timestamp = datetime.now().isoformat()
+    events.publish('motion', {'zone': zone.name, 'timestamp': timestamp})
+    events.publish('scare', {'stage': 'started', 'zone': zone.name, 'timestamp': timestamp})
+
+def zone_scared(zone, timing):
+    """Zone loop: a zone's scare finished."""
+    last_scare_timing.clear()
+    last_scare_timing.update(timing)
+    scarepi.log_analytics('scare_sequence',
+                          f"Zone {zone.name} scare (max skew {timing['max_skew_ms']} ms)")
+    events.publish('scare', {'stage': 'finished', 'zone': zone.name,
+                             'timestamp': datetime.now().isoformat(), 'timing': timing})
+
+async def trigger_full_scare():
     """Trigger the complete enhanced scare sequence."""
     if scarepi:
-        scarepi.record_scare()
-        scarepi.trigger_prop()
-        scarepi.play_scary_sound()
-        scarepi.log_analytics('scare_sequence', 'Full scare sequence triggered')
+        events.publish('scare', {'stage': 'started', 'timestamp': datetime.now().isoformat()})
+        # Camera, prop and sound start together on one clock
+        timing = await build_scare_timeline(scarepi).run()
+        last_scare_timing.update(timing)
+        scarepi.log_analytics('scare_sequence',
+                              f"Full scare sequence triggered (max skew {timing['max_skew_ms']} ms)")
+        events.publish('scare', {'stage': 'finished', 'timestamp': datetime.now().isoformat(),
+                                 'timing': timing})
+
+def current_status():
+    """Snapshot of system status shared by /api/status and the event stream."""
+    return {
+        'motion_enabled': motion_enabled,
+        'scarepi_initialized': scarepi is not None,
+        'actions': actions.stats(),
+        'zones': zones.status() if zones else None,
+        'media': media.stats() if media else None,
+        'show_active': show_active,
+        'analytics_writer': scarepi.analytics.stats() if scarepi else None,
+        'email_index': scarepi.email_index.stats() if scarepi else None,
+        'rate_limits': {'join': join_limiter.stats(), 'write': write_limiter.stats()},
+        'motion': scarepi.motion_source.stats() if scarepi else None,
+        'hardware': scarepi.hardware_status() if scarepi else None,
+        'event_subscribers': events.subscriber_count(),
+        'timestamp': datetime.now().isoformat()
+    }
 
 def generate_qr_code(data, size=200):
-    """Generate QR code for show access."""
-    qr = qrcode.QRCode(version=1, box_size=10, border=5)
-    qr.add_data(data)
-    qr.make(fit=True)
-    
-    img = qr.make_image(fill_color="orange", back_color="black")
-    
-    # Convert to base64 for web display
-    buffer = io.BytesIO()
-    img.save(buffer, format='PNG')
-    buffer.seek(0)
-    
-    return base64.b64encode(buffer.getvalue()).decode()
+    """Generate QR code for show access (served from the render cache)."""
+    return render_qr_png(data).base64
 
 # Routes
 @app.route('/')
@@ -255,6 +227,9 @@ def index():
 @app.route('/audience')
 def audience_form():
     """Audience engagement form."""
+    # Scans arrive tagged from the QR payload; feeds the scares → QR → join funnel
+    if scarepi and request.args.get('src') == QR_SOURCE_TAG:
+        scarepi.log_analytics('qr_viewed', request.headers.get('User-Agent', '')[:200])
     return render_template('audience_form.html')
 
 @app.route('/analytics')
@@ -269,21 +244,36 @@ def analytics_dashboard():
 def qr_code():
     """Generate QR code for show access."""
     # Get the current server URL
-    base_url = request.url_root.rstrip('/')
-    qr_data = f"{base_url}/audience"
+    qr_data = audience_url(request.url_root)
     
-    qr_code_b64 = generate_qr_code(qr_data)
-    return render_template('qr_display.html', qr_code=qr_code_b64, qr_data=qr_data)
+    # The image itself is served (and browser-cached) by /qr.png
+    qr_image = render_qr_png(qr_data)
+    return render_template('qr_display.html', qr_data=qr_data, qr_etag=qr_image.etag)
+
+@app.route('/qr.png')
+def qr_png():
+    """Serve the cached QR code image with a strong ETag."""
+    qr_image = render_qr_png(audience_url(request.url_root))
+    response = Response(qr_image.png, mimetype='image/png')
+    response.set_etag(qr_image.etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = 300
+    return response.make_conditional(request)
 
 @app.route('/api/status')
 def get_status():
     """Get current system status."""
-    return jsonify({
-        'motion_enabled': motion_enabled,
-        'scarepi_initialized': scarepi is not None,
-        'show_active': show_active,
-        'timestamp': datetime.now().isoformat()
-    })
+    return jsonify(current_status())
+
+@app.route('/api/events')
+def event_stream():
+    """Server-Sent Events stream of status, motion, scare and audience changes."""
+    initial = [('status', current_status())]
+    if scarepi:
+        initial.append(('audience', scarepi.get_audience_stats()))
+    return Response(stream_with_context(events.stream(initial)),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @app.route('/api/audience/stats')
 def get_audience_stats():
@@ -292,7 +282,19 @@ def get_audience_stats():
         return jsonify(scarepi.get_audience_stats())
     return jsonify({'error': 'ScarePi not initialized'}), 500
 
+@app.route('/api/analytics/timeseries')
+def get_analytics_timeseries():
+    """Event counts per minute/hour/day from the rollup tables."""
+    if not scarepi:
+        return jsonify({'error': 'ScarePi not initialized'}), 500
+    
+    try:
+        return jsonify(read_timeseries(scarepi.db, **parse_timeseries_args(request.args)))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
 @app.route('/api/audience/join', methods=['POST'])
+@rate_limited(join_limiter)
 def join_audience():
     """Add new audience member."""
     if not scarepi:
@@ -315,7 +317,54 @@ def join_audience():
             'success': False
         })
 
+@app.route('/api/audience/export')
+@admin_required
+def export_audience_data():
+    """Stream the audience table as CSV (default) or NDJSON."""
+    if not scarepi:
+        return jsonify({'error': 'ScarePi not initialized'}), 500
+    
+    export_format = request.args.get('format', 'csv').lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f'Unsupported format: {export_format}'}), 400
+    
+    filename = f"scarepi_audience_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{export_format}"
+    return Response(stream_with_context(export_audience(scarepi.db, export_format)),
+                    mimetype=EXPORT_FORMATS[export_format],
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
+@app.route('/api/audience/import', methods=['POST'])
+@admin_required
+@rate_limited(write_limiter)
+def import_audience_data():
+    """Bulk import audience rows from an uploaded CSV or NDJSON file."""
+    if not scarepi:
+        return jsonify({'error': 'ScarePi not initialized'}), 500
+    
+    upload = request.files.get('file')
+    stream = upload.stream if upload else request.stream
+    import_format = request.args.get('format')
+    if not import_format:
+        name = upload.filename if upload else ''
+        import_format = 'ndjson' if name.endswith(('.ndjson', '.jsonl')) else 'csv'
+    if import_format not in EXPORT_FORMATS:
+        return jsonify({'error': f'Unsupported format: {import_format}'}), 400
+    
+    # Decode incrementally so large files are never held in memory
+    text_stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    try:
+        report = import_audience(scarepi.db, parse_records(text_stream, import_format),
+                                 email_index=scarepi.email_index)
+    except AudienceImportError as e:
+        return jsonify(dict(e.report, error=f'Could not parse import: {e}')), 400
+    
+    scarepi.log_analytics('audience_imported',
+                          f"Inserted: {report['inserted']}, duplicates: {report['duplicates']}")
+    events.publish('audience', scarepi.get_audience_stats())
+    return jsonify(report)
+
 @app.route('/api/show/start', methods=['POST'])
+@rate_limited(write_limiter)
 def start_show():
     """Start the Halloween show."""
     global show_active
@@ -323,60 +372,129 @@ def start_show():
         show_active = True
         scarepi.show_stats['show_start_time'] = datetime.now()
         scarepi.log_analytics('show_started', 'Halloween show began')
+        events.publish('status', current_status())
         return jsonify({'message': '🎃 Halloween show started! 👻'})
     return jsonify({'error': 'ScarePi not initialized'}), 500
 
 @app.route('/api/show/stop', methods=['POST'])
+@rate_limited(write_limiter)
 def stop_show():
     """Stop the Halloween show."""
     global show_active, motion_enabled
     if scarepi:
         show_active = False
         motion_enabled = False
+        zones.disarm()
         scarepi.log_analytics('show_stopped', 'Halloween show ended')
+        events.publish('status', current_status())
         return jsonify({'message': '🛑 Halloween show stopped! 🎃'})
     return jsonify({'error': 'ScarePi not initialized'}), 500
 
 @app.route('/api/motion/toggle', methods=['POST'])
+@rate_limited(write_limiter)
 def toggle_motion():
     """Toggle motion detection on/off."""
-    global motion_enabled, motion_thread
+    global motion_enabled
+    if not zones:
+        return jsonify({'error': 'ScarePi not initialized'}), 500
     
     motion_enabled = not motion_enabled
+    if motion_enabled:
+        zones.arm()
+    else:
+        zones.disarm()
+    events.publish('status', current_status())
     
     if motion_enabled:
-        if motion_thread is None or not motion_thread.is_alive():
-            motion_thread = threading.Thread(target=motion_detection_loop, daemon=True)
-            motion_thread.start()
         return jsonify({'status': 'enabled', 'message': 'Motion detection activated! 👻'})
     else:
         return jsonify({'status': 'disabled', 'message': 'Motion detection deactivated 🛑'})
 
+@app.route('/api/zones')
+def get_zones():
+    """Every zone's settings, live state and counters."""
+    if zones:
+        return jsonify(zones.status())
+    return jsonify({'error': 'ScarePi not initialized'}), 500
+
+@app.route('/api/zones/<name>', methods=['POST'])
+@rate_limited(write_limiter)
+def configure_zone(name):
+    """Enable/disable a zone or change its cooldown and prop duration."""
+    if not zones:
+        return jsonify({'error': 'ScarePi not initialized'}), 500
+    try:
+        zone = zones.configure(name, **(request.get_json(silent=True) or {}))
+    except KeyError:
+        return jsonify({'error': f'No zone named {name}'}), 404
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    events.publish('status', current_status())
+    return jsonify(zone)
+
+@app.route('/api/zones/<name>/trigger', methods=['POST'])
+@rate_limited(write_limiter)
+def trigger_zone(name):
+    """Fire one zone's scare as if its sensor tripped."""
+    if not zones:
+        return jsonify({'error': 'ScarePi not initialized'}), 500
+    if name not in zones.zones:
+        return jsonify({'error': f'No zone named {name}'}), 404
+    zones.trigger(name)
+    return jsonify({'message': f'Zone {name} triggered! 🎃'})
+
+@app.route('/api/media')
+def get_media():
+    """Clip post-processing counters and recent jobs."""
+    if media:
+        return jsonify(media.status())
+    return jsonify({'error': 'Clip post-processing is off'}), 404
+
+@app.route('/api/media/<int:job_id>')
+def get_media_job(job_id):
+    """One post-processing job."""
+    job = media.get(job_id) if media else None
+    if job:
+        return jsonify(job)
+    return jsonify({'error': f'No media job {job_id}'}), 404
+
 @app.route('/api/scare/full', methods=['POST'])
+@rate_limited(write_limiter)
 def trigger_full_scare_api():
     """Manually trigger full scare sequence."""
     if scarepi:
-        threading.Thread(target=trigger_full_scare, daemon=True).start()
-        return jsonify({'message': 'Full enhanced scare sequence triggered! 🎃💀'})
+        result = actions.submit('full', trigger_full_scare, actuators=FULL_SCARE_ACTUATORS)
+        body, status = describe_dispatch(result, 'Full enhanced scare sequence triggered! 🎃💀')
+        return jsonify(body), status
     return jsonify({'error': 'ScarePi not initialized'}), 500
 
 @app.route('/api/scare/prop', methods=['POST'])
+@rate_limited(write_limiter)
 def trigger_prop():
     """Manually trigger prop only."""
     if scarepi:
-        threading.Thread(target=scarepi.trigger_prop, daemon=True).start()
-        return jsonify({'message': 'Enhanced prop triggered! 🦇'})
+        result = actions.submit('prop', scarepi.trigger_prop_async, actuators=('prop',))
+        body, status = describe_dispatch(result, 'Enhanced prop triggered! 🦇')
+        return jsonify(body), status
     return jsonify({'error': 'ScarePi not initialized'}), 500
 
 @app.route('/api/scare/sound', methods=['POST'])
+@rate_limited(write_limiter)
 def trigger_sound():
     """Manually trigger sound only."""
     if scarepi:
-        threading.Thread(target=scarepi.play_scary_sound, daemon=True).start()
-        return jsonify({'message': 'Enhanced scary sound playing! 🔊👻'})
+        result = actions.submit('sound', scarepi.play_scary_sound, actuators=('sound',))
+        body, status = describe_dispatch(result, 'Enhanced scary sound playing! 🔊👻')
+        return jsonify(body), status
     return jsonify({'error': 'ScarePi not initialized'}), 500
 
+@app.route('/api/scare/timing')
+def get_scare_timing():
+    """Per-stage start skew of the most recent full scare."""
+    return jsonify(last_scare_timing)
+
 @app.route('/api/scare/record', methods=['POST'])
+@rate_limited(write_limiter)
 def trigger_record():
     """Manually start recording."""
     if scarepi:
@@ -389,13 +507,14 @@ if __name__ == '__main__':
     print("🌙 Initializing spooky systems with marketing features...")
     print("📊 Analytics, audience engagement, and QR codes ready!")
     
+    port = int(os.environ.get('SCAREPI_PORT', '5001'))
     if init_scarepi():
         print("✅ Enhanced ScarePi initialized successfully!")
         print("🌐 Starting enhanced web server...")
-        print("🔗 Open your browser to: http://localhost:5001")
-        print("📱 QR Code available at: http://localhost:5001/qr")
-        print("👥 Audience form at: http://localhost:5001/audience")
-        print("📊 Analytics at: http://localhost:5001/analytics")
-        app.run(host='127.0.0.1', port=5001, debug=True)
+        print(f"🔗 Open your browser to: http://localhost:{port}")
+        print(f"📱 QR Code available at: http://localhost:{port}/qr")
+        print(f"👥 Audience form at: http://localhost:{port}/audience")
+        print(f"📊 Analytics at: http://localhost:{port}/analytics")
+        app.run(host='127.0.0.1', port=port, debug=True)
     else:
         print("❌ Failed to initialize enhanced ScarePi.")
@@ -4,93 +4,99 @@ ScarePi Web UI - Mock Version for Local Testing
 A spooky web interface for testing on Mac/Windows without Raspberry Pi hardware!
 """
 
-from flask import Flask, render_template, jsonify, request
-import threading
-import time
+from flask import Flask, render_template, jsonify, request, Response, stream_with_context
 import json
 import os
 from datetime import datetime
+from scarepi_events import EventBroadcaster
+from scarepi_core import ScareController
+from scarepi_timeline import build_scare_timeline
+from scarepi_actions import ActionDispatcher, describe_dispatch
+from scarepi_async import ControllerLoop
+from scarepi_zones import ZoneManager
+from scarepi_media import MediaPipeline
+from scarepi_metrics import install_flask_metrics
 
 app = Flask(__name__)
+# Per-route latency histograms and the Prometheus /metrics endpoint
+install_flask_metrics(app)
+
+# Live updates for every open control panel
+events = EventBroadcaster()
+
+# Hardware actions are coroutines on one scare loop, one at a time per actuator
+scare_loop = ControllerLoop()
+actions = ActionDispatcher(max_queue=4, loop=scare_loop)
+FULL_SCARE_ACTUATORS = ('camera', 'prop', 'sound')
 
 # Mock ScarePi instance for testing
-class MockScarePi:
+class MockScarePi(ScareController):
+    name = 'Mock ScarePi'
+    clip_prefix = 'mock_scare'
+
     def __init__(self, motion_pin=35, relay_pin=37):
-        """Mock ScarePi for local testing."""
-        self.motion_pin = motion_pin
-        self.relay_pin = relay_pin
-        self.running = True
-        print("🎃 Mock ScarePi initialized for local testing!")
-        print(f"👁️ Mock Motion sensor on pin: {self.motion_pin}")
-        print(f"⚡ Mock Relay on pin: {self.relay_pin}")
+        """Mock ScarePi for local testing: simulated sensor, relay, camera and audio."""
+        super().__init__(motion_pin, relay_pin, mean_interval=0.4)
         print("🌙 Ready to spook (virtually)!")
-    
-    def motion_detected(self):
-        """Mock motion detection - returns random results for testing."""
-        import random
-        return random.choice([True, False, False, False])  # 25% chance of motion
-    
-    def trigger_prop(self, duration=2.0):
-        """Mock prop trigger."""
-        print("🦇 BOO! Mock prop triggered!")
-        time.sleep(duration)
-        print("⚡ Mock prop finished!")
-    
-    def play_scary_sound(self, sound_file="scary_sound.ogg"):
-        """Mock sound playing."""
-        print(f"🔊 Mock playing scary sound: {sound_file}")
-        time.sleep(1)  # Simulate sound duration
-    
-    def record_scare(self, filename=None):
-        """Mock video recording."""
-        if filename is None:
-            current = datetime.now()
-            filename = f"mock_scare_{current.strftime('%Y%m%d_%H%M%S')}.h264"
-        
-        print(f"📹 Mock recording scare: {filename}")
-        time.sleep(2)  # Simulate recording time
-        print(f"🎬 Mock scare recorded: {filename}")
-        return filename
 
 # Global mock ScarePi instance
 scarepi = None
 motion_enabled = False
-motion_thread = None
+zones = None
+media = None
+last_scare_timing = {}
 
 def init_scarepi():
     """Initialize the mock ScarePi system."""
-    global scarepi
+    global scarepi, zones, media
     try:
         scarepi = MockScarePi(motion_pin=35, relay_pin=37)
+        # Every zone's sensor feeds the scare loop
+        zones = ZoneManager.from_config(scarepi, loop=scare_loop, dispatcher=actions,
+                                        on_motion=zone_motion, on_scare=zone_scared)
+        # Saved clips are remuxed to MP4 with thumbnails by low-priority workers
+        media = MediaPipeline.from_env()
+        if media:
+            media.attach(scarepi)
         return True
     except Exception as e:
         print(f"Failed to initialize mock ScarePi: {e}")
         return False
 
-def motion_detection_loop():
-    """Background thread for mock motion detection."""
-    global motion_enabled, scarepi
-    print("Mock motion detection thread started...")
-    
-    while motion_enabled and scarepi:
-        try:
-            motion_detected = scarepi.motion_detected()
-            if motion_detected:
-                print("MOCK MOTION DETECTED! BOO!")
-                # Trigger full scare sequence
-                trigger_full_scare()
-                time.sleep(5)  # Cooldown period
-            time.sleep(0.1)
-        except Exception as e:
-            print(f"Mock motion detection error: {e}")
-            break
-
-def trigger_full_scare():
+def zone_motion(zone):
+    """Zone loop: a zone's sensor started a scare."""
+    timestamp = datetime.now().isoformat()
+    events.publish('motion', {'zone': zone.name, 'timestamp': timestamp})
+    events.publish('scare', {'stage': 'started', 'zone': zone.name, 'timestamp': timestamp})
+
+def zone_scared(zone, timing):
+    """Zone loop: a zone's scare finished."""
+    last_scare_timing.clear()
+    last_scare_timing.update(timing)
+    events.publish('scare', {'stage': 'finished', 'zone': zone.name,
+                             'timestamp': datetime.now().isoformat(), 'timing': timing})
+
+async def trigger_full_scare():
     """Trigger the complete mock scare sequence."""
     if scarepi:
-        scarepi.record_scare()
-        scarepi.trigger_prop()
-        scarepi.play_scary_sound()
+        events.publish('scare', {'stage': 'started', 'timestamp': datetime.now().isoformat()})
+        # Camera, prop and sound start together on one clock
+        timing = await build_scare_timeline(scarepi).run()
+        last_scare_timing.update(timing)
+        events.publish('scare', {'stage': 'finished', 'timestamp': datetime.now().isoformat(),
+                                 'timing': timing})
+
+def current_status():
+    """Snapshot of system status shared by /api/status and the event stream."""
+    return {
+        'motion_enabled': motion_enabled,
+        'scarepi_initialized': scarepi is not None,
+        'actions': actions.stats(),
+        'zones': zones.status() if zones else None,
+        'media': media.stats() if media else None,
+        'hardware': scarepi.hardware_status() if scarepi else None,
+        'timestamp': datetime.now().isoformat()
+    }
 
 @app.route('/')
 def index():
@@ -100,51 +106,112 @@ def index():
 @app.route('/api/status')
 def get_status():
     """Get current system status."""
-    return jsonify({
-        'motion_enabled': motion_enabled,
-        'scarepi_initialized': scarepi is not None,
-        'timestamp': datetime.now().isoformat()
-    })
+    return jsonify(current_status())
+
+@app.route('/api/events')
+def event_stream():
+    """Server-Sent Events stream of status, motion and scare changes."""
+    return Response(stream_with_context(events.stream([('status', current_status())])),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @app.route('/api/motion/toggle', methods=['POST'])
 def toggle_motion():
     """Toggle motion detection on/off."""
-    global motion_enabled, motion_thread
+    global motion_enabled
+    if not zones:
+        return jsonify({'error': 'ScarePi not initialized'}), 500
     
     motion_enabled = not motion_enabled
+    if motion_enabled:
+        zones.arm()
+    else:
+        zones.disarm()
+    events.publish('status', current_status())
     
     if motion_enabled:
-        if motion_thread is None or not motion_thread.is_alive():
-            motion_thread = threading.Thread(target=motion_detection_loop, daemon=True)
-            motion_thread.start()
         return jsonify({'status': 'enabled', 'message': 'Mock motion detection activated! 👻'})
     else:
         return jsonify({'status': 'disabled', 'message': 'Mock motion detection deactivated 🛑'})
 
+@app.route('/api/zones')
+def get_zones():
+    """Every zone's settings, live state and counters."""
+    if zones:
+        return jsonify(zones.status())
+    return jsonify({'error': 'ScarePi not initialized'}), 500
+
+@app.route('/api/zones/<name>', methods=['POST'])
+def configure_zone(name):
+    """Enable/disable a zone or change its cooldown and prop duration."""
+    if not zones:
+        return jsonify({'error': 'ScarePi not initialized'}), 500
+    try:
+        zone = zones.configure(name, **(request.get_json(silent=True) or {}))
+    except KeyError:
+        return jsonify({'error': f'No zone named {name}'}), 404
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    events.publish('status', current_status())
+    return jsonify(zone)
+
+@app.route('/api/zones/<name>/trigger', methods=['POST'])
+def trigger_zone(name):
+    """Fire one zone's scare as if its sensor tripped."""
+    if not zones:
+        return jsonify({'error': 'ScarePi not initialized'}), 500
+    if name not in zones.zones:
+        return jsonify({'error': f'No zone named {name}'}), 404
+    zones.trigger(name)
+    return jsonify({'message': f'Zone {name} triggered! 🎃'})
+
+@app.route('/api/media')
+def get_media():
+    """Clip post-processing counters and recent jobs."""
+    if media:
+        return jsonify(media.status())
+    return jsonify({'error': 'Clip post-processing is off'}), 404
+
+@app.route('/api/media/<int:job_id>')
+def get_media_job(job_id):
+    """One post-processing job."""
+    job = media.get(job_id) if media else None
+    if job:
+        return jsonify(job)
+    return jsonify({'error': f'No media job {job_id}'}), 404
+
 @app.route('/api/scare/full', methods=['POST'])
 def trigger_full_scare_api():
     """Manually trigger full scare sequence."""
     if scarepi:
-        threading.Thread(target=trigger_full_scare, daemon=True).start()
-        return jsonify({'message': 'Full mock scare sequence triggered! 🎃💀'})
+        result = actions.submit('full', trigger_full_scare, actuators=FULL_SCARE_ACTUATORS)
+        body, status = describe_dispatch(result, 'Full mock scare sequence triggered! 🎃💀')
+        return jsonify(body), status
     return jsonify({'error': 'Mock ScarePi not initialized'}), 500
 
 @app.route('/api/scare/prop', methods=['POST'])
 def trigger_prop():
     """Manually trigger prop only."""
     if scarepi:
-        threading.Thread(target=scarepi.trigger_prop, daemon=True).start()
-        return jsonify({'message': 'Mock prop triggered! 🦇'})
+        result = actions.submit('prop', scarepi.trigger_prop_async, actuators=('prop',))
+        body, status = describe_dispatch(result, 'Mock prop triggered! 🦇')
+        return jsonify(body), status
     return jsonify({'error': 'Mock ScarePi not initialized'}), 500
 
 @app.route('/api/scare/sound', methods=['POST'])
 def trigger_sound():
     """Manually trigger sound only."""
     if scarepi:
-        threading.Thread(target=scarepi.play_scary_sound, daemon=True).start()
-        return jsonify({'message': 'Mock scary sound playing! 🔊👻'})
+        result = actions.submit('sound', scarepi.play_scary_sound, actuators=('sound',))
+        body, status = describe_dispatch(result, 'Mock scary sound playing! 🔊👻')
+        return jsonify(body), status
     return jsonify({'error': 'Mock ScarePi not initialized'}), 500
 
+@app.route('/api/scare/timing')
+def get_scare_timing():
+    """Per-stage start skew of the most recent full scare."""
+    return jsonify(last_scare_timing)
+
 @app.route('/api/scare/record', methods=['POST'])
 def trigger_record():
     """Manually start recording."""
@@ -174,11 +241,12 @@ if __name__ == '__main__':
     print("🌙 Initializing spooky systems for local testing...")
     print("💻 Running in mock mode - no hardware required!")
     
+    port = int(os.environ.get('SCAREPI_PORT', '5001'))
     if init_scarepi():
         print("✅ Mock ScarePi initialized successfully!")
         print("🌐 Starting web server...")
-        print("🔗 Open your browser to: http://localhost:5001")
+        print(f"🔗 Open your browser to: http://localhost:{port}")
         print("🎮 All buttons will work - they just simulate hardware!")
-        app.run(host='127.0.0.1', port=5001, debug=True)
+        app.run(host='127.0.0.1', port=port, debug=True)
     else:
         print("❌ Failed to initialize mock ScarePi.")
@@ -0,0 +1,30 @@
+"""
+ScarePi gunicorn settings
+Run with: gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('SCAREPI_PORT', '5001')}"
+workers = int(os.environ.get('SCAREPI_WORKERS', '2'))
+# Threads keep long-lived /api/events streams from tying up a whole worker
+worker_class = 'gthread'
+threads = int(os.environ.get('SCAREPI_THREADS', '8'))
+# Event streams stay open; heartbeats keep them well inside this
+timeout = 60
+graceful_timeout = 10
+# Each worker builds its own ScarePi after forking (no shared threads or sockets)
+preload_app = False
+accesslog = '-'
+
+
+def on_starting(server):
+    """Migrate once and start every server boot with the show stopped."""
+    from scarepi_db import ScareDatabase, resolve_db_path, migrate, DOCKER_DB_PATH
+    from scarepi_state import SharedState, reset_show_state
+    db = ScareDatabase(resolve_db_path(DOCKER_DB_PATH))
+    try:
+        migrate(db)
+        reset_show_state(SharedState(db))
+    finally:
+        db.close()
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Load Test - Latency benchmark for the ScarePi marketing endpoints
+Simulates a crowd scanning the QR code: each visitor opens /qr and /audience,
+joins, then checks the stats, while control panels poll /api/status.
+Reports throughput, p50/p95/p99 latency and error rate per endpoint and saves
+JSON results so runs can be compared between versions.
+
+Examples:
+    python load_test.py                              # in-process, app_docker
+    python load_test.py --visitors 200 --window 60   # 200 scans within a minute
+    python load_test.py --url http://localhost:5001  # against a running server
+    python load_test.py --compare loadtest_results/previous.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+RESULTS_DIR = 'loadtest_results'
+HOW_HEARD = ['qr_code', 'social_media', 'friend', 'drove_by', 'youtube']
+
+# (endpoint, method) steps of one visitor's journey after scanning the QR code
+VISITOR_JOURNEY = [
+    ('/qr', 'GET'),
+    ('/audience', 'GET'),
+    ('/api/audience/join', 'POST'),
+    ('/api/audience/stats', 'GET')
+]
+STATUS_POLLS_PER_VISITOR = 2
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class InProcessClient:
+    def __init__(self, app_name, db_path):
+        """Drive a Flask app through its test client, no sockets involved."""
+        os.environ['SCAREPI_DB_PATH'] = db_path
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        module = __import__(app_name)
+        if not module.init_scarepi():
+            raise RuntimeError(f"{app_name} failed to initialize")
+        self.app = module.app
+        self._local = threading.local()
+        self.target = f"in-process:{app_name}"
+
+    def request(self, method, path, payload=None, client_ip=None):
+        """Send one request; returns the HTTP status code."""
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        environ = {'REMOTE_ADDR': client_ip} if client_ip else {}
+        response = client.open(path, method=method, json=payload, environ_base=environ)
+        response.close()
+        return response.status_code
+
+
+class HTTPClient:
+    def __init__(self, base_url, timeout=10.0):
+        """Drive a running server over HTTP."""
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.target = self.base_url
+
+    def request(self, method, path, payload=None, client_ip=None):
+        """Send one request; returns the HTTP status code."""
+        data = json.dumps(payload).encode() if payload is not None else None
+        headers = {'Content-Type': 'application/json'}
+        if client_ip:
+            # Only honoured by servers started with SCAREPI_TRUST_PROXY set
+            headers['X-Forwarded-For'] = client_ip
+        req = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                     headers=headers)
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+
+class LoadTest:
+    def __init__(self, client, visitors=200, window=60.0, concurrency=32, seed=None):
+        """visitors journeys whose start times are spread over window seconds."""
+        self.client = client
+        self.visitors = visitors
+        self.window = window
+        self.concurrency = concurrency
+        self.random = random.Random(seed)
+        self.run_id = uuid.uuid4().hex[:8]
+        self._lock = threading.Lock()
+        self.samples = {}
+
+    def _record(self, endpoint, latency_ms, ok):
+        """Store one request outcome."""
+        with self._lock:
+            bucket = self.samples.setdefault(endpoint, {'latencies': [], 'errors': 0})
+            bucket['latencies'].append(latency_ms)
+            if not ok:
+                bucket['errors'] += 1
+
+    def _call(self, endpoint, method, payload=None, client_ip=None):
+        """Time one request."""
+        started = time.perf_counter()
+        try:
+            ok = self.client.request(method, endpoint, payload, client_ip) < 400
+        except Exception:
+            ok = False
+        self._record(endpoint, (time.perf_counter() - started) * 1000, ok)
+
+    def _visitor(self, number, start_at):
+        """One audience member's journey, plus the control panel polls they cause."""
+        # Every visitor is a separate phone, as far as per-client rate limits go
+        client_ip = f'10.{number // 65536 % 256}.{number // 256 % 256}.{number % 256}'
+        delay = start_at - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        for endpoint, method in VISITOR_JOURNEY:
+            payload = None
+            if endpoint == '/api/audience/join':
+                payload = {
+                    'name': f'Load Test {number}',
+                    'email': f'loadtest-{self.run_id}-{number}@example.com',
+                    'how_heard': self.random.choice(HOW_HEARD),
+                    'subscribe_youtube': self.random.random() < 0.4,
+                    'subscribe_updates': True
+                }
+            self._call(endpoint, method, payload, client_ip)
+        for _ in range(STATUS_POLLS_PER_VISITOR):
+            self._call('/api/status', 'GET')
+
+    def run(self):
+        """Run every journey and return the results dict."""
+        began = time.perf_counter()
+        starts = sorted(began + self.random.uniform(0, self.window) for _ in range(self.visitors))
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            for number, start_at in enumerate(starts):
+                pool.submit(self._visitor, number, start_at)
+        elapsed = time.perf_counter() - began
+        return self.summarize(elapsed)
+
+    def summarize(self, elapsed):
+        """Per-endpoint throughput, latency percentiles and error rate."""
+        endpoints = {}
+        all_latencies = []
+        total_errors = 0
+        for endpoint, bucket in sorted(self.samples.items()):
+            latencies = sorted(bucket['latencies'])
+            all_latencies.extend(latencies)
+            total_errors += bucket['errors']
+            endpoints[endpoint] = summarize_latencies(latencies, bucket['errors'], elapsed)
+        return {
+            'meta': {
+                'timestamp': datetime.now().isoformat(),
+                'target': self.client.target,
+                'git_commit': git_commit(),
+                'visitors': self.visitors,
+                'window_s': self.window,
+                'concurrency': self.concurrency,
+                'python': platform.python_version(),
+                'machine': platform.machine()
+            },
+            'elapsed_s': round(elapsed, 3),
+            'overall': summarize_latencies(sorted(all_latencies), total_errors, elapsed),
+            'endpoints': endpoints
+        }
+
+
+def summarize_latencies(latencies, errors, elapsed):
+    """Stats block for one set of sorted latencies."""
+    count = len(latencies)
+    return {
+        'requests': count,
+        'throughput_rps': round(count / elapsed, 2) if elapsed else None,
+        'error_rate': round(errors / count, 4) if count else 0.0,
+        'errors': errors,
+        'p50_ms': _round(percentile(latencies, 50)),
+        'p95_ms': _round(percentile(latencies, 95)),
+        'p99_ms': _round(percentile(latencies, 99)),
+        'max_ms': _round(latencies[-1] if latencies else None)
+    }
+
+
+def _round(value):
+    """Round a latency for the report."""
+    return round(value, 3) if value is not None else None
+
+
+def git_commit():
+    """Short commit hash of the tree under test, if available."""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(results):
+    """Human-readable table of the results."""
+    meta = results['meta']
+    print(f"\n🎃 Load test against {meta['target']} ({meta['git_commit'] or 'unknown commit'})")
+    print(f"👥 {meta['visitors']} visitors over {meta['window_s']}s, "
+          f"concurrency {meta['concurrency']}, took {results['elapsed_s']}s\n")
+    header = f"{'endpoint':<24}{'reqs':>7}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>9}"
+    print(header)
+    print('-' * len(header))
+    rows = list(results['endpoints'].items()) + [('overall', results['overall'])]
+    for endpoint, stats in rows:
+        print(f"{endpoint:<24}{stats['requests']:>7}{stats['throughput_rps']:>9}"
+              f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}"
+              f"{stats['error_rate']:>9.2%}")
+
+
+def print_comparison(results, baseline_path):
+    """p95 and error-rate change per endpoint against an earlier run."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\n📊 Compared with {baseline_path} ({baseline['meta'].get('git_commit')})")
+    for endpoint, stats in results['endpoints'].items():
+        before = baseline['endpoints'].get(endpoint)
+        if not before or not before['p95_ms']:
+            continue
+        change = (stats['p95_ms'] - before['p95_ms']) / before['p95_ms']
+        flag = '⚠️ ' if change > 0.2 or stats['error_rate'] > before['error_rate'] else '  '
+        print(f"{flag}{endpoint:<24} p95 {before['p95_ms']} → {stats['p95_ms']} ms ({change:+.0%}), "
+              f"errors {before['error_rate']:.2%} → {stats['error_rate']:.2%}")
+
+
+def main():
+    """Parse arguments, run the load test and save the results."""
+    parser = argparse.ArgumentParser(description='ScarePi HTTP load test')
+    parser.add_argument('--url', help='Base URL of a running server (default: run in-process)')
+    parser.add_argument('--app', default='app_docker', choices=['app_docker', 'app_enhanced'],
+                        help='App module to load for in-process runs')
+    parser.add_argument('--db', help='Database for in-process runs (default: a temporary file)')
+    parser.add_argument('--visitors', type=int, default=200, help='Number of visitor journeys')
+    parser.add_argument('--window', type=float, default=60.0,
+                        help='Seconds over which visitors arrive')
+    parser.add_argument('--concurrency', type=int, default=32, help='Concurrent client threads')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed for a repeatable mix')
+    parser.add_argument('--output', help=f'Results file (default: {RESULTS_DIR}/<timestamp>.json)')
+    parser.add_argument('--compare', help='Earlier results file to compare against')
+    args = parser.parse_args()
+
+    if args.url:
+        client = HTTPClient(args.url)
+    else:
+        db_path = args.db or os.path.join(tempfile.mkdtemp(prefix='scarepi_loadtest_'),
+                                          'scarepi_audience.db')
+        client = InProcessClient(args.app, db_path)
+
+    results = LoadTest(client, args.visitors, args.window, args.concurrency, args.seed).run()
+    print_report(results)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results saved to {output}")
+
+    if args.compare:
+        print_comparison(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
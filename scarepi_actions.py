@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+ScarePi Actions - Bounded hardware action dispatcher
+Manual scare requests run on a fixed-size worker pool with single-flight
+locking per actuator, so mashing a button can't stack up relay cycles or
+overlapping sounds on one prop. Given a ControllerLoop, actions run as
+coroutines on the scare loop instead of holding pool threads.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from scarepi_async import call_action
+from scarepi_metrics import ACTIONS, ACTION_SECONDS
+
+QUEUED = 'queued'
+MERGED = 'merged'
+REJECTED = 'rejected'
+
+
+class ActionDispatcher:
+    def __init__(self, max_workers=2, max_queue=4, loop=None):
+        """Pool of max_workers threads with at most max_queue actions waiting.
+
+        With loop (a ControllerLoop) actions run on it instead: functions may
+        return coroutines, and plain functions must not block.
+        """
+        self.max_workers = None if loop else max_workers
+        self.max_queue = max_queue
+        self.loop = loop
+        self._executor = None if loop else ThreadPoolExecutor(max_workers=max_workers,
+                                                              thread_name_prefix='scare-action')
+        self._lock = threading.Lock()
+        self._busy = set()
+        self._waiting = 0
+        self.stats_data = {QUEUED: 0, MERGED: 0, REJECTED: 0, 'completed': 0, 'failed': 0}
+
+    def queue_depth(self):
+        """Actions accepted but not yet started."""
+        with self._lock:
+            return self._waiting
+
+    def busy_actuators(self):
+        """Actuators with an action queued or running."""
+        with self._lock:
+            return sorted(self._busy)
+
+    def _claim(self, name, actuators, policy, enqueue):
+        """Reserve actuators, or decide to merge/reject the request."""
+        actuators = set(actuators or [name])
+        with self._lock:
+            conflict = actuators & self._busy
+            if conflict:
+                status = MERGED if policy == 'coalesce' else REJECTED
+            elif enqueue and self._waiting >= self.max_queue:
+                status = REJECTED
+            else:
+                status = QUEUED
+                self._busy |= actuators
+                if enqueue:
+                    self._waiting += 1
+            self.stats_data[status] += 1
+            result = {
+                'status': status,
+                'action': name,
+                'busy': sorted(conflict) if conflict else [],
+                'queue_depth': self._waiting
+            }
+        ACTIONS.labels(name, status).inc()
+        return result, actuators
+
+    def _release(self, actuators, ok):
+        """Free actuators once their action has finished."""
+        with self._lock:
+            self._busy -= actuators
+            self.stats_data['completed' if ok else 'failed'] += 1
+
+    def _execute(self, name, fn, args, actuators, queued):
+        """Run an action and always release its actuators; returns whether it succeeded."""
+        if queued:
+            with self._lock:
+                self._waiting -= 1
+        ok = False
+        started = time.perf_counter()
+        try:
+            fn(*args)
+            ok = True
+        except Exception as e:
+            print(f"❌ Action '{name}' failed: {e}")
+        finally:
+            ACTION_SECONDS.labels(name).observe(time.perf_counter() - started)
+            self._release(actuators, ok)
+        return ok
+
+    async def _execute_async(self, name, fn, args, actuators, queued=True):
+        """Loop: run an action, awaiting it if it is a coroutine, and release its actuators."""
+        if queued:
+            with self._lock:
+                self._waiting -= 1
+        ok = False
+        started = time.perf_counter()
+        try:
+            await call_action(fn, *args)
+            ok = True
+        except Exception as e:
+            print(f"❌ Action '{name}' failed: {e}")
+        finally:
+            ACTION_SECONDS.labels(name).observe(time.perf_counter() - started)
+            self._release(actuators, ok)
+        return ok
+
+    def submit(self, name, fn, *args, actuators=None, policy='coalesce'):
+        """Queue fn on the pool (or loop). policy 'coalesce' merges into a busy
+        actuator's running action, 'reject' refuses it. Returns a status dict."""
+        result, actuators = self._claim(name, actuators, policy, True)
+        if result['status'] != QUEUED:
+            return result
+        if self.loop:
+            self.loop.submit(self._execute_async(name, fn, args, actuators))
+        else:
+            self._executor.submit(self._execute, name, fn, args, actuators, True)
+        return result
+
+    def run(self, name, fn, *args, actuators=None):
+        """Run fn and wait for it under the same single-flight rules; skipped
+        if the actuators are already busy. With a loop fn runs (and is awaited)
+        there, so don't call this from the loop thread. Status is 'completed'
+        or 'failed' once it ran."""
+        result, actuators = self._claim(name, actuators, 'coalesce', False)
+        if result['status'] == QUEUED:
+            if self.loop:
+                ok = self.loop.run(self._execute_async(name, fn, args, actuators, False))
+            else:
+                ok = self._execute(name, fn, args, actuators, False)
+            result['status'] = 'completed' if ok else 'failed'
+        return result
+
+    def claim(self, name, actuators=None):
+        """Reserve actuators for an action driven elsewhere (e.g. the zone loop);
+        pair a QUEUED claim with release(). Returns a status dict."""
+        result, _ = self._claim(name, actuators, 'coalesce', False)
+        return result
+
+    def release(self, name, actuators=None, seconds=None, ok=True):
+        """Free actuators reserved with claim()."""
+        if seconds is not None:
+            ACTION_SECONDS.labels(name).observe(seconds)
+        self._release(set(actuators or [name]), ok)
+
+    def stats(self):
+        """Dispatch counters, queue depth and busy actuators."""
+        with self._lock:
+            data = dict(self.stats_data)
+            data['queue_depth'] = self._waiting
+            data['busy'] = sorted(self._busy)
+        data['max_workers'] = self.max_workers
+        data['max_queue'] = self.max_queue
+        if self.loop:
+            data['loop'] = self.loop.stats()
+        return data
+
+    def shutdown(self):
+        """Stop accepting work and wait for running actions."""
+        if self._executor:
+            self._executor.shutdown(wait=True)
+
+
+def describe_dispatch(result, message):
+    """JSON body and HTTP status for an API response about a dispatched action."""
+    body = {'status': result['status'], 'queue_depth': result['queue_depth']}
+    if result['status'] == QUEUED:
+        body['message'] = message
+        return body, 200
+    if result['status'] == MERGED:
+        body['message'] = f"Already running ({', '.join(result['busy'])}) - request merged 👻"
+        return body, 200
+    if result['busy']:
+        body['error'] = f"Busy ({', '.join(result['busy'])}) - try again in a moment 👻"
+        return body, 409
+    body['error'] = 'Too many scares queued - try again in a moment 👻'
+    return body, 503
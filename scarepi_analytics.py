@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+ScarePi Analytics - Background show_analytics writer
+Queues analytics events and writes them in batched transactions so scare
+stages and audience sign-ups never wait on a disk fsync.
+"""
+
+import atexit
+import queue
+import threading
+import time
+from datetime import datetime
+
+from scarepi_metrics import ANALYTICS_DROPPED, ANALYTICS_EVENTS, DB_WRITE_SECONDS
+
+_STOP = object()
+
+
+class AnalyticsWriter:
+    def __init__(self, db, max_queue=10000, batch_size=100, flush_interval=0.5,
+                 put_timeout=0.05, on_flush=None):
+        """Create a writer that flushes to db by batch size or by time."""
+        self.db = db
+        self.on_flush = on_flush
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+        self.stats_data = {
+            'written': 0,
+            'dropped': 0,
+            'batches': 0,
+            'errors': 0,
+            'last_flush_ms': 0.0,
+            'max_flush_ms': 0.0,
+            'total_flush_ms': 0.0
+        }
+
+    def start(self):
+        """Start the background writer thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='analytics-writer',
+                                            daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+        return self
+
+    def log(self, event_type, details=""):
+        """Queue an analytics row; returns False if the queue is full."""
+        # Stamp now so batching doesn't shift event times (UTC, like CURRENT_TIMESTAMP)
+        timestamp = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        try:
+            self._queue.put((event_type, timestamp, details), timeout=self.put_timeout)
+            ANALYTICS_EVENTS.labels(event_type).inc()
+            return True
+        except queue.Full:
+            with self._lock:
+                self.stats_data['dropped'] += 1
+            ANALYTICS_DROPPED.inc()
+            print(f"⚠️ Analytics queue full, dropped event: {event_type}")
+            return False
+
+    def stop(self, timeout=5.0):
+        """Drain remaining events and stop the writer."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def queue_depth(self):
+        """Number of events waiting to be written."""
+        return self._queue.qsize()
+
+    def stats(self):
+        """Writer health: queue depth, throughput and flush latency."""
+        with self._lock:
+            data = dict(self.stats_data)
+        total_ms = data.pop('total_flush_ms')
+        data['avg_flush_ms'] = round(total_ms / data['batches'], 3) if data['batches'] else 0.0
+        data['queue_depth'] = self.queue_depth()
+        data['running'] = self._thread is not None and self._thread.is_alive()
+        return data
+
+    def _run(self):
+        """Collect events until the batch fills or the interval expires, then flush."""
+        stopping = False
+        while not stopping:
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=max(remaining, 0)) if remaining > 0 \
+                        else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            if stopping:
+                # Drain whatever is still queued before exiting
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is not _STOP:
+                        batch.append(item)
+            if batch:
+                self._flush(batch)
+
+    def _flush(self, batch):
+        """Write one batch in a single transaction."""
+        started = time.perf_counter()
+        try:
+            with self.db.transaction() as cursor:
+                cursor.executemany('''
+                    INSERT INTO show_analytics (event_type, timestamp, details)
+                    VALUES (?, ?, ?)
+                ''', batch)
+        except Exception as e:
+            with self._lock:
+                self.stats_data['errors'] += 1
+                self.stats_data['dropped'] += len(batch)
+            ANALYTICS_DROPPED.inc(len(batch))
+            print(f"❌ Analytics batch write failed ({len(batch)} events): {e}")
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        DB_WRITE_SECONDS.labels('analytics_batch').observe(elapsed_ms / 1000)
+        with self._lock:
+            self.stats_data['written'] += len(batch)
+            self.stats_data['batches'] += 1
+            self.stats_data['last_flush_ms'] = round(elapsed_ms, 3)
+            self.stats_data['max_flush_ms'] = round(max(self.stats_data['max_flush_ms'], elapsed_ms), 3)
+            self.stats_data['total_flush_ms'] += elapsed_ms
+        if self.on_flush:
+            try:
+                self.on_flush(batch)
+            except Exception as e:
+                print(f"❌ Analytics flush callback error: {e}")
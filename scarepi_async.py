@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+ScarePi Async - One asyncio loop for every actuator
+Prop pulses, scare timelines and zone cooldowns are coroutines on a single
+loop thread, so a relay held for two seconds is a timer rather than a
+sleeping OS thread, and many overlapping effects share one thread. Flask
+handlers and sensor callbacks hand work over with submit()/call_soon().
+"""
+
+import asyncio
+import inspect
+import threading
+import time
+
+# Final stretch before a deadline that is busy-waited for precision
+SPIN_WINDOW = 0.002
+
+
+async def sleep_until(deadline):
+    """Sleep on the loop to a perf_counter deadline, spinning for the last couple of ms."""
+    remaining = deadline - time.perf_counter()
+    if remaining > SPIN_WINDOW:
+        await asyncio.sleep(remaining - SPIN_WINDOW)
+    while time.perf_counter() < deadline:
+        pass
+
+
+async def call_action(fn, *args):
+    """Call fn(*args) and await the result if it is a coroutine."""
+    result = fn(*args)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+class ControllerLoop:
+    def __init__(self, name='scare-loop'):
+        """asyncio event loop on its own daemon thread, started on first use."""
+        self.name = name
+        self.loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._in_flight = set()
+        self.stats_data = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'peak_in_flight': 0
+        }
+
+    def start(self):
+        """Start the loop thread (no-op if already running)."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return self
+            ready = threading.Event()
+            self.loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._run, args=(ready,), name=self.name,
+                                            daemon=True)
+            self._thread.start()
+        ready.wait()
+        return self
+
+    def stop(self):
+        """Cancel outstanding work and stop the loop."""
+        with self._lock:
+            if self.loop is None or not self.loop.is_running():
+                return
+            for future in list(self._in_flight):
+                future.cancel()
+            self.loop.call_soon_threadsafe(self.loop.stop)
+
+    def submit(self, coro):
+        """Schedule a coroutine from any thread; returns a concurrent.futures.Future."""
+        self.start()
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        with self._lock:
+            self._in_flight.add(future)
+            self.stats_data['submitted'] += 1
+            self.stats_data['peak_in_flight'] = max(self.stats_data['peak_in_flight'],
+                                                    len(self._in_flight))
+        future.add_done_callback(self._done)
+        return future
+
+    def call_soon(self, callback, *args):
+        """Run a plain callback on the loop thread, from any thread."""
+        self.start()
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    def offload(self, fn, *args):
+        """From the loop thread: run blocking fn(*args) on a worker thread."""
+        return self.loop.run_in_executor(None, fn, *args)
+
+    def run(self, coro, timeout=None):
+        """Run a coroutine on the loop and wait for its result (not from the loop thread)."""
+        return self.submit(coro).result(timeout)
+
+    def stats(self):
+        """Coroutine counters and how many are running now."""
+        with self._lock:
+            data = dict(self.stats_data)
+            data['in_flight'] = len(self._in_flight)
+        data['running'] = self.loop is not None and self.loop.is_running()
+        return data
+
+    def _done(self, future):
+        """Forget a finished coroutine and count how it ended."""
+        with self._lock:
+            self._in_flight.discard(future)
+            failed = future.cancelled() or future.exception() is not None
+            self.stats_data['failed' if failed else 'completed'] += 1
+        if not future.cancelled() and future.exception() is not None:
+            print(f"❌ Scare loop task failed: {future.exception()}")
+
+    def _run(self, ready):
+        """Thread body: own the loop until stop()."""
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(ready.set)
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
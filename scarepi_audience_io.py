@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+ScarePi Audience I/O - Streaming export and bulk import of the audience table
+Exports walk a server-side cursor in chunks and imports load rows with
+executemany in chunked transactions, so memory stays flat at any row count.
+"""
+
+import csv
+import io
+import json
+import threading
+
+from scarepi_db import normalize_email
+
+AUDIENCE_COLUMNS = [
+    'id', 'name', 'email', 'phone', 'social_media', 'how_heard', 'interests',
+    'subscribe_youtube', 'subscribe_updates', 'join_date', 'ip_address', 'user_agent'
+]
+
+# Columns accepted on import (id is always assigned by the database)
+IMPORT_COLUMNS = AUDIENCE_COLUMNS[1:]
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+
+MAX_REPORTED_DUPLICATES = 100
+
+
+class EmailIndex:
+    def __init__(self, emails=()):
+        """In-memory set of normalized registered emails.
+
+        Answers "already registered?" without a write transaction; the unique
+        email_normalized index stays the authority for anything not seen yet
+        (e.g. a sign-up handled by another worker).
+        """
+        self._emails = set(emails)
+        self._lock = threading.Lock()
+        self.stats_data = {'hits': 0, 'misses': 0}
+
+    @classmethod
+    def load(cls, db, chunk_size=5000):
+        """Build the index from the database at startup."""
+        index = cls()
+        with db.dedicated_connection() as conn:
+            cursor = conn.execute(
+                'SELECT email_normalized FROM audience WHERE email_normalized IS NOT NULL')
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                index._emails.update(row[0] for row in rows)
+        return index
+
+    def __contains__(self, email):
+        """True if the (raw or normalized) email is known to be registered."""
+        found = normalize_email(email) in self._emails
+        with self._lock:
+            self.stats_data['hits' if found else 'misses'] += 1
+        return found
+
+    def add(self, email):
+        """Remember a registered email."""
+        normalized = normalize_email(email)
+        with self._lock:
+            self._emails.add(normalized)
+
+    def update(self, emails):
+        """Remember several registered emails."""
+        normalized = {normalize_email(email) for email in emails}
+        with self._lock:
+            self._emails.update(normalized)
+
+    def stats(self):
+        """Index size and duplicate hit counts."""
+        with self._lock:
+            data = dict(self.stats_data)
+            data['size'] = len(self._emails)
+        return data
+
+
+def iter_audience_rows(db, chunk_size=500):
+    """Yield audience rows as dicts, fetching chunk_size rows at a time."""
+    with db.dedicated_connection() as conn:
+        cursor = conn.execute(f'SELECT {", ".join(AUDIENCE_COLUMNS)} FROM audience ORDER BY id')
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            for row in rows:
+                yield dict(zip(AUDIENCE_COLUMNS, row))
+
+
+def stream_csv(rows, chunk_size=500):
+    """Encode rows as CSV, yielding one text chunk per chunk_size rows."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=AUDIENCE_COLUMNS)
+    writer.writeheader()
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue()
+
+
+def stream_ndjson(rows):
+    """Encode rows as newline-delimited JSON."""
+    for row in rows:
+        yield json.dumps(row, default=str) + "\n"
+
+
+def export_audience(db, export_format='csv', chunk_size=500):
+    """Generator of encoded export chunks in the requested format."""
+    rows = iter_audience_rows(db, chunk_size)
+    if export_format == 'ndjson':
+        return stream_ndjson(rows)
+    return stream_csv(rows, chunk_size)
+
+
+def parse_records(text_stream, import_format='csv'):
+    """Yield dicts from a CSV or NDJSON text stream."""
+    if import_format == 'ndjson':
+        for line in text_stream:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+    else:
+        yield from csv.DictReader(text_stream)
+
+
+def _as_bool(value, default):
+    """Interpret checkbox-ish values from CSV or JSON."""
+    if value is None or value == '':
+        return default
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'on')
+    return bool(value)
+
+
+def _text(value):
+    """Imported text field as a string, or None if it isn't a scalar."""
+    if value is None:
+        return ''
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        return None
+    return str(value)
+
+
+def _prepare_row(record):
+    """Turn an imported record into an INSERT tuple, or None if it is unusable."""
+    if not isinstance(record, dict):
+        return None
+    name, email = record.get('name'), record.get('email')
+    if not isinstance(name, str) or not isinstance(email, str):
+        return None
+    name, email = name.strip(), email.strip()
+    if not name or not email:
+        return None
+    join_date = record.get('join_date') or None
+    if join_date is not None and not isinstance(join_date, str):
+        return None
+    values = {
+        'name': name,
+        'email': email,
+        'subscribe_youtube': _as_bool(record.get('subscribe_youtube'), False),
+        'subscribe_updates': _as_bool(record.get('subscribe_updates'), True),
+        'join_date': join_date
+    }
+    for column in ('phone', 'social_media', 'how_heard', 'interests', 'ip_address', 'user_agent'):
+        values[column] = _text(record.get(column))
+        if values[column] is None:
+            return None
+    return tuple(values[column] for column in IMPORT_COLUMNS)
+
+
+class AudienceImportError(ValueError):
+    def __init__(self, message, report):
+        """An import stopped by unparseable input; report covers the chunks already committed."""
+        super().__init__(message)
+        self.report = report
+
+
+def import_audience(db, records, chunk_size=500, email_index=None):
+    """Bulk load records, one transaction per chunk, reporting duplicate emails.
+
+    Duplicates are matched on the normalized email; email_index, if given,
+    learns every email that ends up registered. Unparseable input raises
+    AudienceImportError carrying the report so far.
+    """
+    report = {'inserted': 0, 'duplicates': 0, 'invalid': 0, 'duplicate_emails': []}
+    # Rows without a join_date fall back to the column default
+    placeholders = ', '.join('COALESCE(?, CURRENT_TIMESTAMP)' if column == 'join_date' else '?'
+                             for column in IMPORT_COLUMNS)
+    insert_sql = f'''
+        INSERT OR IGNORE INTO audience ({", ".join(IMPORT_COLUMNS)}, email_normalized)
+        VALUES ({placeholders}, ?)
+    '''
+    email_column = IMPORT_COLUMNS.index('email')
+
+    def flush(chunk):
+        normalized = [normalize_email(row[email_column]) for row in chunk]
+        with db.transaction() as cursor:
+            cursor.execute(
+                f'''SELECT email_normalized FROM audience
+                    WHERE email_normalized IN ({", ".join("?" for _ in normalized)})''',
+                normalized
+            )
+            existing = {row[0] for row in cursor.fetchall()}
+            seen = set()
+            fresh = []
+            for row, email in zip(chunk, normalized):
+                if email in existing or email in seen:
+                    report['duplicates'] += 1
+                    if len(report['duplicate_emails']) < MAX_REPORTED_DUPLICATES:
+                        report['duplicate_emails'].append(row[email_column])
+                    continue
+                seen.add(email)
+                fresh.append(row + (email,))
+            inserted = 0
+            if fresh:
+                cursor.executemany(insert_sql, fresh)
+                inserted = cursor.rowcount
+            # Anything ignored here raced a concurrent sign-up
+            report['duplicates'] += len(fresh) - inserted
+            report['inserted'] += inserted
+        if email_index is not None:
+            email_index.update(seen)
+
+    chunk = []
+    try:
+        for record in records:
+            row = _prepare_row(record)
+            if row is None:
+                report['invalid'] += 1
+                continue
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                flush(chunk)
+                chunk = []
+    except (ValueError, csv.Error) as e:
+        # Earlier chunks are already committed; the unfinished one is dropped
+        raise AudienceImportError(str(e), report) from e
+    if chunk:
+        flush(chunk)
+    return report
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+ScarePi Auth - Admin gate for endpoints that expose or rewrite audience data
+The /audience page is handed to the public by QR code, so bulk export and
+import need $SCAREPI_ADMIN_TOKEN in an X-ScarePi-Admin-Token (or
+'Authorization: Bearer') header. Without a token configured they only
+answer requests from the machine itself, and not at all behind a proxy.
+"""
+
+import functools
+import hmac
+import os
+
+from scarepi_ratelimit import trusted_proxies
+
+ADMIN_TOKEN_ENV = 'SCAREPI_ADMIN_TOKEN'
+ADMIN_TOKEN_HEADER = 'X-ScarePi-Admin-Token'
+LOOPBACK_ADDRESSES = ('127.0.0.1', '::1', 'localhost')
+
+
+def request_token(request):
+    """Admin token sent with the request, or ''."""
+    token = request.headers.get(ADMIN_TOKEN_HEADER, '')
+    if not token:
+        scheme, _, value = request.headers.get('Authorization', '').partition(' ')
+        if scheme.lower() == 'bearer':
+            token = value.strip()
+    return token
+
+
+def is_admin(request):
+    """True with the configured admin token, or from loopback when none is set
+    and no proxy is trusted."""
+    expected = os.environ.get(ADMIN_TOKEN_ENV, '')
+    if expected:
+        return hmac.compare_digest(request_token(request).encode(), expected.encode())
+    if trusted_proxies():
+        # Behind a proxy every request arrives from it, often over loopback
+        return False
+    # The socket peer, never a forwarded header a client could fake
+    return request.remote_addr in LOOPBACK_ADDRESSES
+
+
+def admin_required(view):
+    """Flask view decorator answering 403 unless is_admin() says yes."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        from flask import jsonify, request
+        if is_admin(request):
+            return view(*args, **kwargs)
+        response = jsonify({
+            'error': 'forbidden',
+            'message': f'Admin only - send the {ADMIN_TOKEN_ENV} token in {ADMIN_TOKEN_HEADER}',
+            'success': False
+        })
+        response.status_code = 403
+        return response
+    return wrapper
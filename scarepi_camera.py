@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+ScarePi Camera - Pre-roll circular recording
+The camera records continuously into an in-memory ring buffer. On a scare,
+N seconds of pre-roll plus M seconds of post-roll are flushed to disk from a
+background thread, so clips catch the moment before motion without
+blocking the motion loop. Called from the scare loop, the post-roll wait is
+a loop timer and only the disk write takes a thread.
+"""
+
+import asyncio
+import collections
+import os
+import threading
+import time
+
+
+class PreRollRecorder:
+    # False for recorders whose clips aren't real H.264 (nothing to post-process)
+    video = True
+
+    def __init__(self, preroll=3.0, postroll=2.0):
+        """Base recorder keeping preroll seconds before and postroll after a trigger."""
+        self.preroll = preroll
+        self.postroll = postroll
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self.stats_data = {
+            'clips_saved': 0,
+            'clips_failed': 0,
+            'pending': 0,
+            'last_flush_ms': None
+        }
+
+    def add_callback(self, callback):
+        """Call callback(filename) whenever a clip has been written."""
+        self._callbacks.append(callback)
+
+    def start(self):
+        """Begin continuous buffering."""
+        raise NotImplementedError
+
+    def stop(self):
+        """Stop buffering."""
+        raise NotImplementedError
+
+    def close(self):
+        """Stop buffering and release the camera."""
+        self.stop()
+
+    def capture(self, filename):
+        """Save pre-roll + post-roll to filename in the background; returns immediately."""
+        trigger = time.monotonic()
+        with self._lock:
+            self.stats_data['pending'] += 1
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            threading.Thread(target=self._flush, args=(filename, trigger),
+                             name='preroll-flush', daemon=True).start()
+        else:
+            # On the scare loop: wait out the post-roll on a timer, write on a pool thread
+            loop.call_later(self.postroll, loop.run_in_executor, None, self._flush,
+                            filename, trigger)
+        return filename
+
+    def stats(self):
+        """Clip counters and the last flush time."""
+        with self._lock:
+            return dict(self.stats_data)
+
+    def _write_clip(self, filename, trigger):
+        """Wait out the post-roll and write the clip (implemented per camera)."""
+        raise NotImplementedError
+
+    def _flush(self, filename, trigger):
+        """Background flush wrapper that tracks stats and fires callbacks."""
+        try:
+            started = self._write_clip(filename, trigger)
+            with self._lock:
+                self.stats_data['clips_saved'] += 1
+                self.stats_data['last_flush_ms'] = round((time.monotonic() - started) * 1000, 3)
+        except Exception as e:
+            with self._lock:
+                self.stats_data['clips_failed'] += 1
+            print(f"❌ Could not save clip {filename}: {e}")
+            return
+        finally:
+            with self._lock:
+                self.stats_data['pending'] -= 1
+        print(f"🎬 Scare recorded: {filename}")
+        for callback in self._callbacks:
+            try:
+                callback(filename)
+            except Exception as e:
+                print(f"❌ Clip callback error: {e}")
+
+
+class PiCameraPreRoll(PreRollRecorder):
+    def __init__(self, camera, preroll=3.0, postroll=2.0, bitrate=17000000):
+        """Pre-roll recorder backed by picamera's PiCameraCircularIO."""
+        super().__init__(preroll, postroll)
+        self.camera = camera
+        self.bitrate = bitrate
+        self.stream = None
+        self._copy_lock = threading.Lock()
+
+    def start(self):
+        """Start recording H.264 into the circular buffer."""
+        import picamera
+        if self.stream is None:
+            self.stream = picamera.PiCameraCircularIO(
+                self.camera, seconds=self.preroll + self.postroll, bitrate=self.bitrate)
+            self.camera.start_recording(self.stream, format='h264', bitrate=self.bitrate)
+
+    def stop(self):
+        """Stop the continuous recording."""
+        if self.stream is not None:
+            self.camera.stop_recording()
+            self.stream = None
+
+    def close(self):
+        """Stop recording and close the camera."""
+        self.stop()
+        self.camera.close()
+
+    def _write_clip(self, filename, trigger):
+        """Let the post-roll land in the buffer, then copy the window to disk."""
+        remaining = trigger + self.postroll - time.monotonic()
+        if remaining > 0:
+            self.camera.wait_recording(remaining)
+        started = time.monotonic()
+        # copy_to reads the shared ring buffer; one flush at a time
+        with self._copy_lock:
+            self.stream.copy_to(filename, seconds=self.preroll + self.postroll)
+        return started
+
+
+class FrameRingBuffer:
+    def __init__(self, seconds, fps):
+        """Fixed-size ring of (timestamp, frame) pairs."""
+        self.frames = collections.deque(maxlen=max(1, int(seconds * fps)))
+        self._lock = threading.Lock()
+
+    def append(self, timestamp, frame):
+        """Add a frame, evicting the oldest once full."""
+        with self._lock:
+            self.frames.append((timestamp, frame))
+
+    def window(self, start, end):
+        """Frames captured between start and end (monotonic seconds)."""
+        with self._lock:
+            return [frame for timestamp, frame in self.frames if start <= timestamp <= end]
+
+
+class FakeFrameSource:
+    def __init__(self, fps=30, frame_size=1024):
+        """Synthetic camera producing numbered frames, for testing off the Pi."""
+        self.fps = fps
+        self.frame_size = frame_size
+        self._sinks = []
+        self._stop = threading.Event()
+        self._thread = None
+        self.frames_produced = 0
+
+    def add_sink(self, sink):
+        """Deliver every frame to sink(timestamp, frame)."""
+        self._sinks.append(sink)
+
+    def start(self):
+        """Start producing frames."""
+        if self._thread is None or self._stop.is_set():
+            # Fresh event per thread, so a quick stop/start always restarts
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(self._stop,),
+                                            name='fake-camera', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop producing frames."""
+        self._stop.set()
+
+    def _run(self, stop):
+        """Emit frames at the configured rate."""
+        interval = 1.0 / self.fps
+        while not stop.wait(interval):
+            self.frames_produced += 1
+            header = f"FRAME {self.frames_produced:08d} ".encode()
+            frame = header + b'\0' * max(0, self.frame_size - len(header))
+            for sink in self._sinks:
+                sink(time.monotonic(), frame)
+
+
+class FramePreRoll(PreRollRecorder):
+    def __init__(self, source, preroll=3.0, postroll=2.0, video=False):
+        """Pre-roll recorder over any frame source (e.g. FakeFrameSource).
+
+        video says whether the source's frames concatenate to playable H.264.
+        """
+        super().__init__(preroll, postroll)
+        self.source = source
+        self.video = video
+        self.buffer = FrameRingBuffer(preroll + postroll, source.fps)
+        source.add_sink(self.buffer.append)
+
+    def start(self):
+        """Start the frame source."""
+        self.source.start()
+
+    def stop(self):
+        """Stop the frame source."""
+        self.source.stop()
+
+    def _write_clip(self, filename, trigger):
+        """Wait for the post-roll frames, then write the buffered window."""
+        remaining = trigger + self.postroll - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+        started = time.monotonic()
+        frames = self.buffer.window(trigger - self.preroll, trigger + self.postroll)
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(filename, 'wb') as f:
+            for frame in frames:
+                f.write(frame)
+        return started
+
+
+class NullRecorder(PreRollRecorder):
+    def start(self):
+        """No camera attached."""
+
+    def stop(self):
+        """Nothing to stop."""
+
+    def capture(self, filename):
+        """No camera: nothing is recorded."""
+        return None
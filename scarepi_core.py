@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+ScarePi Core - One scare controller with pluggable hardware backends
+Motion, relay, camera and audio each come from a backend picked by name:
+real hardware ('gpio', 'picamera', 'pygame'), 'simulated' or 'null'.
+Hardware libraries are imported only by the backend that needs them, so the
+web tier starts without RPi.GPIO, picamera or pygame, and the same
+controller runs on the Pi, in Docker and on a laptop.
+"""
+
+import os
+import signal
+import sys
+import time
+from datetime import datetime
+
+from scarepi_async import ControllerLoop
+from scarepi_camera import FakeFrameSource, FramePreRoll, NullRecorder, PiCameraPreRoll
+from scarepi_motion import (FilteredGPIOMotionSource, GPIOMotionSource, NullMotionSource,
+                            SimulatedMotionSource)
+from scarepi_pir import PIRFilter
+from scarepi_relay import GPIORelay, NullRelay, SimulatedRelay
+from scarepi_sound import NullSoundBank, SimulatedSoundBank, SoundBank, configured_sound_files
+
+BACKEND_KINDS = ('motion', 'relay', 'camera', 'audio')
+# $SCAREPI_MOTION_BACKEND=gpio etc. override what the controller asks for
+BACKEND_ENV = 'SCAREPI_{kind}_BACKEND'
+
+DEFAULT_OPTIONS = {
+    'bouncetime': 200,            # GPIO edge debounce, ms
+    'debounce': 0.5,              # minimum gap between reported motions, s
+    'mean_interval': 0.5,         # simulated visitors arrive this often on average, s
+    'pir_filter': None,           # PIR filter spec (default: $SCAREPI_PIR_FILTER), 'off' for raw
+    'preroll': 3.0,
+    'postroll': 2.0,
+    'resolution': (1920, 1080),
+    'framerate': 30,
+    'sound_files': None,          # default: configured_sound_files()
+    'audio_buffer': 512,
+    'sound_selection': 'random'
+}
+
+_gpio_in_use = False
+
+
+def _gpio():
+    """RPi.GPIO in BOARD numbering, configured on first use."""
+    global _gpio_in_use
+    import RPi.GPIO as GPIO
+    if not _gpio_in_use:
+        GPIO.setmode(GPIO.BOARD)
+        GPIO.setwarnings(False)
+        _gpio_in_use = True
+    return GPIO
+
+
+def release_gpio():
+    """GPIO.cleanup(), if a GPIO backend was ever created."""
+    global _gpio_in_use
+    if _gpio_in_use:
+        import RPi.GPIO as GPIO
+        GPIO.cleanup()
+        _gpio_in_use = False
+
+
+def _gpio_motion(controller, options):
+    GPIO = _gpio()
+    GPIO.setup(controller.motion_pin, GPIO.IN)
+    pir_filter = PIRFilter.from_spec(options['pir_filter'])
+    if pir_filter is None:
+        return GPIOMotionSource(controller.motion_pin, bouncetime=options['bouncetime'],
+                                debounce=options['debounce'])
+    # Edges only wake sampling; the filter decides what counts as a visitor
+    return FilteredGPIOMotionSource(controller.motion_pin, pir_filter,
+                                    bouncetime=options['bouncetime'],
+                                    debounce=options['debounce'])
+
+
+def _gpio_relay(controller, options):
+    _gpio()
+    return GPIORelay(controller.relay_pin)
+
+
+def _picamera(controller, options):
+    from picamera import PiCamera
+    camera = PiCamera()
+    camera.resolution = options['resolution']
+    camera.framerate = options['framerate']
+    # Record continuously into memory so clips include the pre-roll
+    return PiCameraPreRoll(camera, preroll=options['preroll'], postroll=options['postroll'])
+
+
+def _pygame_audio(controller, options):
+    # Clips decoded once, small mixer buffer
+    return SoundBank(options['sound_files'] or configured_sound_files(),
+                     buffer=options['audio_buffer'], selection=options['sound_selection'])
+
+
+def _simulated_camera(controller, options):
+    # Synthetic frames through the real ring buffer; tiny frames keep clips small
+    return FramePreRoll(FakeFrameSource(fps=options['framerate'], frame_size=64),
+                        options['preroll'], options['postroll'])
+
+
+def _simulated_audio(controller, options):
+    return SimulatedSoundBank(options['sound_files'] or configured_sound_files(),
+                              selection=options['sound_selection'])
+
+
+# kind -> backend name -> factory(controller, options)
+BACKENDS = {
+    'motion': {
+        'gpio': _gpio_motion,
+        'simulated': lambda controller, options: SimulatedMotionSource(
+            mean_interval=options['mean_interval'], debounce=options['debounce']),
+        'null': lambda controller, options: NullMotionSource(options['debounce'])
+    },
+    'relay': {
+        'gpio': _gpio_relay,
+        'simulated': lambda controller, options: SimulatedRelay(),
+        'null': lambda controller, options: NullRelay()
+    },
+    'camera': {
+        'picamera': _picamera,
+        'simulated': _simulated_camera,
+        'null': lambda controller, options: NullRecorder()
+    },
+    'audio': {
+        'pygame': _pygame_audio,
+        'simulated': _simulated_audio,
+        'null': lambda controller, options: NullSoundBank()
+    }
+}
+
+
+def configured_backend(kind, default):
+    """Backend name for kind from $SCAREPI_<KIND>_BACKEND, else default."""
+    return os.environ.get(BACKEND_ENV.format(kind=kind.upper())) or default
+
+
+def create_backend(kind, name, controller, options):
+    """Build the named backend; unknown names raise ValueError."""
+    factories = BACKENDS[kind]
+    if name not in factories:
+        raise ValueError(f"Unknown {kind} backend '{name}' (choose from {', '.join(factories)})")
+    return factories[name](controller, options)
+
+
+class ScareController:
+    name = 'ScarePi'
+    clip_prefix = 'scare'
+    default_backends = {
+        'motion': 'simulated',
+        'relay': 'simulated',
+        'camera': 'simulated',
+        'audio': 'simulated'
+    }
+
+    def __init__(self, motion_pin=35, relay_pin=37, backends=None, **options):
+        """Controller for one motion sensor, relay, camera and speaker.
+
+        backends maps kind to backend name and wins over $SCAREPI_<KIND>_BACKEND,
+        which wins over the class's default_backends. options override
+        DEFAULT_OPTIONS.
+        """
+        unknown = set(options) - set(DEFAULT_OPTIONS)
+        if unknown:
+            raise TypeError(f"Unknown ScarePi option(s): {', '.join(sorted(unknown))}")
+        self.motion_pin = motion_pin
+        self.relay_pin = relay_pin
+        self.running = True
+        self.options = dict(DEFAULT_OPTIONS, **options)
+        self.backends = {kind: (backends or {}).get(kind) or
+                         configured_backend(kind, self.default_backends[kind])
+                         for kind in BACKEND_KINDS}
+
+        self.motion_source = create_backend('motion', self.backends['motion'], self, self.options)
+        self.relay = create_backend('relay', self.backends['relay'], self, self.options)
+        self.recorder = create_backend('camera', self.backends['camera'], self, self.options)
+        self.recorder.start()
+        self.sound_bank = create_backend('audio', self.backends['audio'], self, self.options).start()
+
+        print(f"🎃 {self.name} initialized!")
+        print(f"👁️ Motion sensor: {self.backends['motion']} (pin {self.motion_pin})")
+        print(f"⚡ Relay: {self.backends['relay']} (pin {self.relay_pin})")
+        print(f"📹 Camera: {self.backends['camera']} | 🔊 Audio: {self.backends['audio']}")
+
+    def install_signal_handlers(self):
+        """Clean up hardware on SIGINT/SIGTERM (main thread only)."""
+        signal.signal(signal.SIGINT, self._signal_handler)
+        signal.signal(signal.SIGTERM, self._signal_handler)
+
+    def _signal_handler(self, signum, frame):
+        """Handle shutdown signals gracefully."""
+        print(f"\nShutting down {self.name}...")
+        self.running = False
+        self.cleanup()
+        sys.exit(0)
+
+    def cleanup(self):
+        """Stop every backend and release GPIO pins and the camera."""
+        self.motion_source.stop()
+        self.relay.shutdown()
+        self.recorder.close()
+        self.sound_bank.stop()
+        release_gpio()
+        print("GPIO and camera cleaned up.")
+
+    def log_analytics(self, event_type, details=""):
+        """Hook for controllers that record show analytics; no-op here."""
+
+    def hardware_status(self):
+        """Selected backends with relay, camera and sound counters."""
+        return {
+            'backends': dict(self.backends),
+            'relay': self.relay.stats(),
+            'camera': self.recorder.stats(),
+            'sound': self.sound_bank.stats()
+        }
+
+    def motion_detected(self):
+        """Check if motion is currently detected."""
+        return self.motion_source.is_active()
+
+    def trigger_prop(self, duration=2.0):
+        """Trigger Halloween prop by closing relay."""
+        print(f"🦇 BOO! Triggering {self.name} prop...")
+        self.log_analytics('prop_triggered', f'Duration: {duration}s')
+        self.relay.pulse(duration)
+        print("⚡ Prop triggered!")
+
+    async def trigger_prop_async(self, duration=2.0, relay=None):
+        """trigger_prop() as a coroutine for the scare loop; relay defaults to the main prop."""
+        print(f"🦇 BOO! Triggering {self.name} prop...")
+        self.log_analytics('prop_triggered', f'Duration: {duration}s')
+        await (relay or self.relay).pulse_async(duration)
+        print("⚡ Prop triggered!")
+
+    def play_scary_sound(self, sound_file=None):
+        """Play scary sound effect from the preloaded bank."""
+        clip = self.sound_bank.play(sound_file)
+        if clip:
+            latency = self.sound_bank.stats()['last_latency_ms']
+            print(f"🔊 Playing scary sound: {clip} ({latency} ms to audio)")
+            self.log_analytics('sound_played', f'Sound: {clip}')
+        return clip
+
+    def record_scare(self, filename=None):
+        """Record video of the scare."""
+        if filename is None:
+            current = datetime.now()
+            filename = f"{self.clip_prefix}_{current.strftime('%Y%m%d_%H%M%S')}.h264"
+
+        print(f"📹 Recording scare: {filename}")
+        self.log_analytics('recording_started', f'File: {filename}')
+        # Flushed from the ring buffer in the background once the post-roll lands
+        return self.recorder.capture(filename)
+
+    def run_motion_detection(self):
+        """Main loop - every zone's motion triggers its scare on one asyncio loop."""
+        from scarepi_zones import ZoneManager
+        loop = ControllerLoop()
+        zones = ZoneManager.from_config(
+            self, loop=loop, on_scare=lambda zone, timing: print(
+                f"⏱️ Zone {zone.name} stages started within {timing['max_skew_ms']} ms"))
+        print(f"Motion detection active on {len(zones.zones)} zone(s)...")
+        print("Waiting for motion...")
+
+        # Sensors post to the scare loop; cooldowns are per zone
+        zones.arm()
+        try:
+            while self.running:
+                time.sleep(1.0)
+        finally:
+            zones.stop()
+            loop.stop()
@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+"""
+ScarePi Database - Shared SQLite connection layer
+Pooled, WAL-mode connections so audience sign-ups and show analytics
+don't pay a fresh connect + fsync for every event.
+"""
+
+import argparse
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from urllib.parse import quote
+
+# One place to configure where the audience database lives
+DB_PATH_ENV = 'SCAREPI_DB_PATH'
+DOCKER_DB_PATH = '/app/data/scarepi_audience.db'
+LOCAL_DB_PATH = 'scarepi_audience.db'
+
+BASE_SCHEMA_DDL = [
+    '''
+    CREATE TABLE IF NOT EXISTS audience (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        email TEXT UNIQUE NOT NULL,
+        phone TEXT,
+        social_media TEXT,
+        how_heard TEXT,
+        interests TEXT,
+        subscribe_youtube BOOLEAN DEFAULT 0,
+        subscribe_updates BOOLEAN DEFAULT 1,
+        join_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        ip_address TEXT,
+        user_agent TEXT
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS show_analytics (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        event_type TEXT NOT NULL,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        details TEXT
+    )
+    '''
+]
+
+QUERY_INDEXES_DDL = [
+    '''
+    CREATE INDEX IF NOT EXISTS idx_show_analytics_event_time
+        ON show_analytics (event_type, timestamp)
+    ''',
+    '''
+    CREATE INDEX IF NOT EXISTS idx_audience_youtube_join
+        ON audience (subscribe_youtube, join_date)
+    ''',
+    '''
+    CREATE INDEX IF NOT EXISTS idx_audience_join_date
+        ON audience (join_date)
+    '''
+]
+
+# State shared by every web worker process (see scarepi_state.py)
+SHARED_STATE_DDL = [
+    '''
+    CREATE TABLE IF NOT EXISTS show_state (
+        key TEXT PRIMARY KEY,
+        value TEXT,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS controller_commands (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS event_feed (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        origin INTEGER,
+        event TEXT NOT NULL,
+        data TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    '''
+]
+
+# Aggregates kept up to date by triggers so stats reads are O(1)
+STATS_COUNTER_QUERIES = {
+    'total_audience': 'SELECT COUNT(*) FROM audience',
+    'youtube_subscribers': 'SELECT COUNT(*) FROM audience WHERE subscribe_youtube = 1',
+    'total_scares': "SELECT COUNT(*) FROM show_analytics WHERE event_type = 'scare_sequence'"
+}
+
+STATS_COUNTERS_DDL = [
+    '''
+    CREATE TABLE IF NOT EXISTS stats_counters (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL DEFAULT 0
+    )
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS audience_counters_insert AFTER INSERT ON audience
+    BEGIN
+        UPDATE stats_counters SET value = value + 1 WHERE name = 'total_audience';
+        UPDATE stats_counters SET value = value + 1
+            WHERE name = 'youtube_subscribers' AND NEW.subscribe_youtube = 1;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS audience_counters_delete AFTER DELETE ON audience
+    BEGIN
+        UPDATE stats_counters SET value = value - 1 WHERE name = 'total_audience';
+        UPDATE stats_counters SET value = value - 1
+            WHERE name = 'youtube_subscribers' AND OLD.subscribe_youtube = 1;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS audience_counters_update
+    AFTER UPDATE OF subscribe_youtube ON audience
+    BEGIN
+        UPDATE stats_counters
+            SET value = value + (NEW.subscribe_youtube = 1) - (OLD.subscribe_youtube = 1)
+            WHERE name = 'youtube_subscribers';
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS analytics_counters_insert AFTER INSERT ON show_analytics
+    WHEN NEW.event_type = 'scare_sequence'
+    BEGIN
+        UPDATE stats_counters SET value = value + 1 WHERE name = 'total_scares';
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS analytics_counters_delete AFTER DELETE ON show_analytics
+    WHEN OLD.event_type = 'scare_sequence'
+    BEGIN
+        UPDATE stats_counters SET value = value - 1 WHERE name = 'total_scares';
+    END
+    '''
+]
+
+# Per-event_type counts at minute/hour/day resolution, bucketed by UTC start time
+ROLLUP_GRANULARITIES = {
+    'minute': '%Y-%m-%d %H:%M:00',
+    'hour': '%Y-%m-%d %H:00:00',
+    'day': '%Y-%m-%d 00:00:00'
+}
+
+
+def _rollup_trigger(action, row, delta):
+    """Trigger upserting one event into every rollup granularity."""
+    upserts = ''.join(f'''
+        INSERT INTO analytics_rollups (granularity, bucket, event_type, count)
+        VALUES ('{granularity}', strftime('{fmt}', COALESCE({row}.timestamp, CURRENT_TIMESTAMP)),
+                {row}.event_type, {delta})
+        ON CONFLICT(granularity, bucket, event_type) DO UPDATE SET count = count + {delta};'''
+        for granularity, fmt in ROLLUP_GRANULARITIES.items())
+    return f'''
+    CREATE TRIGGER IF NOT EXISTS analytics_rollups_{action.lower()} AFTER {action} ON show_analytics
+    BEGIN{upserts}
+    END
+    '''
+
+
+ANALYTICS_ROLLUPS_DDL = [
+    '''
+    CREATE TABLE IF NOT EXISTS analytics_rollups (
+        granularity TEXT NOT NULL,
+        bucket TEXT NOT NULL,
+        event_type TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (granularity, bucket, event_type)
+    ) WITHOUT ROWID
+    ''',
+    _rollup_trigger('INSERT', 'NEW', 1),
+    _rollup_trigger('DELETE', 'OLD', -1)
+]
+
+
+def normalize_email(email):
+    """Canonical form used for duplicate detection ("Bob@X.com " == "bob@x.com")."""
+    return (email or '').strip().lower()
+
+
+def resolve_db_path(preferred=LOCAL_DB_PATH, fallback=LOCAL_DB_PATH):
+    """Pick the database path: $SCAREPI_DB_PATH, then preferred, then fallback."""
+    path = os.environ.get(DB_PATH_ENV) or preferred
+    data_dir = os.path.dirname(os.path.abspath(path))
+    try:
+        if not os.path.exists(data_dir):
+            os.makedirs(data_dir, exist_ok=True)
+            print(f"📁 Created data directory: {data_dir}")
+        if not os.access(data_dir, os.W_OK):
+            raise PermissionError(f"{data_dir} is not writable")
+        return path
+    except OSError as e:
+        print(f"❌ Cannot use database path {path}: {e}")
+        print(f"🔄 Falling back to {fallback}")
+        return fallback
+
+
+class ScareDatabase:
+    def __init__(self, db_path=LOCAL_DB_PATH, pool_size=4, busy_timeout=5000,
+                 synchronous='NORMAL', read_only=False):
+        """Create a connection pool for the given SQLite database.
+
+        read_only opens an existing file with mode=ro, so nothing can change
+        it (or create it).
+        """
+        self.db_path = db_path
+        self.read_only = read_only
+        self.pool_size = pool_size
+        self.busy_timeout = busy_timeout
+        self.synchronous = synchronous
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        """Open and tune a new connection."""
+        if self.read_only:
+            conn = sqlite3.connect(f'file:{quote(os.path.abspath(self.db_path))}?mode=ro',
+                                   uri=True, timeout=self.busy_timeout / 1000.0,
+                                   check_same_thread=False)
+        else:
+            conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout / 1000.0,
+                                   check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(f'PRAGMA synchronous={self.synchronous}')
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout)}')
+        conn.execute('PRAGMA foreign_keys=ON')
+        return conn
+
+    def _acquire(self):
+        """Take a pooled connection, opening a new one while under the limit."""
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.pool_size:
+                self._created += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    self._created -= 1
+                    raise
+        return self._pool.get()
+
+    def _release(self, conn):
+        """Return a connection to the pool."""
+        self._pool.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for reads or manual transaction handling."""
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._release(conn)
+
+    @contextmanager
+    def transaction(self):
+        """Borrow a cursor inside a transaction that commits on success."""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                yield cursor
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+
+    @contextmanager
+    def dedicated_connection(self):
+        """Open a connection outside the pool for long-running reads like exports."""
+        conn = self._connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def execute(self, sql, params=()):
+        """Run a single write statement in its own transaction."""
+        with self.transaction() as cursor:
+            cursor.execute(sql, params)
+            return cursor.rowcount
+
+    def query_one(self, sql, params=()):
+        """Fetch a single row."""
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchone()
+
+    def query_all(self, sql, params=()):
+        """Fetch all rows."""
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def close(self):
+        """Close every pooled connection."""
+        with self._lock:
+            while True:
+                try:
+                    conn = self._pool.get_nowait()
+                except queue.Empty:
+                    break
+                conn.close()
+                self._created -= 1
+
+
+def ensure_stats_counters(cursor):
+    """Create the counters table and triggers, seeding it on first use."""
+    for statement in STATS_COUNTERS_DDL:
+        cursor.execute(statement)
+    cursor.execute('SELECT COUNT(*) FROM stats_counters')
+    if cursor.fetchone()[0] < len(STATS_COUNTER_QUERIES):
+        rebuild_stats_counters(cursor)
+
+
+def rebuild_stats_counters(cursor):
+    """Recompute every counter from the base tables (full scan, run rarely)."""
+    for name, sql in STATS_COUNTER_QUERIES.items():
+        cursor.execute(sql)
+        value = cursor.fetchone()[0]
+        cursor.execute('''
+            INSERT INTO stats_counters (name, value) VALUES (?, ?)
+            ON CONFLICT(name) DO UPDATE SET value = excluded.value
+        ''', (name, value))
+
+
+def read_stats_counters(db):
+    """Read all counters in a single indexed lookup."""
+    counters = dict.fromkeys(STATS_COUNTER_QUERIES, 0)
+    counters.update(db.query_all('SELECT name, value FROM stats_counters'))
+    return counters
+
+
+def ensure_analytics_rollups(cursor):
+    """Create the rollup table and triggers, backfilling from show_analytics."""
+    for statement in ANALYTICS_ROLLUPS_DDL:
+        cursor.execute(statement)
+    rebuild_analytics_rollups(cursor)
+
+
+def rebuild_analytics_rollups(cursor):
+    """Recompute every rollup from show_analytics (full scan, run rarely)."""
+    cursor.execute('DELETE FROM analytics_rollups')
+    for granularity, fmt in ROLLUP_GRANULARITIES.items():
+        cursor.execute('''
+            INSERT INTO analytics_rollups (granularity, bucket, event_type, count)
+            SELECT ?, strftime(?, COALESCE(timestamp, CURRENT_TIMESTAMP)), event_type, COUNT(*)
+            FROM show_analytics
+            GROUP BY 2, 3
+        ''', (granularity, fmt))
+
+
+def add_normalized_emails(cursor):
+    """Add audience.email_normalized, backfill it and make it unique."""
+    cursor.execute('PRAGMA table_info(audience)')
+    if 'email_normalized' not in {row[1] for row in cursor.fetchall()}:
+        cursor.execute('ALTER TABLE audience ADD COLUMN email_normalized TEXT')
+    # Normalized in Python so it matches what the apps write; the oldest row
+    # wins where legacy rows differ only by case/whitespace (the rest stay NULL)
+    cursor.execute('SELECT id, email FROM audience WHERE email_normalized IS NULL ORDER BY id')
+    rows = cursor.fetchall()
+    cursor.execute('SELECT email_normalized FROM audience WHERE email_normalized IS NOT NULL')
+    seen = {row[0] for row in cursor.fetchall()}
+    updates = []
+    for row_id, email in rows:
+        normalized = normalize_email(email)
+        if normalized and normalized not in seen:
+            seen.add(normalized)
+            updates.append((normalized, row_id))
+    cursor.executemany('UPDATE audience SET email_normalized = ? WHERE id = ?', updates)
+    cursor.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_audience_email_normalized
+            ON audience (email_normalized)
+    ''')
+
+
+def _run_statements(statements):
+    """Build a migration step from a list of SQL statements."""
+    def step(cursor):
+        for statement in statements:
+            cursor.execute(statement)
+    return step
+
+
+# Ordered schema history - append new migrations, never edit applied ones
+MIGRATIONS = [
+    (1, 'base audience and show_analytics tables', _run_statements(BASE_SCHEMA_DDL)),
+    (2, 'trigger-maintained stats counters', ensure_stats_counters),
+    (3, 'indexes for analytics and audience queries', _run_statements(QUERY_INDEXES_DDL)),
+    (4, 'shared show state for multi-worker serving', _run_statements(SHARED_STATE_DDL)),
+    (5, 'minute/hour/day analytics rollups', ensure_analytics_rollups),
+    (6, 'normalized unique audience emails', add_normalized_emails),
+]
+
+
+def schema_version(db):
+    """Highest applied migration version (0 for a fresh database)."""
+    with db.connection() as conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        return conn.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version').fetchone()[0]
+
+
+def migrate(db):
+    """Apply pending migrations in order, one transaction each."""
+    current = schema_version(db)
+    applied = []
+    for version, description, step in MIGRATIONS:
+        if version <= current:
+            continue
+        with db.connection() as conn:
+            # IMMEDIATE takes the write lock so concurrent starters don't race
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                done = conn.execute('SELECT 1 FROM schema_version WHERE version = ?',
+                                    (version,)).fetchone()
+                if not done:
+                    cursor = conn.cursor()
+                    step(cursor)
+                    cursor.execute('INSERT INTO schema_version (version, description) VALUES (?, ?)',
+                                   (version, description))
+                    applied.append(version)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        if version in applied:
+            print(f"🗄️ Applied migration {version}: {description}")
+    return applied
+
+
+def main():
+    """Database maintenance commands."""
+    parser = argparse.ArgumentParser(description='ScarePi database maintenance')
+    parser.add_argument('command', choices=['migrate', 'rebuild-counters', 'rebuild-rollups'])
+    parser.add_argument('--db', default=None,
+                        help=f'Database path (default: ${DB_PATH_ENV} or {LOCAL_DB_PATH})')
+    args = parser.parse_args()
+
+    db = ScareDatabase(args.db or resolve_db_path(LOCAL_DB_PATH))
+    migrate(db)
+    if args.command == 'migrate':
+        print(f"✅ Database at schema version {schema_version(db)}")
+    elif args.command == 'rebuild-counters':
+        with db.transaction() as cursor:
+            rebuild_stats_counters(cursor)
+        print(f"✅ Stats counters rebuilt: {read_stats_counters(db)}")
+    elif args.command == 'rebuild-rollups':
+        with db.transaction() as cursor:
+            rebuild_analytics_rollups(cursor)
+        rows = db.query_one('SELECT COUNT(*) FROM analytics_rollups')[0]
+        print(f"✅ Analytics rollups rebuilt: {rows} buckets")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+ScarePi Events - Server-Sent Events fan-out
+One in-process publisher pushes status, motion, scare and audience changes
+to every open control panel instead of each browser polling the API.
+"""
+
+import json
+import queue
+import threading
+
+
+def format_sse(event, data, event_id=None):
+    """Encode one Server-Sent Events message."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    for line in json.dumps(data, default=str).splitlines():
+        lines.append(f"data: {line}")
+    return "\n".join(lines) + "\n\n"
+
+
+class EventBroadcaster:
+    def __init__(self, max_queue=100, heartbeat=15.0, retry_ms=3000):
+        """Create a publisher that fans out to any number of subscribers."""
+        self.max_queue = max_queue
+        self.heartbeat = heartbeat
+        self.retry_ms = retry_ms
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self.published = 0
+
+    def subscribe(self):
+        """Register a subscriber and return its message queue."""
+        q = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            self._subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        """Remove a subscriber."""
+        with self._lock:
+            self._subscribers.discard(q)
+
+    def subscriber_count(self):
+        """Number of connected subscribers."""
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, event, data):
+        """Send an event to every subscriber without blocking the caller."""
+        with self._lock:
+            self._next_id += 1
+            self.published += 1
+            message = format_sse(event, data, self._next_id)
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(message)
+            except queue.Full:
+                # Slow client: drop its oldest message rather than stall the show
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    pass
+                try:
+                    q.put_nowait(message)
+                except queue.Full:
+                    pass
+
+    def stream(self, initial=None):
+        """Generator for a streaming response; initial is a list of (event, data)."""
+        q = self.subscribe()
+        try:
+            yield f"retry: {self.retry_ms}\n\n"
+            for event, data in initial or []:
+                yield format_sse(event, data)
+            while True:
+                try:
+                    yield q.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+        finally:
+            self.unsubscribe(q)
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+ScarePi Media - Background post-processing for recorded scares
+Every saved .h264 clip is queued for a small process pool running at the
+lowest CPU priority, which remuxes it to a phone-friendly MP4 (no
+re-encode), grabs a thumbnail at the moment of the scare and optionally
+makes a short GIF. The motion loop never waits on ffmpeg, and jobs can be
+followed through the API.
+
+Configure with $SCAREPI_MEDIA ('workers=1,queue=20,gif=0,gif_seconds=3,
+gif_width=320,thumb_width=480,timeout=120') or set it to 'off'. Clips
+already on disk can be processed in one go:
+
+    python scarepi_media.py scare_*.h264 --gif
+"""
+
+import argparse
+import glob
+import itertools
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, wait
+from datetime import datetime
+
+from scarepi_metrics import MEDIA_JOBS, MEDIA_JOB_SECONDS
+
+MEDIA_ENV = 'SCAREPI_MEDIA'
+DEFAULT_MEDIA = {
+    'workers': 1,         # ffmpeg processes at once
+    'queue': 20,          # clips waiting or running before new ones are rejected
+    'gif': 0,             # 1 to also make a GIF
+    'gif_seconds': 3.0,   # GIF length, starting a little before the scare
+    'gif_width': 320,
+    'thumb_width': 480,
+    'timeout': 120.0      # per ffmpeg step, s
+}
+# Finished jobs kept for the API
+JOB_HISTORY = 200
+# Background CPU priority for workers (and the ffmpeg they start)
+WORKER_NICE = 19
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+REJECTED = 'rejected'
+
+
+def parse_media_spec(spec=None):
+    """Options from a 'workers=1,gif=1' spec or $SCAREPI_MEDIA; None for 'off'."""
+    if spec is None:
+        spec = os.environ.get(MEDIA_ENV, '')
+    spec = spec.strip()
+    if spec.lower() in ('off', 'none', '0'):
+        return None
+    options = dict(DEFAULT_MEDIA)
+    for part in spec.split(','):
+        if not part.strip():
+            continue
+        name, _, value = part.partition('=')
+        name = name.strip()
+        if name not in options:
+            raise ValueError(f"unknown media option '{name}'")
+        options[name] = type(DEFAULT_MEDIA[name])(float(value))
+    return options
+
+
+def _lower_priority():
+    """Pool initializer: drop to the lowest CPU priority."""
+    try:
+        os.nice(WORKER_NICE)
+    except (AttributeError, OSError):
+        pass
+
+
+def _ffmpeg(args, timeout):
+    """Run one ffmpeg command, raising with its last error lines on failure."""
+    result = subprocess.run(['ffmpeg', '-nostdin', '-hide_banner', '-loglevel', 'error', '-y']
+                            + args, capture_output=True, text=True, timeout=timeout)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg exited with {result.returncode}: "
+                           f"{result.stderr.strip()[-500:]}")
+
+
+def process_clip(clip, framerate=30, scare_at=3.0, gif=False, gif_seconds=3.0, gif_width=320,
+                 thumb_width=480, timeout=120.0):
+    """Remux clip to MP4, take a thumbnail at scare_at s and optionally a GIF.
+
+    Runs in a pool worker. Outputs sit next to the clip; returns their paths
+    and how long each step took.
+    """
+    base = os.path.splitext(clip)[0]
+    outputs = {}
+    steps = {}
+
+    started = time.perf_counter()
+    # Raw H.264 has no timestamps, so the camera's frame rate is given explicitly
+    _ffmpeg(['-f', 'h264', '-framerate', str(framerate), '-i', clip,
+             '-c', 'copy', '-movflags', '+faststart', f'{base}.mp4'], timeout)
+    outputs['mp4'] = f'{base}.mp4'
+    steps['mp4_ms'] = round((time.perf_counter() - started) * 1000, 1)
+
+    started = time.perf_counter()
+    _ffmpeg(['-ss', f'{scare_at:g}', '-i', outputs['mp4'], '-frames:v', '1',
+             '-vf', f'scale={thumb_width}:-2', f'{base}.jpg'], timeout)
+    outputs['thumbnail'] = f'{base}.jpg'
+    steps['thumbnail_ms'] = round((time.perf_counter() - started) * 1000, 1)
+
+    if gif:
+        started = time.perf_counter()
+        # One pass with a generated palette: small file, no banding
+        _ffmpeg(['-ss', f'{max(0.0, scare_at - 0.5):g}', '-t', f'{gif_seconds:g}',
+                 '-i', outputs['mp4'],
+                 '-vf', f'fps=10,scale={gif_width}:-1:flags=lanczos,'
+                        'split[a][b];[a]palettegen[p];[b][p]paletteuse',
+                 f'{base}.gif'], timeout)
+        outputs['gif'] = f'{base}.gif'
+        steps['gif_ms'] = round((time.perf_counter() - started) * 1000, 1)
+
+    return {'outputs': outputs, 'steps': steps}
+
+
+class MediaPipeline:
+    def __init__(self, workers=1, queue=20, gif=False, gif_seconds=3.0, gif_width=320,
+                 thumb_width=480, timeout=120.0, framerate=30, scare_at=3.0):
+        """Bounded pool of low-priority ffmpeg workers for saved clips.
+
+        framerate is the camera's and scare_at the pre-roll length, i.e. where
+        in the clip the scare happens. The pool starts on the first job.
+        """
+        self.workers = int(workers)
+        self.max_pending = int(queue)
+        self.job_options = {
+            'framerate': framerate,
+            'scare_at': scare_at,
+            'gif': bool(gif),
+            'gif_seconds': gif_seconds,
+            'gif_width': int(gif_width),
+            'thumb_width': int(thumb_width),
+            'timeout': timeout
+        }
+        self.ffmpeg = shutil.which('ffmpeg')
+        self.jobs = OrderedDict()
+        self.version = 0
+        self._executor = None
+        self._futures = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.stats_data = {QUEUED: 0, DONE: 0, FAILED: 0, REJECTED: 0, 'skipped': 0}
+
+    @classmethod
+    def from_env(cls, spec=None, **kwargs):
+        """Pipeline from $SCAREPI_MEDIA (or spec); None when set to 'off'."""
+        try:
+            options = parse_media_spec(spec)
+        except ValueError as e:
+            print(f"❌ Ignoring bad {MEDIA_ENV}: {e}")
+            options = dict(DEFAULT_MEDIA)
+        if options is None:
+            return None
+        return cls(**options, **kwargs)
+
+    def attach(self, controller):
+        """Process every clip the controller's recorder saves."""
+        self.job_options['framerate'] = controller.options['framerate']
+        self.job_options['scare_at'] = controller.options['preroll']
+        if not controller.recorder.video:
+            # Simulated cameras write placeholder frames ffmpeg can't read
+            return self
+        controller.recorder.add_callback(self.submit)
+        if not self.ffmpeg:
+            print("⚠️ ffmpeg not found - recorded clips will stay raw .h264")
+        return self
+
+    def submit(self, clip):
+        """Queue a saved clip; returns its job dict (status 'rejected' when the queue is full)."""
+        if not os.path.exists(clip):
+            # Nothing on disk to process (moved or deleted already)
+            with self._lock:
+                self.stats_data['skipped'] += 1
+            return None
+        job = {
+            'id': next(self._ids),
+            'clip': clip,
+            'status': QUEUED,
+            'queued_at': datetime.now().isoformat(),
+            'finished_at': None,
+            'outputs': {},
+            'steps': {},
+            'error': None
+        }
+        with self._lock:
+            if not self.ffmpeg:
+                job['status'], job['error'] = FAILED, 'ffmpeg is not installed'
+            elif len(self._futures) >= self.max_pending:
+                job['status'], job['error'] = REJECTED, 'post-processing queue is full'
+            self.stats_data[job['status']] += 1
+            self._remember(job)
+            if job['status'] != QUEUED:
+                MEDIA_JOBS.labels(job['status']).inc()
+                return dict(job)
+            if self._executor is None:
+                # Fresh interpreters: forking a threaded web process can deadlock
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, initializer=_lower_priority,
+                    mp_context=multiprocessing.get_context('spawn'))
+            future = self._executor.submit(process_clip, clip, **self.job_options)
+            self._futures[job['id']] = (future, time.perf_counter())
+        future.add_done_callback(lambda future, job_id=job['id']: self._finished(job_id, future))
+        return dict(job)
+
+    def get(self, job_id):
+        """One job's current state, or None."""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            return self._view(job) if job else None
+
+    def recent(self, limit=20):
+        """The newest jobs first."""
+        with self._lock:
+            return [self._view(job) for job in list(self.jobs.values())[::-1][:limit]]
+
+    def stats(self):
+        """Job counters, pending count and pool settings."""
+        with self._lock:
+            data = dict(self.stats_data)
+            data['pending'] = len(self._futures)
+        data['workers'] = self.workers
+        data['max_pending'] = self.max_pending
+        data['gif'] = self.job_options['gif']
+        data['ffmpeg'] = bool(self.ffmpeg)
+        return data
+
+    def status(self):
+        """Stats plus recent jobs, for the API."""
+        return {'stats': self.stats(), 'jobs': self.recent()}
+
+    def drain(self):
+        """Block until every queued clip has been processed."""
+        with self._lock:
+            futures = [future for future, _ in self._futures.values()]
+        wait(futures)
+
+    def shutdown(self, wait=True):
+        """Stop the pool; queued clips that haven't started are dropped."""
+        if self._executor:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _remember(self, job):
+        """Add a job, forgetting the oldest finished ones (lock held)."""
+        self.jobs[job['id']] = job
+        self.version += 1
+        while len(self.jobs) > JOB_HISTORY:
+            oldest = next(iter(self.jobs))
+            if oldest in self._futures:
+                break
+            del self.jobs[oldest]
+
+    def _view(self, job):
+        """Copy of a job with 'running' filled in from its future (lock held)."""
+        job = dict(job)
+        pending = self._futures.get(job['id'])
+        if pending and pending[0].running():
+            job['status'] = RUNNING
+        return job
+
+    def _finished(self, job_id, future):
+        """Pool callback: record a job's result."""
+        with self._lock:
+            _, queued = self._futures.pop(job_id)
+            job = self.jobs.get(job_id, {})
+            job['finished_at'] = datetime.now().isoformat()
+            if future.cancelled():
+                job['status'], job['error'] = FAILED, 'cancelled'
+            elif future.exception() is not None:
+                job['status'], job['error'] = FAILED, str(future.exception())
+            else:
+                job['status'] = DONE
+                job.update(future.result())
+            self.stats_data[job['status']] += 1
+            self.version += 1
+        MEDIA_JOBS.labels(job['status']).inc()
+        MEDIA_JOB_SECONDS.observe(time.perf_counter() - queued)
+        if job['status'] == DONE:
+            print(f"🎞️ Clip ready: {job['outputs']['mp4']}")
+        else:
+            print(f"❌ Post-processing {job.get('clip')} failed: {job['error']}")
+
+
+def main():
+    """Post-process clips already on disk."""
+    parser = argparse.ArgumentParser(description='ScarePi clip post-processing')
+    parser.add_argument('clips', nargs='+', help='.h264 clips (globs are expanded)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_MEDIA['workers'])
+    parser.add_argument('--gif', action='store_true', help='Also make a GIF of each scare')
+    parser.add_argument('--framerate', type=int, default=30, help='Camera frame rate')
+    parser.add_argument('--scare-at', type=float, default=3.0,
+                        help='Seconds into the clip where the scare happens (the pre-roll)')
+    args = parser.parse_args()
+
+    clips = sorted({path for pattern in args.clips for path in glob.glob(pattern)})
+    pipeline = MediaPipeline(workers=args.workers, queue=len(clips) or 1, gif=args.gif,
+                             framerate=args.framerate, scare_at=args.scare_at)
+    if not pipeline.ffmpeg:
+        print("❌ ffmpeg not found")
+        return 1
+    print(f"🎞️ Processing {len(clips)} clip(s) with {args.workers} worker(s)...")
+    for clip in clips:
+        pipeline.submit(clip)
+    pipeline.drain()
+    pipeline.shutdown()
+    stats = pipeline.stats()
+    print(f"✅ {stats[DONE]} done, ❌ {stats[FAILED]} failed")
+    return 1 if stats[FAILED] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
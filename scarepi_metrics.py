@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+ScarePi Metrics - In-process counters and histograms
+A small Prometheus-compatible registry (no client library needed) fed from
+the request, scare, database and motion hot paths and served at /metrics.
+Recording is a lock and a few additions, so it's safe to leave on during a show.
+"""
+
+import bisect
+import collections
+import threading
+import time
+from contextlib import contextmanager
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; covers sub-ms SQLite writes up to multi-second prop cycles
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    """Escape a label value for the text exposition format."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    """Render {name="value",...} (empty string when there are no labels)."""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    """Render a sample value."""
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        """Named metric with optional labels; registers itself with registry."""
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    def labels(self, *values):
+        """Child metric for one combination of label values."""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self):
+        """Child used when the metric has no labels."""
+        return self.labels()
+
+    def _new_child(self):
+        """Create the per-label-set value holder."""
+        raise NotImplementedError
+
+    def samples(self):
+        """(suffix, label_values, extra_labels, value) tuples for rendering."""
+        raise NotImplementedError
+
+    def render(self):
+        """Lines in Prometheus text format."""
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for suffix, values, extra, value in self.samples():
+            labels = _format_labels(self.labelnames, values, extra)
+            lines.append(f'{self.name}{suffix}{labels} {_format_value(value)}')
+        return lines
+
+
+class _CounterChild:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        """Add to the counter."""
+        with self._lock:
+            self.value += amount
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        """Add to the unlabelled counter."""
+        self._default().inc(amount)
+
+    def samples(self):
+        return [('', key, (), child.value) for key, child in sorted(self._children.items())]
+
+
+class _GaugeChild:
+    def __init__(self):
+        self.value = 0
+        self.function = None
+
+    def set(self, value):
+        """Set the gauge."""
+        self.value = value
+
+    def set_function(self, function):
+        """Read the gauge from function() at scrape time."""
+        self.function = function
+
+    def get(self):
+        """Current value."""
+        return self.function() if self.function else self.value
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value):
+        """Set the unlabelled gauge."""
+        self._default().set(value)
+
+    def set_function(self, function):
+        """Read the unlabelled gauge from function() at scrape time."""
+        self._default().set_function(function)
+
+    def samples(self):
+        samples = []
+        for key, child in sorted(self._children.items()):
+            try:
+                samples.append(('', key, (), child.get()))
+            except Exception as e:
+                print(f"❌ Metric {self.name} could not be read: {e}")
+        return samples
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        """Record one value (seconds)."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self):
+        """Observe the duration of a with-block."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        """Histogram with cumulative le buckets."""
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        """Record one value in the unlabelled histogram."""
+        self._default().observe(value)
+
+    def time(self):
+        """Observe the duration of a with-block in the unlabelled histogram."""
+        return self._default().time()
+
+    def samples(self):
+        samples = []
+        for key, child in sorted(self._children.items()):
+            with child._lock:
+                counts = list(child.counts)
+                total = child.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                samples.append(('_bucket', key, (('le', _format_value(bound)),), cumulative))
+            samples.append(('_sum', key, (), total))
+            samples.append(('_count', key, (), cumulative))
+        return samples
+
+
+class Registry:
+    def __init__(self):
+        """Collection of metrics rendered together."""
+        self.metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Add a metric."""
+        with self._lock:
+            self.metrics.append(metric)
+
+    def render(self):
+        """Every metric in Prometheus text format."""
+        lines = []
+        for metric in list(self.metrics):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+class RateWindow:
+    def __init__(self, seconds=60.0, maxlen=10000):
+        """Count of marks in the trailing window (e.g. motion events per minute)."""
+        self.seconds = seconds
+        self._marks = collections.deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def mark(self):
+        """Record one occurrence now."""
+        with self._lock:
+            self._marks.append(time.monotonic())
+
+    def count(self):
+        """Occurrences within the window."""
+        cutoff = time.monotonic() - self.seconds
+        with self._lock:
+            while self._marks and self._marks[0] < cutoff:
+                self._marks.popleft()
+            return len(self._marks)
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_SECONDS = Histogram(
+    'scarepi_http_request_duration_seconds', 'Time to build a response, per route.',
+    ('route', 'method'))
+HTTP_REQUESTS = Counter(
+    'scarepi_http_requests_total', 'HTTP responses by route and status.',
+    ('route', 'method', 'status'))
+
+SCARE_STAGE_SECONDS = Histogram(
+    'scarepi_scare_stage_duration_seconds', 'Run time of each full-scare stage.', ('stage',))
+SCARE_STAGE_SKEW_SECONDS = Histogram(
+    'scarepi_scare_stage_skew_seconds', 'How late each stage started against its target.',
+    ('stage',), buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05))
+SCARE_SECONDS = Histogram(
+    'scarepi_scare_duration_seconds', 'Trigger to last stage finished for a full scare.')
+ACTION_SECONDS = Histogram(
+    'scarepi_action_duration_seconds', 'Run time of dispatched hardware actions.', ('action',))
+ACTIONS = Counter(
+    'scarepi_actions_total', 'Hardware action requests by outcome.', ('action', 'status'))
+
+DB_WRITE_SECONDS = Histogram(
+    'scarepi_db_write_duration_seconds', 'SQLite write transaction time.', ('operation',))
+ANALYTICS_EVENTS = Counter(
+    'scarepi_analytics_events_total', 'Analytics events logged.', ('event_type',))
+ANALYTICS_DROPPED = Counter(
+    'scarepi_analytics_dropped_total', 'Analytics events dropped (queue full or write failed).')
+
+MOTION_EVENTS = Counter('scarepi_motion_events_total', 'Accepted motion edges.')
+MOTION_DEBOUNCED = Counter('scarepi_motion_debounced_total', 'Motion edges ignored by debounce.')
+MOTION_WAKE_SECONDS = Histogram(
+    'scarepi_motion_wake_seconds', 'Motion edge to motion loop wake-up.',
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05, 0.1, 0.5))
+MOTION_FILTER_DELAY_SECONDS = Histogram(
+    'scarepi_motion_filter_delay_seconds', 'First high PIR sample to filtered motion edge.',
+    buckets=(0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.25, 0.5, 1.0))
+MOTION_FILTER_REJECTED = Counter(
+    'scarepi_motion_filter_rejected_total', 'PIR bursts the motion filter judged to be noise.')
+MEDIA_JOBS = Counter(
+    'scarepi_media_jobs_total', 'Clip post-processing jobs by outcome.', ('status',))
+MEDIA_JOB_SECONDS = Histogram(
+    'scarepi_media_job_seconds', 'Clip queued to post-processing finished.',
+    buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0))
+
+MOTION_RATE = RateWindow(60.0)
+MOTION_EVENTS_PER_MINUTE = Gauge(
+    'scarepi_motion_events_per_minute', 'Accepted motion edges in the last 60 seconds.')
+MOTION_EVENTS_PER_MINUTE.set_function(MOTION_RATE.count)
+
+
+def install_flask_metrics(app):
+    """Time every request on app and serve the registry at /metrics."""
+    from flask import Response, g, request
+
+    @app.before_request
+    def _start_request_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _observe_request(response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            # Route templates, not raw paths, so label cardinality stays fixed
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            HTTP_REQUEST_SECONDS.labels(route, request.method).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(route, request.method, response.status_code).inc()
+        return response
+
+    def metrics():
+        """Prometheus scrape endpoint."""
+        return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+    app.add_url_rule('/metrics', 'metrics', metrics)
+    return app
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+ScarePi Motion - Event-driven motion sources
+Motion arrives as callbacks (GPIO edge detection on the Pi, a simulated
+source everywhere else) instead of polling GPIO.input every 100 ms.
+"""
+
+import random
+import threading
+import time
+
+from scarepi_metrics import MOTION_DEBOUNCED, MOTION_EVENTS, MOTION_RATE, MOTION_WAKE_SECONDS
+
+
+class MotionSource:
+    def __init__(self, debounce=0.5):
+        """Base motion source; debounce is the minimum gap between reported motions."""
+        self.debounce = debounce
+        self._callbacks = []
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._last_motion = 0.0
+        self._pending_since = None
+        self.stats_data = {
+            'motion_events': 0,
+            'debounced': 0,
+            'last_wake_latency_ms': None
+        }
+
+    def add_callback(self, callback):
+        """Call callback(timestamp) on every accepted motion edge."""
+        self._callbacks.append(callback)
+
+    def start(self):
+        """Begin delivering motion events."""
+        raise NotImplementedError
+
+    def stop(self):
+        """Stop delivering motion events."""
+        raise NotImplementedError
+
+    def is_active(self):
+        """Current raw sensor state, where the source can report it."""
+        return False
+
+    def clear(self):
+        """Forget motion that arrived while nobody was waiting (e.g. during cooldown)."""
+        with self._lock:
+            self._event.clear()
+            self._pending_since = None
+
+    def wait_for_motion(self, timeout=None):
+        """Block until motion arrives; returns False on timeout."""
+        if not self._event.wait(timeout):
+            return False
+        with self._lock:
+            self._event.clear()
+            if self._pending_since is not None:
+                latency = (time.perf_counter() - self._pending_since) * 1000
+                self.stats_data['last_wake_latency_ms'] = round(latency, 3)
+                MOTION_WAKE_SECONDS.observe(latency / 1000)
+            self._pending_since = None
+        return True
+
+    def stats(self):
+        """Motion counters and the last edge-to-wake latency."""
+        with self._lock:
+            return dict(self.stats_data)
+
+    def _emit(self):
+        """Report a motion edge, applying the software debounce."""
+        now = time.perf_counter()
+        with self._lock:
+            if now - self._last_motion < self.debounce:
+                self.stats_data['debounced'] += 1
+                MOTION_DEBOUNCED.inc()
+                return
+            self._last_motion = now
+            self.stats_data['motion_events'] += 1
+            if self._pending_since is None:
+                self._pending_since = now
+            self._event.set()
+        MOTION_EVENTS.inc()
+        MOTION_RATE.mark()
+        for callback in self._callbacks:
+            try:
+                callback(now)
+            except Exception as e:
+                print(f"❌ Motion callback error: {e}")
+
+
+class GPIOMotionSource(MotionSource):
+    def __init__(self, pin, bouncetime=200, debounce=0.5):
+        """PIR sensor on a BOARD-numbered pin using RPi.GPIO edge detection."""
+        super().__init__(debounce)
+        self.pin = pin
+        self.bouncetime = bouncetime
+        self._running = False
+
+    def start(self):
+        """Register a rising-edge interrupt on the sensor pin."""
+        import RPi.GPIO as GPIO
+        if not self._running:
+            GPIO.add_event_detect(self.pin, GPIO.RISING,
+                                  callback=lambda channel: self._emit(),
+                                  bouncetime=self.bouncetime)
+            self._running = True
+
+    def stop(self):
+        """Remove the edge interrupt."""
+        import RPi.GPIO as GPIO
+        if self._running:
+            GPIO.remove_event_detect(self.pin)
+            self._running = False
+
+    def is_active(self):
+        """Read the sensor pin directly."""
+        import RPi.GPIO as GPIO
+        return GPIO.input(self.pin) == 1
+
+
+class FilteredGPIOMotionSource(GPIOMotionSource):
+    def __init__(self, pin, pir_filter, bouncetime=200, debounce=0.5):
+        """GPIO PIR whose rising edge wakes a sampling burst through pir_filter.
+
+        Nothing is polled while the sensor is quiet: the edge interrupt starts
+        sampling every pir_filter.interval seconds, and sampling stops again
+        once the filter has seen a full window with no high samples.
+        """
+        super().__init__(pin, bouncetime, debounce)
+        self.filter = pir_filter
+        self._wake = threading.Event()
+        self._stop_sampling = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Arm the sampler thread and the edge interrupt that wakes it."""
+        import RPi.GPIO as GPIO
+        if not self._running:
+            # Fresh events per sampler: one still winding down from a quick
+            # stop/start can't miss its stop or swallow the new one's edges
+            self._wake = threading.Event()
+            self._stop_sampling = threading.Event()
+            self._thread = threading.Thread(target=self._sample_loop, name='pir-sampler',
+                                            args=(self._wake, self._stop_sampling), daemon=True)
+            self._thread.start()
+            GPIO.add_event_detect(self.pin, GPIO.RISING,
+                                  callback=lambda channel: self._wake.set(),
+                                  bouncetime=self.bouncetime)
+            self._running = True
+
+    def stop(self):
+        """Remove the interrupt and stop sampling."""
+        super().stop()
+        self._stop_sampling.set()
+        self._wake.set()
+
+    def is_active(self):
+        """Filtered motion state."""
+        return self.filter.active
+
+    def stats(self):
+        """Motion counters plus the filter's added delay and rejected bursts."""
+        data = super().stats()
+        data['filter'] = self.filter.stats()
+        return data
+
+    def _sample_loop(self, wake, stop):
+        """Sleep until an edge, then sample through the filter until it goes idle."""
+        import RPi.GPIO as GPIO
+        while not stop.is_set():
+            wake.wait()
+            wake.clear()
+            deadline = time.perf_counter()
+            while not stop.is_set():
+                if self.filter.update(time.perf_counter(), GPIO.input(self.pin)):
+                    self._emit()
+                if self.filter.idle():
+                    break
+                deadline += self.filter.interval
+                time.sleep(max(0.0, deadline - time.perf_counter()))
+
+
+class SimulatedMotionSource(MotionSource):
+    def __init__(self, mean_interval=0.5, debounce=0.5):
+        """Fire motion at random (exponential) intervals for mock and Docker runs."""
+        super().__init__(debounce)
+        self.mean_interval = mean_interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the simulated sensor thread."""
+        if self._thread is None or self._stop.is_set():
+            # A fresh event per thread: one still winding down from a quick
+            # stop/start exits on its own event instead of blocking the restart
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(self._stop,),
+                                            name='simulated-motion', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the simulated sensor thread."""
+        self._stop.set()
+
+    def trigger(self):
+        """Inject a motion edge by hand (tests, demo buttons)."""
+        self._emit()
+
+    def _run(self, stop):
+        """Sleep until the next simulated visitor, then emit an edge."""
+        while not stop.wait(random.expovariate(1.0 / self.mean_interval)):
+            self._emit()
+
+
+class NullMotionSource(MotionSource):
+    def start(self):
+        """No sensor attached: never reports motion."""
+
+    def stop(self):
+        """Nothing to stop."""
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+ScarePi PIR - Windowed filtering of raw PIR samples
+PIR sensors glitch in cold and wind, and a single high sample used to mean
+a full scare cycle. Samples go through a fixed-size array ring buffer and
+only count as motion once enough of the window agrees (majority vote). The
+on/off thresholds give hysteresis and the signal can be required to stay
+high for a minimum dwell. The filter reports how much latency it adds and
+how many bursts it rejected. It can be replayed against recorded traces.
+
+Examples:
+    python scarepi_pir.py synth trace.csv --seconds 600 --visitors 20
+    python scarepi_pir.py replay trace.csv --window 5 --on 3 --off 1
+    python scarepi_pir.py record trace.csv --pin 35 --seconds 300   # on the Pi
+"""
+
+import argparse
+import csv
+import os
+import random
+import threading
+import time
+from array import array
+
+from scarepi_metrics import MOTION_FILTER_DELAY_SECONDS, MOTION_FILTER_REJECTED
+
+PIR_FILTER_ENV = 'SCAREPI_PIR_FILTER'
+# 5 samples 20 ms apart, 4 of them high: spikes up to 3 samples never fire,
+# and motion only ends once at most 1 sample in the window is still high
+DEFAULT_FILTER = {
+    'window': 5,
+    'on': 4,
+    'off': 1,
+    'dwell': 0.0,
+    'interval': 0.02
+}
+TRACE_FIELDS = ('t', 'value', 'visitor')
+
+
+class SampleRing:
+    def __init__(self, size):
+        """The last size (timestamp, 0/1) samples in flat arrays, with a running high count."""
+        self.size = size
+        self.values = array('B', bytes(size))
+        self.times = array('d', [0.0]) * size
+        self.head = 0
+        self.count = 0
+        self.high = 0
+
+    def append(self, timestamp, value):
+        """Add a sample, evicting the oldest once full."""
+        if self.count == self.size:
+            self.high -= self.values[self.head]
+        else:
+            self.count += 1
+        self.values[self.head] = value
+        self.times[self.head] = timestamp
+        self.high += value
+        self.head = (self.head + 1) % self.size
+
+    def first_high_time(self):
+        """Timestamp of the oldest high sample in the window (None if none)."""
+        start = (self.head - self.count) % self.size
+        for offset in range(self.count):
+            index = (start + offset) % self.size
+            if self.values[index]:
+                return self.times[index]
+        return None
+
+    def clear(self):
+        """Forget every sample."""
+        self.head = self.count = self.high = 0
+
+
+class PIRFilter:
+    def __init__(self, window=5, on=4, off=1, dwell=0.0, interval=0.02,
+                 record_metrics=True):
+        """Filter over the last window samples.
+
+        Motion starts once at least on samples are high and has lasted dwell
+        seconds; it ends once at most off are high. on=None means a majority
+        of the window and off=None means on - 1 (plain majority vote, no
+        hysteresis). interval is the sampling period the source should use.
+        """
+        self.window = int(window)
+        self.on = int(on) if on is not None else self.window // 2 + 1
+        self.off = int(off) if off is not None else self.on - 1
+        if not 0 <= self.off < self.on <= self.window:
+            raise ValueError(f'need 0 <= off < on <= window, got off={self.off}, '
+                             f'on={self.on}, window={self.window}')
+        self.dwell = float(dwell)
+        self.interval = float(interval)
+        self.record_metrics = record_metrics
+        self.ring = SampleRing(self.window)
+        self.active = False
+        self._rise_at = None
+        self._candidate_since = None
+        self._burst_open = False
+        self._lock = threading.Lock()
+        self.stats_data = {
+            'samples': 0,
+            'raw_bursts': 0,
+            'edges': 0,
+            'rejected': 0,
+            'last_delay_ms': None,
+            'max_delay_ms': 0.0,
+            'total_delay_ms': 0.0
+        }
+
+    @classmethod
+    def from_spec(cls, spec, **kwargs):
+        """Filter from 'window=5,on=3,off=1,dwell=0.1,interval=0.02' (None for 'off')."""
+        if spec is None:
+            spec = os.environ.get(PIR_FILTER_ENV, '')
+        spec = spec.strip()
+        if spec.lower() in ('off', 'none', '0'):
+            return None
+        options = dict(DEFAULT_FILTER)
+        for part in spec.split(','):
+            if not part.strip():
+                continue
+            name, _, value = part.partition('=')
+            name = name.strip()
+            if name not in options:
+                raise ValueError(f"unknown PIR filter option '{name}'")
+            options[name] = float(value) if name in ('dwell', 'interval') else int(value)
+        return cls(**options, **kwargs)
+
+    def describe(self):
+        """Settings as a spec string."""
+        return (f'window={self.window},on={self.on},off={self.off},'
+                f'dwell={self.dwell:g},interval={self.interval:g}')
+
+    def reset(self):
+        """Drop the window and return to no-motion."""
+        with self._lock:
+            self.ring.clear()
+            self.active = False
+            self._rise_at = self._candidate_since = None
+            self._burst_open = False
+
+    def idle(self):
+        """True when there's no motion and no high sample in a full window."""
+        return not self.active and self.ring.high == 0 and self.ring.count == self.window
+
+    def update(self, timestamp, value):
+        """Feed one sample; returns True on the filtered rising edge."""
+        value = 1 if value else 0
+        with self._lock:
+            if value and self.ring.high == 0 and not self.active:
+                self.stats_data['raw_bursts'] += 1
+                self._burst_open = True
+            self.ring.append(timestamp, value)
+            self.stats_data['samples'] += 1
+            high = self.ring.high
+
+            if self.active:
+                if high <= self.off:
+                    self.active = False
+                return False
+
+            if high >= self.on and self._rise_at is None:
+                self._rise_at = self.ring.first_high_time()
+                self._candidate_since = timestamp
+            elif high <= self.off and self._rise_at is not None:
+                self._rise_at = self._candidate_since = None
+
+            if self._rise_at is not None and timestamp - self._candidate_since >= self.dwell:
+                delay = (timestamp - self._rise_at) * 1000
+                self.active = True
+                self._rise_at = self._candidate_since = None
+                self._burst_open = False
+                self.stats_data['edges'] += 1
+                self.stats_data['last_delay_ms'] = round(delay, 3)
+                self.stats_data['max_delay_ms'] = round(max(self.stats_data['max_delay_ms'], delay), 3)
+                self.stats_data['total_delay_ms'] += delay
+                if self.record_metrics:
+                    MOTION_FILTER_DELAY_SECONDS.observe(delay / 1000)
+                return True
+
+            if high == 0 and self._burst_open:
+                # The window emptied again without ever firing: a glitch
+                self._burst_open = False
+                self.stats_data['rejected'] += 1
+                if self.record_metrics:
+                    MOTION_FILTER_REJECTED.inc()
+            return False
+
+    def stats(self):
+        """Sample/edge counts, rejected bursts and the latency the filter adds."""
+        with self._lock:
+            data = dict(self.stats_data)
+        total = data.pop('total_delay_ms')
+        data['avg_delay_ms'] = round(total / data['edges'], 3) if data['edges'] else None
+        data['rejection_rate'] = (round(data['rejected'] / data['raw_bursts'], 4)
+                                  if data['raw_bursts'] else 0.0)
+        data['settings'] = self.describe()
+        return data
+
+
+def read_trace(path):
+    """[(t, value, visitor or None)] from a CSV trace with a t,value[,visitor] header."""
+    samples = []
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            visitor = row.get('visitor')
+            samples.append((float(row['t']), int(row['value']),
+                            int(visitor) if visitor not in (None, '') else None))
+    return samples
+
+
+def write_trace(path, samples):
+    """Write (t, value, visitor) samples as CSV."""
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(TRACE_FIELDS)
+        for t, value, visitor in samples:
+            writer.writerow((f'{t:.4f}', value, '' if visitor is None else visitor))
+
+
+def synthesize_trace(seconds=600.0, visitors=20, glitch_rate=0.05, glitch_samples=(1, 3),
+                     presence=(2.0, 4.0), dropout=0.02, interval=0.02, seed=None):
+    """Labelled trace: visitors hold the PIR high for a few seconds (with dropouts);
+    glitch_rate short spikes per second arrive at random."""
+    rng = random.Random(seed)
+    count = int(seconds / interval)
+    values = [0] * count
+    labels = [0] * count
+    for _ in range(visitors):
+        start = rng.randrange(count)
+        length = int(rng.uniform(*presence) / interval)
+        for index in range(start, min(count, start + length)):
+            labels[index] = 1
+            values[index] = 0 if rng.random() < dropout else 1
+    for _ in range(int(glitch_rate * seconds)):
+        start = rng.randrange(count)
+        for index in range(start, min(count, start + rng.randint(*glitch_samples))):
+            values[index] = 1
+    return [(index * interval, values[index], labels[index]) for index in range(count)]
+
+
+def _edges(samples, detector, debounce):
+    """Timestamps at which detector(t, value) fired, with the motion debounce applied."""
+    edges = []
+    for t, value, _ in samples:
+        if detector(t, value) and (not edges or t - edges[-1] >= debounce):
+            edges.append(t)
+    return edges
+
+
+def _score(edges, samples, tolerance):
+    """True/false triggers, missed visitors and detection latency against the labels."""
+    visits = []
+    start = None
+    for t, _, visitor in samples:
+        if visitor and start is None:
+            start = t
+        elif not visitor and start is not None:
+            visits.append((start, t))
+            start = None
+    if start is not None:
+        visits.append((start, samples[-1][0]))
+
+    duration_h = (samples[-1][0] - samples[0][0]) / 3600 if samples else 0
+    def matches(edge, visit):
+        return visit[0] - tolerance <= edge <= visit[1] + tolerance
+
+    false_edges = sum(1 for edge in edges if not any(matches(edge, visit) for visit in visits))
+    latencies = []
+    for visit in visits:
+        first = next((edge for edge in edges if matches(edge, visit)), None)
+        if first is not None:
+            latencies.append(max(0.0, first - visit[0]) * 1000)
+    latencies.sort()
+    return {
+        'edges': len(edges),
+        'false_triggers': false_edges,
+        'false_trigger_rate': round(false_edges / len(edges), 4) if edges else 0.0,
+        'false_per_hour': round(false_edges / duration_h, 1) if duration_h else None,
+        'visitors': len(visits),
+        'missed': len(visits) - len(latencies),
+        'median_detect_ms': round(latencies[len(latencies) // 2], 1) if latencies else None,
+        'max_detect_ms': round(latencies[-1], 1) if latencies else None
+    }
+
+
+def replay_trace(samples, pir_filter, debounce=0.5, tolerance=0.5):
+    """Run a trace through a raw single-sample detector and through pir_filter."""
+    previous = [0]
+
+    def raw(t, value):
+        rising = value and not previous[0]
+        previous[0] = value
+        return rising
+
+    raw_edges = _edges(samples, raw, debounce)
+    filtered_edges = _edges(samples, pir_filter.update, debounce)
+    report = {'filter': pir_filter.stats(), 'samples': len(samples)}
+    if any(visitor is not None for _, _, visitor in samples):
+        report['raw'] = _score(raw_edges, samples, tolerance)
+        report['filtered'] = _score(filtered_edges, samples, tolerance)
+    else:
+        report['raw'] = {'edges': len(raw_edges)}
+        report['filtered'] = {'edges': len(filtered_edges)}
+    return report
+
+
+def record_trace(path, pin, seconds, interval=0.02):
+    """Sample a BOARD pin with RPi.GPIO for seconds and save it as an unlabelled trace."""
+    import RPi.GPIO as GPIO
+    GPIO.setmode(GPIO.BOARD)
+    GPIO.setup(pin, GPIO.IN)
+    samples = []
+    started = time.perf_counter()
+    deadline = started
+    try:
+        while deadline - started < seconds:
+            samples.append((deadline - started, GPIO.input(pin), None))
+            deadline += interval
+            time.sleep(max(0.0, deadline - time.perf_counter()))
+    finally:
+        GPIO.cleanup()
+    write_trace(path, samples)
+    return len(samples)
+
+
+def print_replay(report):
+    """Raw vs filtered comparison table."""
+    print(f"\n👁️ {report['samples']} samples, filter {report['filter']['settings']}")
+    keys = [key for key in report['filtered'] if key != 'visitors']
+    print(f"{'':<20}{'raw':>12}{'filtered':>12}")
+    for key in keys:
+        print(f"{key:<20}{str(report['raw'].get(key)):>12}{str(report['filtered'][key]):>12}")
+    if 'visitors' in report['filtered']:
+        print(f"{'visitors':<20}{report['filtered']['visitors']:>24}")
+    stats = report['filter']
+    print(f"\n⏱️ Filter adds {stats['avg_delay_ms']} ms on average ({stats['max_delay_ms']} ms max); "
+          f"rejected {stats['rejected']} of {stats['raw_bursts']} bursts")
+
+
+def main():
+    """Record, synthesize or replay PIR sample traces."""
+    parser = argparse.ArgumentParser(description='ScarePi PIR filter tools')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    replay = sub.add_parser('replay', help='Compare raw and filtered triggers on a trace')
+    replay.add_argument('trace')
+    for name, value in DEFAULT_FILTER.items():
+        if name != 'interval':
+            replay.add_argument(f'--{name}', type=float if name == 'dwell' else int, default=value)
+    replay.add_argument('--debounce', type=float, default=0.5,
+                        help='Minimum gap between reported motions, s')
+    replay.add_argument('--tolerance', type=float, default=0.5,
+                        help='Slack around labelled visits when scoring, s')
+
+    synth = sub.add_parser('synth', help='Write a labelled synthetic trace')
+    synth.add_argument('trace')
+    synth.add_argument('--seconds', type=float, default=600.0)
+    synth.add_argument('--visitors', type=int, default=20)
+    synth.add_argument('--glitch-rate', type=float, default=0.05, help='Glitches per second')
+    synth.add_argument('--interval', type=float, default=DEFAULT_FILTER['interval'])
+    synth.add_argument('--seed', type=int, default=None)
+
+    record = sub.add_parser('record', help='Record raw samples from the PIR (Raspberry Pi)')
+    record.add_argument('trace')
+    record.add_argument('--pin', type=int, default=35)
+    record.add_argument('--seconds', type=float, default=300.0)
+    record.add_argument('--interval', type=float, default=DEFAULT_FILTER['interval'])
+    args = parser.parse_args()
+
+    if args.command == 'replay':
+        samples = read_trace(args.trace)
+        pir_filter = PIRFilter(args.window, args.on, args.off, args.dwell, record_metrics=False)
+        print_replay(replay_trace(samples, pir_filter, args.debounce, args.tolerance))
+    elif args.command == 'synth':
+        samples = synthesize_trace(args.seconds, args.visitors, args.glitch_rate,
+                                   interval=args.interval, seed=args.seed)
+        write_trace(args.trace, samples)
+        print(f"✅ Wrote {len(samples)} samples to {args.trace}")
+    elif args.command == 'record':
+        print(f"📈 Recording pin {args.pin} every {args.interval * 1000:.0f} ms for {args.seconds}s...")
+        count = record_trace(args.trace, args.pin, args.seconds, args.interval)
+        print(f"✅ Wrote {count} samples to {args.trace}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+ScarePi QR - Cached QR code rendering
+The lobby display hits /qr constantly for a payload that almost never
+changes, so rendered PNGs are kept in an LRU cache keyed by payload and style.
+qrcode (and PIL with it) is imported on first render, not at app startup.
+"""
+
+import base64
+import hashlib
+import io
+import os
+from collections import namedtuple
+from functools import lru_cache
+
+QR_FILL_COLOR = 'orange'
+QR_BACK_COLOR = 'black'
+QR_CACHE_SIZE = 32
+PUBLIC_URL_ENV = 'SCAREPI_PUBLIC_URL'
+# ?src= value on the audience URL, logged as a 'qr_viewed' event
+QR_SOURCE_TAG = 'qr'
+
+RenderedQR = namedtuple('RenderedQR', ['png', 'etag', 'base64'])
+
+
+@lru_cache(maxsize=QR_CACHE_SIZE)
+def render_qr_png(data, box_size=10, border=5, fill_color=QR_FILL_COLOR,
+                  back_color=QR_BACK_COLOR):
+    """Render a QR code once and keep the PNG bytes, ETag and base64 form."""
+    # qrcode pulls in PIL; only pay for that once a QR code is actually needed
+    import qrcode
+    qr = qrcode.QRCode(version=1, box_size=box_size, border=border)
+    qr.add_data(data)
+    qr.make(fit=True)
+
+    img = qr.make_image(fill_color=fill_color, back_color=back_color)
+
+    buffer = io.BytesIO()
+    img.save(buffer, format='PNG')
+    png = buffer.getvalue()
+
+    etag = hashlib.sha256(png).hexdigest()[:32]
+    return RenderedQR(png, etag, base64.b64encode(png).decode())
+
+
+def audience_url(base_url):
+    """The payload every ScarePi QR code points at (tagged so scans can be counted)."""
+    return f"{base_url.rstrip('/')}/audience?src={QR_SOURCE_TAG}"
+
+
+def prewarm_qr_cache(base_urls=None):
+    """Render QR codes for the expected public URLs before the first request."""
+    if base_urls is None:
+        configured = os.environ.get(PUBLIC_URL_ENV, '')
+        base_urls = [url for url in configured.split(',') if url.strip()]
+        base_urls.append('http://localhost:5001')
+    for base_url in base_urls:
+        render_qr_png(audience_url(base_url.strip()))
+    return render_qr_png.cache_info()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+ScarePi Rate Limiting - Token-bucket admission control for write endpoints
+Each client IP gets its own bucket and all clients share a global one, so a
+retrying phone or a runaway script is turned away with 429 + Retry-After
+before it reaches SQLite. State is a small in-memory dict per process, so
+with several gunicorn workers each one has its own buckets and the limits
+a client actually sees are multiplied by SCAREPI_WORKERS.
+"""
+
+import collections
+import functools
+import math
+import os
+import threading
+import time
+
+from scarepi_metrics import Counter
+
+RATE_LIMITED = Counter(
+    'scarepi_rate_limited_total', 'Requests rejected by rate limiting.', ('limiter', 'scope'))
+
+# name: (client rate/s, client burst, global rate/s, global burst)
+DEFAULT_LIMITS = {
+    'join': (0.2, 5, 20.0, 50),
+    'write': (2.0, 20, 50.0, 100)
+}
+TRUST_PROXY_ENV = 'SCAREPI_TRUST_PROXY'
+
+
+class TokenBucket:
+    def __init__(self, rate, burst, now=None):
+        """Bucket refilling rate tokens per second up to burst tokens."""
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic() if now is None else now
+
+    def refill(self, now):
+        """Add the tokens earned since the last update."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self):
+        """Seconds until one token is available (0 if one is available now)."""
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else math.inf
+
+
+class RateLimiter:
+    def __init__(self, name, client_rate, client_burst, global_rate, global_burst,
+                 max_clients=10000):
+        """Per-client and global token buckets; a request needs a token from both."""
+        self.name = name
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.max_clients = max_clients
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self._clients = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.stats_data = {'allowed': 0, 'rejected_client': 0, 'rejected_global': 0}
+
+    @classmethod
+    def from_env(cls, name):
+        """Limits from SCAREPI_<NAME>_RATE_LIMIT='client_rate,client_burst,global_rate,global_burst'."""
+        limits = DEFAULT_LIMITS[name]
+        configured = os.environ.get(f'SCAREPI_{name.upper()}_RATE_LIMIT')
+        if configured:
+            try:
+                limits = tuple(float(value) for value in configured.split(','))
+                if len(limits) != 4:
+                    raise ValueError('expected 4 comma-separated numbers')
+            except ValueError as e:
+                print(f"❌ Ignoring bad SCAREPI_{name.upper()}_RATE_LIMIT: {e}")
+                limits = DEFAULT_LIMITS[name]
+        return cls(name, *limits)
+
+    def _client_bucket(self, client, now):
+        """The client's bucket, evicting the least recently seen client when full."""
+        bucket = self._clients.get(client)
+        if bucket is None:
+            if len(self._clients) >= self.max_clients:
+                self._clients.popitem(last=False)
+            bucket = self._clients[client] = TokenBucket(self.client_rate, self.client_burst, now)
+        else:
+            self._clients.move_to_end(client)
+        return bucket
+
+    def check(self, client):
+        """Take a token for client; returns (allowed, retry_after_seconds)."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._client_bucket(client, now)
+            bucket.refill(now)
+            self.global_bucket.refill(now)
+            client_wait = bucket.wait_time()
+            global_wait = self.global_bucket.wait_time()
+            if client_wait or global_wait:
+                scope = 'client' if client_wait >= global_wait else 'global'
+                self.stats_data[f'rejected_{scope}'] += 1
+                retry_after = max(client_wait, global_wait)
+            else:
+                bucket.tokens -= 1
+                self.global_bucket.tokens -= 1
+                self.stats_data['allowed'] += 1
+                return True, 0.0
+        RATE_LIMITED.labels(self.name, scope).inc()
+        return False, retry_after
+
+    def stats(self):
+        """Allowed/rejected counts and tracked clients."""
+        with self._lock:
+            data = dict(self.stats_data)
+            data['tracked_clients'] = len(self._clients)
+        data['rejected'] = data['rejected_client'] + data['rejected_global']
+        return data
+
+
+def trusted_proxies():
+    """Number of reverse proxies in front of the app, from $SCAREPI_TRUST_PROXY (0 = none)."""
+    value = os.environ.get(TRUST_PROXY_ENV, '').strip()
+    if not value:
+        return 0
+    try:
+        return max(0, int(value))
+    except ValueError:
+        return 1
+
+
+def client_address(request):
+    """Client IP, honouring X-Forwarded-For only when SCAREPI_TRUST_PROXY is set.
+
+    Only the entries our own proxies appended are trusted: with N proxies
+    that is the N-th from the right. Anything to its left came from the
+    client and could be made up.
+    """
+    proxies = trusted_proxies()
+    if proxies:
+        forwarded = [entry.strip() for entry in request.headers.get('X-Forwarded-For', '').split(',')
+                     if entry.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.remote_addr or 'unknown'
+
+
+def rate_limited(limiter):
+    """Flask view decorator answering 429 with Retry-After once limiter says no."""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            from flask import jsonify, request
+            allowed, retry_after = limiter.check(client_address(request))
+            if allowed:
+                return view(*args, **kwargs)
+            seconds = max(1, math.ceil(retry_after)) if math.isfinite(retry_after) else 60
+            response = jsonify({
+                'error': 'rate_limited',
+                'message': f'Too many requests - try again in {seconds}s 👻',
+                'retry_after': seconds,
+                'success': False
+            })
+            response.status_code = 429
+            response.headers['Retry-After'] = str(seconds)
+            return response
+        return wrapper
+    return decorator
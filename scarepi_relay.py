@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+ScarePi Relay - Prop relay outputs
+A relay closes for the length of a scare and opens again. The GPIO relay
+drives a BOARD-numbered pin through RPi.GPIO (imported only when used); the
+simulated relay just keeps time so mock and Docker scares last as long as
+real ones. pulse_async() holds the relay on an asyncio timer instead of a
+sleeping thread.
+"""
+
+import asyncio
+import threading
+import time
+
+
+class Relay:
+    def __init__(self):
+        """Base relay; close() energizes the prop, open() releases it."""
+        self._lock = threading.Lock()
+        self.stats_data = {'pulses': 0, 'last_pulse_s': None}
+
+    def close(self):
+        """Close the relay (prop on)."""
+        raise NotImplementedError
+
+    def open(self):
+        """Open the relay (prop off)."""
+        raise NotImplementedError
+
+    def pulse(self, duration):
+        """Close the relay for duration seconds, always opening it again."""
+        self.close()
+        try:
+            time.sleep(duration)
+        finally:
+            self.open()
+        self.record_pulse(duration)
+
+    async def pulse_async(self, duration):
+        """pulse() as a coroutine: the loop keeps running while the prop is held."""
+        self.close()
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            self.open()
+        self.record_pulse(duration)
+
+    def record_pulse(self, duration):
+        """Count a close/open cycle timed by the caller (e.g. the zone loop)."""
+        with self._lock:
+            self.stats_data['pulses'] += 1
+            self.stats_data['last_pulse_s'] = duration
+
+    def shutdown(self):
+        """Leave the relay open and release the output."""
+        self.open()
+
+    def stats(self):
+        """Pulse counters."""
+        with self._lock:
+            return dict(self.stats_data)
+
+
+class GPIORelay(Relay):
+    def __init__(self, pin, active_low=True):
+        """Relay module on a BOARD-numbered pin; most boards close on LOW."""
+        super().__init__()
+        import RPi.GPIO as GPIO
+        self.GPIO = GPIO
+        self.pin = pin
+        self.active_low = active_low
+        GPIO.setup(pin, GPIO.OUT)
+        self.open()  # Start with relay open
+
+    def close(self):
+        self.GPIO.output(self.pin, self.GPIO.LOW if self.active_low else self.GPIO.HIGH)
+
+    def open(self):
+        self.GPIO.output(self.pin, self.GPIO.HIGH if self.active_low else self.GPIO.LOW)
+
+
+class SimulatedRelay(Relay):
+    def __init__(self):
+        """Relay stand-in that only tracks whether it is closed."""
+        super().__init__()
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+    def open(self):
+        self.closed = False
+
+
+class NullRelay(Relay):
+    def pulse(self, duration):
+        """No prop attached: return straight away."""
+
+    async def pulse_async(self, duration):
+        """No prop attached: return straight away."""
+
+    def close(self):
+        pass
+
+    def open(self):
+        pass
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+ScarePi Rollups - Time-series reads from the analytics rollup tables
+Charts and the timeseries API read pre-aggregated minute/hour/day counts
+(kept current by triggers, see scarepi_db.py) instead of scanning
+show_analytics.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from scarepi_db import ROLLUP_GRANULARITIES
+
+BUCKET_FORMAT = '%Y-%m-%d %H:%M:%S'
+GRANULARITY_STEPS = {
+    'minute': timedelta(minutes=1),
+    'hour': timedelta(hours=1)
+}
+# Range returned when the caller doesn't give one
+DEFAULT_WINDOWS = {
+    'minute': timedelta(hours=1),
+    'hour': timedelta(hours=24),
+    'day': timedelta(days=30)
+}
+MAX_POINTS = 2000
+# Minute and hour buckets of any step are aligned to this
+BUCKET_EPOCH = datetime(1970, 1, 1)
+
+
+def _parse_time(value):
+    """Parse an ISO-8601 time as naive UTC (naive input is taken to be UTC already)."""
+    parsed = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _floor(moment, granularity, step):
+    """Start of the (step-wide) bucket containing moment.
+
+    Buckets are counted from a fixed epoch rather than from midnight, so a
+    step that doesn't divide the day (e.g. 5 hours) still gives one
+    unbroken grid across midnight.
+    """
+    if granularity == 'day':
+        day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+        return day - timedelta(days=(day.toordinal() % step))
+    width = GRANULARITY_STEPS[granularity] * step
+    return BUCKET_EPOCH + ((moment - BUCKET_EPOCH) // width) * width
+
+
+def _advance(moment, granularity, step):
+    """Start of the next bucket."""
+    if granularity == 'day':
+        return moment + timedelta(days=step)
+    return moment + GRANULARITY_STEPS[granularity] * step
+
+
+def parse_timeseries_args(args):
+    """Validate query parameters (granularity, step, since, until, event_type)."""
+    granularity = args.get('granularity', 'hour')
+    if granularity not in ROLLUP_GRANULARITIES:
+        raise ValueError(f"granularity must be one of {', '.join(ROLLUP_GRANULARITIES)}")
+    step = int(args.get('step', 1))
+    if step < 1:
+        raise ValueError('step must be a positive number of buckets')
+    until = _parse_time(args['until']) if args.get('until') else datetime.utcnow()
+    since = _parse_time(args['since']) if args.get('since') else until - DEFAULT_WINDOWS[granularity]
+    if since > until:
+        raise ValueError('since must be before until')
+    event_types = args.getlist('event_type') if hasattr(args, 'getlist') else args.get('event_type')
+    return {
+        'granularity': granularity,
+        'step': step,
+        'since': since,
+        'until': until,
+        'event_types': [event_type for event_type in (event_types or []) if event_type]
+    }
+
+
+def read_timeseries(db, granularity='hour', since=None, until=None, event_types=None, step=1):
+    """Zero-filled counts per event_type between since and until (naive UTC).
+
+    step merges consecutive buckets, e.g. granularity='minute', step=15.
+    """
+    until = until or datetime.utcnow()
+    since = since or until - DEFAULT_WINDOWS[granularity]
+    start = _floor(since, granularity, step)
+    end = _floor(until, granularity, step)
+
+    points = (end - start) // (_advance(start, granularity, step) - start) + 1
+    if points > MAX_POINTS:
+        raise ValueError(f'range covers {points} buckets, the limit is {MAX_POINTS}')
+    labels = []
+    moment = start
+    while moment <= end:
+        labels.append(moment)
+        moment = _advance(moment, granularity, step)
+    index = {label: position for position, label in enumerate(labels)}
+
+    sql = '''
+        SELECT bucket, event_type, count FROM analytics_rollups
+        WHERE granularity = ? AND bucket >= ? AND bucket < ?
+    '''
+    params = [granularity, start.strftime(BUCKET_FORMAT),
+              _advance(end, granularity, step).strftime(BUCKET_FORMAT)]
+    if event_types:
+        sql += f" AND event_type IN ({','.join('?' for _ in event_types)})"
+        params.extend(event_types)
+
+    series = {event_type: [0] * len(labels) for event_type in (event_types or [])}
+    for bucket, event_type, count in db.query_all(sql, params):
+        position = index[_floor(datetime.strptime(bucket, BUCKET_FORMAT), granularity, step)]
+        series.setdefault(event_type, [0] * len(labels))[position] += count
+
+    return {
+        'granularity': granularity,
+        'step': step,
+        'since': start.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'until': until.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'buckets': [label.strftime('%Y-%m-%dT%H:%M:%SZ') for label in labels],
+        'series': series,
+        'totals': {event_type: sum(counts) for event_type, counts in series.items()}
+    }
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+ScarePi Sound - Preloaded sound bank
+Decodes every scare clip once at startup, opens the mixer with a small
+buffer and plays on dedicated channels, so a scare doesn't wait on disk
+reads, OGG decoding or a large output buffer.
+"""
+
+import glob
+import os
+import random
+import threading
+import time
+
+SOUNDS_ENV = 'SCAREPI_SOUNDS'
+SOUNDS_DIR = 'sounds'
+DEFAULT_SOUND = 'scary_sound.ogg'
+
+
+def configured_sound_files():
+    """Clips from $SCAREPI_SOUNDS, else sounds/*.ogg|wav, else scary_sound.ogg."""
+    configured = os.environ.get(SOUNDS_ENV)
+    if configured:
+        return [path.strip() for path in configured.split(',') if path.strip()]
+    files = sorted(glob.glob(os.path.join(SOUNDS_DIR, '*.ogg')) +
+                   glob.glob(os.path.join(SOUNDS_DIR, '*.wav')))
+    return files or [DEFAULT_SOUND]
+
+
+class SoundBank:
+    def __init__(self, sound_files, frequency=44100, buffer=512, channels=4,
+                 selection='random', volume=1.0):
+        """Sound bank; selection is 'random' (no immediate repeats) or 'round_robin'."""
+        self.sound_files = list(sound_files)
+        self.frequency = frequency
+        self.buffer = buffer
+        self.channel_count = channels
+        self.selection = selection
+        self.volume = volume
+        self.sounds = {}
+        self.channels = []
+        self._next_clip = 0
+        self._next_channel = 0
+        self._last_clip = None
+        self._lock = threading.Lock()
+        self.stats_data = {
+            'plays': 0,
+            'failed': 0,
+            'last_latency_ms': None,
+            'max_latency_ms': 0.0,
+            'total_latency_ms': 0.0
+        }
+
+    def start(self):
+        """Open the mixer with a low-latency buffer and decode every clip."""
+        import pygame
+        pygame.mixer.pre_init(self.frequency, -16, 2, self.buffer)
+        pygame.mixer.init()
+        pygame.mixer.set_num_channels(self.channel_count)
+        # Keep our channels away from anything else using pygame.mixer
+        pygame.mixer.set_reserved(self.channel_count)
+        self.channels = [pygame.mixer.Channel(i) for i in range(self.channel_count)]
+        for path in self.sound_files:
+            self.load(path)
+        print(f"🔊 Sound bank ready: {len(self.sounds)} clip(s), "
+              f"{self.buffer_latency_ms():.1f} ms output buffer")
+        return self
+
+    def load(self, path):
+        """Decode a clip into memory; returns False if it can't be loaded."""
+        import pygame
+        try:
+            sound = pygame.mixer.Sound(path)
+        except (pygame.error, FileNotFoundError) as e:
+            print(f"❌ Could not load sound file {path}: {e}")
+            print("💡 Make sure you have a scary sound file in OGG format")
+            return False
+        sound.set_volume(self.volume)
+        with self._lock:
+            self.sounds[path] = sound
+        return True
+
+    def preload(self, names):
+        """Decode extra clips (e.g. zone sounds) now rather than on their first play.
+
+        They can be played by name but don't join the random/round-robin rotation.
+        """
+        for name in names:
+            if name not in self.sounds:
+                self.load(name)
+
+    def buffer_latency_ms(self):
+        """Latency added by the mixer's output buffer."""
+        return self.buffer / self.frequency * 1000
+
+    def _rotation(self):
+        """Loaded clips that play when none is named (lock held)."""
+        return [name for name in self.sound_files if name in self.sounds]
+
+    def _pick_clip(self):
+        """Choose the next clip according to the selection mode."""
+        names = self._rotation()
+        if self.selection == 'round_robin':
+            name = names[self._next_clip % len(names)]
+            self._next_clip += 1
+            return name
+        choices = [name for name in names if name != self._last_clip] or names
+        return random.choice(choices)
+
+    def _pick_channel(self):
+        """Next idle dedicated channel, or the least recently started one (None without channels)."""
+        if not self.channels:
+            return None
+        for offset in range(len(self.channels)):
+            index = (self._next_channel + offset) % len(self.channels)
+            if not self.channels[index].get_busy():
+                break
+        else:
+            index = self._next_channel % len(self.channels)
+        self._next_channel = index + 1
+        return self.channels[index]
+
+    def play(self, name=None):
+        """Play a clip (or pick one); returns the clip name, or None if nothing played."""
+        requested = time.perf_counter()
+        if name is not None and name not in self.sounds:
+            # Not preloaded: decoding here is the slow path preload() avoids
+            self.load(name)
+        with self._lock:
+            playable = name in self.sounds if name is not None else bool(self._rotation())
+            channel = self._pick_channel() if playable else None
+            if channel is None:
+                self.stats_data['failed'] += 1
+                return None
+            clip = name or self._pick_clip()
+            self._last_clip = clip
+            channel.play(self.sounds[clip])
+            # Time to hand the clip to the mixer plus the buffer it must drain through
+            latency = (time.perf_counter() - requested) * 1000 + self.buffer_latency_ms()
+            self.stats_data['plays'] += 1
+            self.stats_data['last_latency_ms'] = round(latency, 3)
+            self.stats_data['max_latency_ms'] = round(max(self.stats_data['max_latency_ms'], latency), 3)
+            self.stats_data['total_latency_ms'] += latency
+        return clip
+
+    def stats(self):
+        """Play counts and trigger-to-audio latency."""
+        with self._lock:
+            data = dict(self.stats_data)
+        total = data.pop('total_latency_ms')
+        data['avg_latency_ms'] = round(total / data['plays'], 3) if data['plays'] else None
+        data['buffer_latency_ms'] = round(self.buffer_latency_ms(), 3)
+        data['clips'] = list(self.sounds)
+        return data
+
+    def stop(self):
+        """Stop playback and close the mixer."""
+        import pygame
+        pygame.mixer.quit()
+
+
+class SimulatedSoundBank(SoundBank):
+    def __init__(self, sound_files, selection='random', **kwargs):
+        """Sound bank stand-in: picks clips the same way but plays nothing."""
+        super().__init__(sound_files, selection=selection, **kwargs)
+
+    def start(self):
+        """Register the clip names without touching pygame."""
+        self.sounds = {path: None for path in self.sound_files}
+        return self
+
+    def load(self, path):
+        """Register a clip name; nothing to decode."""
+        with self._lock:
+            self.sounds[path] = None
+        return True
+
+    def play(self, name=None):
+        """Pick a clip; returns at once, like the mixer does while a clip plays."""
+        with self._lock:
+            clip = name or (self._pick_clip() if self._rotation() else None)
+            self._last_clip = clip
+            self.stats_data['plays'] += 1
+            self.stats_data['last_latency_ms'] = 0.0
+        return clip
+
+    def buffer_latency_ms(self):
+        return 0.0
+
+    def stop(self):
+        """Nothing to close."""
+
+
+class NullSoundBank(SimulatedSoundBank):
+    def __init__(self, sound_files=(), **kwargs):
+        """No audio output: plays return immediately with nothing played."""
+        super().__init__(sound_files, **kwargs)
+
+    def play(self, name=None):
+        return None
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+ScarePi State - Show state shared between web worker processes
+Show/motion flags, controller commands and live events live in the SQLite
+database instead of module globals, and one elected controller process owns
+the motion loop and hardware.
+"""
+
+import json
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, every process acts as the controller
+    fcntl = None
+
+EVENT_FEED_KEEP = 1000
+
+
+class SharedState:
+    def __init__(self, db):
+        """Key/value show state, command queue and event feed in the show database."""
+        self.db = db
+        self.origin = os.getpid()
+
+    def get(self, key, default=None):
+        """Read one state value."""
+        row = self.db.query_one('SELECT value FROM show_state WHERE key = ?', (key,))
+        return json.loads(row[0]) if row else default
+
+    def set(self, key, value):
+        """Write one state value."""
+        self.db.execute('''
+            INSERT INTO show_state (key, value, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+        ''', (key, json.dumps(value, default=str)))
+
+    def update(self, **values):
+        """Write several state values in one transaction."""
+        with self.db.transaction() as cursor:
+            cursor.executemany('''
+                INSERT INTO show_state (key, value, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+            ''', [(key, json.dumps(value, default=str)) for key, value in values.items()])
+
+    def merge(self, key, values):
+        """Merge a dict into an object value atomically (JSON merge patch); returns the result."""
+        with self.db.transaction() as cursor:
+            cursor.execute('''
+                INSERT INTO show_state (key, value, updated_at) VALUES (?, json_patch('{}', ?), CURRENT_TIMESTAMP)
+                ON CONFLICT(key) DO UPDATE SET
+                    value = json_patch(value, excluded.value),
+                    updated_at = excluded.updated_at
+            ''', (key, json.dumps(values, default=str)))
+            cursor.execute('SELECT value FROM show_state WHERE key = ?', (key,))
+            return json.loads(cursor.fetchone()[0])
+
+    def toggle(self, key):
+        """Flip a boolean value atomically; returns the new value."""
+        with self.db.transaction() as cursor:
+            # Write first so the transaction holds the lock before reading back
+            cursor.execute('''
+                INSERT INTO show_state (key, value, updated_at) VALUES (?, 'true', CURRENT_TIMESTAMP)
+                ON CONFLICT(key) DO UPDATE SET
+                    value = CASE value WHEN 'true' THEN 'false' ELSE 'true' END,
+                    updated_at = excluded.updated_at
+            ''', (key,))
+            cursor.execute('SELECT value FROM show_state WHERE key = ?', (key,))
+            return json.loads(cursor.fetchone()[0])
+
+    def snapshot(self):
+        """All state values as a dict."""
+        return {key: json.loads(value)
+                for key, value in self.db.query_all('SELECT key, value FROM show_state')}
+
+    def enqueue_command(self, name):
+        """Ask the controller process to run a hardware action."""
+        self.db.execute('INSERT INTO controller_commands (name) VALUES (?)', (name,))
+
+    def pending_commands(self):
+        """Number of commands waiting for the controller."""
+        return self.db.query_one('SELECT COUNT(*) FROM controller_commands')[0]
+
+    def claim_commands(self):
+        """Take every waiting command (controller only)."""
+        with self.db.transaction() as cursor:
+            cursor.execute('SELECT id, name FROM controller_commands ORDER BY id')
+            rows = cursor.fetchall()
+            if rows:
+                cursor.execute('DELETE FROM controller_commands WHERE id <= ?', (rows[-1][0],))
+        return [name for _, name in rows]
+
+    def append_event(self, event, data):
+        """Record a live event so other workers can relay it to their subscribers."""
+        self.db.execute('INSERT INTO event_feed (origin, event, data) VALUES (?, ?, ?)',
+                        (self.origin, event, json.dumps(data, default=str)))
+
+    def latest_event_id(self):
+        """Id of the newest event in the feed."""
+        return self.db.query_one('SELECT COALESCE(MAX(id), 0) FROM event_feed')[0]
+
+    def events_since(self, last_id):
+        """Events from other processes newer than last_id, as (id, event, data),
+        plus the new last_id."""
+        rows = self.db.query_all('''
+            SELECT id, origin, event, data FROM event_feed WHERE id > ? ORDER BY id
+        ''', (last_id,))
+        relayed = [(row_id, event, json.loads(data)) for row_id, origin, event, data in rows
+                   if origin != self.origin]
+        return relayed, (rows[-1][0] if rows else last_id)
+
+    def prune_events(self, keep=EVENT_FEED_KEEP):
+        """Drop all but the newest keep events."""
+        self.db.execute('DELETE FROM event_feed WHERE id <= (SELECT MAX(id) FROM event_feed) - ?',
+                        (keep,))
+
+
+def reset_show_state(state):
+    """Start a fresh server with the show stopped and no stale commands."""
+    state.update(show_active=False, motion_enabled=False, show_start_time=None)
+    state.claim_commands()
+
+
+class ControllerElection:
+    def __init__(self, lock_path):
+        """Elect a single hardware controller process with an exclusive file lock."""
+        self.lock_path = lock_path
+        self._file = None
+
+    @property
+    def is_leader(self):
+        """True while this process holds the controller lock."""
+        return self._file is not None
+
+    def try_acquire(self):
+        """Try to become the controller without blocking."""
+        if self._file is not None:
+            return True
+        if fcntl is None:
+            self._file = True
+            return True
+        handle = open(self.lock_path, 'a+')
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        handle.seek(0)
+        handle.truncate()
+        handle.write(str(os.getpid()))
+        handle.flush()
+        self._file = handle
+        return True
+
+    def release(self):
+        """Give up the controller role."""
+        if self._file not in (None, True):
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+        self._file = None
+
+
+class StateSync:
+    def __init__(self, state, election, broadcaster, on_tick=None, interval=0.25):
+        """Per-worker thread: contests the election, relays other workers' events
+        and calls on_tick(is_leader) so the app can reconcile hardware."""
+        self.state = state
+        self.election = election
+        self.broadcaster = broadcaster
+        self.on_tick = on_tick
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_event_id = 0
+        self._last_prune = 0.0
+
+    def start(self):
+        """Start syncing in the background."""
+        self._last_event_id = self.state.latest_event_id()
+        self.election.try_acquire()
+        self._thread = threading.Thread(target=self._run, name='state-sync', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop syncing and release the controller role."""
+        self._stop.set()
+        self.election.release()
+
+    def _run(self):
+        """Poll the shared state until stopped."""
+        while not self._stop.wait(self.interval):
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"❌ State sync error: {e}")
+
+    def tick(self):
+        """One sync pass."""
+        leader = self.election.try_acquire()
+        relayed, self._last_event_id = self.state.events_since(self._last_event_id)
+        for _, event, data in relayed:
+            self.broadcaster.publish(event, data)
+        if self.on_tick:
+            self.on_tick(leader)
+        if leader and time.monotonic() - self._last_prune > 60:
+            self.state.prune_events()
+            self._last_prune = time.monotonic()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+ScarePi Timeline - Concurrent scare sequence executor
+Starts camera, relay and audio at configurable offsets from one shared
+trigger time instead of running them back to back, and records how far
+each stage actually started from its target. Stages are coroutines on the
+scare loop (see scarepi_async), not a thread each.
+"""
+
+import asyncio
+import os
+import time
+
+from scarepi_async import call_action, sleep_until
+from scarepi_metrics import SCARE_SECONDS, SCARE_STAGE_SECONDS, SCARE_STAGE_SKEW_SECONDS
+
+# Offsets in seconds from the trigger; everything fires together by default
+DEFAULT_SCARE_OFFSETS = {
+    'record': 0.0,
+    'prop': 0.0,
+    'sound': 0.0
+}
+SCARE_OFFSETS_ENV = 'SCAREPI_SCARE_OFFSETS'
+
+# Time given to stages to reach their start line
+START_LEAD = 0.005
+
+
+def parse_offsets(text):
+    """Parse 'record=0,prop=0.05,sound=0' into a dict of floats."""
+    offsets = {}
+    for part in (text or '').split(','):
+        if '=' not in part:
+            continue
+        name, value = part.split('=', 1)
+        offsets[name.strip()] = float(value)
+    return offsets
+
+
+def configured_offsets():
+    """Default offsets overridden by $SCAREPI_SCARE_OFFSETS."""
+    offsets = dict(DEFAULT_SCARE_OFFSETS)
+    try:
+        offsets.update(parse_offsets(os.environ.get(SCARE_OFFSETS_ENV)))
+    except ValueError as e:
+        print(f"❌ Ignoring bad {SCARE_OFFSETS_ENV}: {e}")
+    return offsets
+
+
+class ScareTimeline:
+    def __init__(self):
+        """Empty timeline; add stages with add()."""
+        self.stages = []
+
+    def add(self, name, action, offset=0.0):
+        """Schedule action() (plain or coroutine) to start offset seconds after the trigger."""
+        self.stages.append((name, action, offset))
+        return self
+
+    async def run(self):
+        """Run every stage concurrently on one clock; returns the timing report."""
+        trigger = time.perf_counter() + START_LEAD
+        results = {}
+
+        async def run_stage(name, action, offset):
+            target = trigger + offset
+            await sleep_until(target)
+            started = time.perf_counter()
+            result = {
+                'offset_ms': round(offset * 1000, 3),
+                'skew_ms': round((started - target) * 1000, 3),
+                'error': None
+            }
+            try:
+                await call_action(action)
+            except Exception as e:
+                result['error'] = str(e)
+                print(f"❌ Scare stage '{name}' failed: {e}")
+            result['duration_ms'] = round((time.perf_counter() - started) * 1000, 3)
+            results[name] = result
+
+        await asyncio.gather(*(run_stage(name, action, offset)
+                               for name, action, offset in self.stages))
+
+        total = time.perf_counter() - trigger
+        for name, stage in results.items():
+            SCARE_STAGE_SECONDS.labels(name).observe(stage['duration_ms'] / 1000)
+            SCARE_STAGE_SKEW_SECONDS.labels(name).observe(max(stage['skew_ms'], 0.0) / 1000)
+        SCARE_SECONDS.observe(total)
+
+        skews = [stage['skew_ms'] for stage in results.values()]
+        return {
+            'stages': results,
+            'max_skew_ms': max(skews) if skews else 0.0,
+            'total_ms': round(total * 1000, 3)
+        }
+
+
+def build_scare_timeline(controller, offsets=None):
+    """Timeline for the full scare: camera, prop relay and sound."""
+    offsets = offsets or configured_offsets()
+    return (ScareTimeline()
+            .add('record', controller.record_scare, offsets.get('record', 0.0))
+            .add('prop', controller.trigger_prop_async, offsets.get('prop', 0.0))
+            .add('sound', controller.play_scary_sound, offsets.get('sound', 0.0)))
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+ScarePi Zones - Many sensor -> prop stations on one event loop
+Each zone maps a motion sensor to a relay prop, a sound and the camera, with
+its own enable flag, cooldown and stats. Motion edges from every zone land
+on the scare loop (scarepi_async), where each scare is a coroutine running
+its stages at their offsets. No thread sleeps through a prop cycle.
+
+Zones come from $SCAREPI_ZONES (a JSON file path or inline JSON) or
+zones.json; without either, the controller's own sensor and relay are
+one zone called 'main'.
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+from scarepi_actions import QUEUED
+from scarepi_async import ControllerLoop
+from scarepi_core import create_backend
+from scarepi_metrics import MOTION_WAKE_SECONDS
+from scarepi_timeline import ScareTimeline, configured_offsets
+
+ZONES_ENV = 'SCAREPI_ZONES'
+ZONES_FILE = 'zones.json'
+DEFAULT_ZONE = {
+    'enabled': True,
+    'prop_duration': 2.0,
+    'cooldown': 5.0,
+    'sound': None,      # clip name, None to let the sound bank pick, False for silence
+    'record': True
+}
+# Settings that can be changed at runtime through the API
+ZONE_SETTINGS = ('enabled', 'cooldown', 'prop_duration')
+
+
+class Zone:
+    def __init__(self, name, motion_pin, relay_pin, enabled=True, prop_duration=2.0,
+                 cooldown=5.0, sound=None, record=True):
+        """One sensor -> prop station."""
+        self.name = name
+        self.motion_pin = motion_pin
+        self.relay_pin = relay_pin
+        self.enabled = bool(enabled)
+        self.prop_duration = float(prop_duration)
+        self.cooldown = float(cooldown)
+        self.sound = sound
+        self.record = bool(record)
+        self.motion_source = None
+        self.relay = None
+        self.busy = False
+        self.cooldown_until = 0.0
+        # The controller's own prop keeps the manual API's 'prop' actuator name
+        self.actuators = (f'prop:{name}',)
+        self.stats_data = {
+            'motion_events': 0,
+            'scares': 0,
+            'skipped_disabled': 0,
+            'skipped_cooldown': 0,
+            'skipped_busy': 0,
+            'last_scare': None,
+            'last_timing': None
+        }
+
+    def status(self, armed):
+        """Settings, live state and counters for the API."""
+        return {
+            'name': self.name,
+            'enabled': self.enabled,
+            'armed': armed and self.enabled,
+            'busy': self.busy,
+            'motion_pin': self.motion_pin,
+            'relay_pin': self.relay_pin,
+            'prop_duration': self.prop_duration,
+            'cooldown': self.cooldown,
+            'cooldown_remaining': round(max(0.0, self.cooldown_until - time.perf_counter()), 3),
+            'sound': self.sound,
+            'record': self.record,
+            'relay': self.relay.stats() if self.relay else None,
+            'stats': dict(self.stats_data)
+        }
+
+
+def load_zone_config(source=None):
+    """Zone dicts from source, $SCAREPI_ZONES or zones.json; [] when none are configured."""
+    source = source if source is not None else os.environ.get(ZONES_ENV)
+    if source is None and os.path.exists(ZONES_FILE):
+        source = ZONES_FILE
+    if not source:
+        return []
+    if isinstance(source, (list, dict)):
+        config = source
+    elif source.lstrip().startswith(('[', '{')):
+        config = json.loads(source)
+    else:
+        with open(source) as f:
+            config = json.load(f)
+    zones = config.get('zones', []) if isinstance(config, dict) else config
+    names = [zone.get('name') for zone in zones]
+    if not all(names) or len(set(names)) != len(names):
+        raise ValueError('every zone needs a unique name')
+    return zones
+
+
+class ZoneManager:
+    def __init__(self, controller, zones, loop=None, dispatcher=None, on_motion=None,
+                 on_scare=None, offsets=None):
+        """Run zones' scares on loop (a ControllerLoop, shared with the dispatcher).
+
+        dispatcher (an ActionDispatcher) keeps a zone's prop from overlapping
+        a manual action on the same actuator. on_motion(zone) and
+        on_scare(zone, timing) run on a worker thread, so they may do I/O.
+        """
+        self.controller = controller
+        self.zones = {zone.name: zone for zone in zones}
+        self.dispatcher = dispatcher
+        self.on_motion = on_motion
+        self.on_scare = on_scare
+        self.offsets = offsets or configured_offsets()
+        self.loop = loop or ControllerLoop()
+        self.armed = False
+        self.version = 0
+        self._lock = threading.Lock()
+        # Decode zone sounds now, not on the loop during a zone's first scare
+        controller.sound_bank.preload(sorted({zone.sound for zone in zones
+                                              if isinstance(zone.sound, str)}))
+        for zone in zones:
+            zone.motion_source.add_callback(
+                lambda timestamp, zone=zone: self.loop.call_soon(self._on_motion, zone, timestamp))
+
+    @classmethod
+    def from_config(cls, controller, source=None, **kwargs):
+        """Zones from config, sharing the controller's sensor/relay where pins match."""
+        zones = []
+        for options in load_zone_config(source) or [{'name': 'main'}]:
+            options = dict(DEFAULT_ZONE, **options)
+            options.setdefault('motion_pin', controller.motion_pin)
+            options.setdefault('relay_pin', controller.relay_pin)
+            zone = Zone(**options)
+            if zone.motion_pin == controller.motion_pin:
+                zone.motion_source = controller.motion_source
+            else:
+                zone.motion_source = create_backend('motion', controller.backends['motion'],
+                                                    zone, controller.options)
+            if zone.relay_pin == controller.relay_pin:
+                zone.relay = controller.relay
+                zone.actuators = ('prop',)
+            else:
+                zone.relay = create_backend('relay', controller.backends['relay'],
+                                            zone, controller.options)
+            zones.append(zone)
+        return cls(controller, zones, **kwargs)
+
+    def _changed(self):
+        """Bump the version so status publishers notice."""
+        self.version += 1
+
+    def arm(self):
+        """Start every zone's sensor and the loop."""
+        with self._lock:
+            if self.armed:
+                return
+            self.armed = True
+            self._changed()
+        self.loop.start()
+        for zone in self.zones.values():
+            zone.motion_source.start()
+
+    def disarm(self):
+        """Stop the sensors; scares already running still finish."""
+        with self._lock:
+            if not self.armed:
+                return
+            self.armed = False
+            self._changed()
+        for zone in self.zones.values():
+            zone.motion_source.stop()
+
+    def configure(self, name, **settings):
+        """Change a zone's enabled/cooldown/prop_duration.
+
+        Raises KeyError for an unknown zone and ValueError for bad settings.
+        """
+        zone = self.zones[name]
+        unknown = set(settings) - set(ZONE_SETTINGS)
+        if unknown:
+            raise ValueError(f"unknown zone setting(s): {', '.join(sorted(unknown))}")
+        if 'enabled' in settings and not isinstance(settings['enabled'], bool):
+            raise ValueError('enabled must be true or false')
+        values = {key: float(value) for key, value in settings.items() if key != 'enabled'}
+        if any(value < 0 for value in values.values()):
+            raise ValueError('cooldown and prop_duration must not be negative')
+        with self._lock:
+            if 'enabled' in settings:
+                zone.enabled = settings['enabled']
+            for key, value in values.items():
+                setattr(zone, key, value)
+            self._changed()
+        return zone.status(self.armed)
+
+    def apply_settings(self, settings):
+        """Apply {name: {setting: value}} from another worker; unknown zones are skipped."""
+        for name, values in (settings or {}).items():
+            zone = self.zones.get(name)
+            if zone is None:
+                continue
+            current = {key: getattr(zone, key) for key in values if key in ZONE_SETTINGS}
+            wanted = {key: value for key, value in values.items() if key in ZONE_SETTINGS}
+            if current != wanted:
+                self.configure(name, **wanted)
+
+    def trigger(self, name):
+        """Fire a zone's scare now, as if its sensor tripped (ignores armed, not cooldown)."""
+        self.loop.call_soon(self._fire, self.zones[name])
+
+    def status(self):
+        """Armed flag and every zone's status."""
+        with self._lock:
+            return {
+                'armed': self.armed,
+                'zones': [zone.status(self.armed) for zone in self.zones.values()]
+            }
+
+    def stop(self):
+        """Disarm and open every relay (the loop itself belongs to its owner)."""
+        self.disarm()
+        for zone in self.zones.values():
+            zone.relay.open()
+
+    def _on_motion(self, zone, timestamp):
+        """Loop: a zone's sensor fired."""
+        MOTION_WAKE_SECONDS.observe(max(0.0, time.perf_counter() - timestamp))
+        with self._lock:
+            zone.stats_data['motion_events'] += 1
+            self._changed()
+        if self.armed:
+            self._fire(zone)
+
+    def _skip(self, zone, reason):
+        with self._lock:
+            zone.stats_data[f'skipped_{reason}'] += 1
+            self._changed()
+
+    def _fire(self, zone):
+        """Loop: start a zone's scare unless it is disabled, cooling down or busy."""
+        if not zone.enabled:
+            return self._skip(zone, 'disabled')
+        if zone.busy:
+            return self._skip(zone, 'busy')
+        if time.perf_counter() < zone.cooldown_until:
+            return self._skip(zone, 'cooldown')
+        if self.dispatcher and self.dispatcher.claim('zone', zone.actuators)['status'] != QUEUED:
+            return self._skip(zone, 'busy')
+
+        print(f"MOTION DETECTED in zone {zone.name}! BOO!")
+        with self._lock:
+            zone.busy = True
+            zone.stats_data['scares'] += 1
+            zone.stats_data['last_scare'] = datetime.now().isoformat()
+            self._changed()
+        if self.on_motion:
+            self.loop.offload(self.on_motion, zone)
+        self.loop.submit(self._scare(zone))
+
+    def _timeline(self, zone):
+        """The zone's record/prop/sound stages."""
+        def record():
+            if zone.record:
+                stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+                self.controller.record_scare(
+                    f"{self.controller.clip_prefix}_{zone.name}_{stamp}.h264")
+
+        def sound():
+            if zone.sound is not False:
+                self.controller.play_scary_sound(zone.sound)
+
+        return (ScareTimeline()
+                .add('record', record, self.offsets.get('record', 0.0))
+                .add('prop', lambda: self.controller.trigger_prop_async(zone.prop_duration,
+                                                                        zone.relay),
+                     self.offsets.get('prop', 0.0))
+                .add('sound', sound, self.offsets.get('sound', 0.0)))
+
+    async def _scare(self, zone):
+        """Loop: run the zone's stages, then start its cooldown."""
+        timing = {'zone': zone.name, 'stages': {}, 'max_skew_ms': 0.0, 'total_ms': 0.0}
+        started = time.perf_counter()
+        try:
+            timing.update(await self._timeline(zone).run())
+        finally:
+            with self._lock:
+                zone.busy = False
+                zone.cooldown_until = time.perf_counter() + zone.cooldown
+                zone.stats_data['last_timing'] = timing
+                self._changed()
+            if self.dispatcher:
+                failed = any(stage['error'] for stage in timing['stages'].values())
+                self.dispatcher.release('zone', zone.actuators, time.perf_counter() - started,
+                                        ok=not failed)
+        if self.on_scare:
+            self.loop.offload(self.on_scare, zone, timing)
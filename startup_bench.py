@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Startup Bench - How quickly a ScarePi web app is ready after a restart
+Launches the app as a fresh process and times process start to the first
+200 from /api/status, failing when the slowest run is over the budget. The
+default budget is the container healthcheck's 5 s start period. --imports
+prints the slowest module imports instead (python -X importtime), to find
+what to defer.
+
+Examples:
+    python startup_bench.py                           # app_docker, 5 runs, 5 s budget
+    python startup_bench.py --runs 10 --budget 2.5
+    python startup_bench.py --command "gunicorn -c gunicorn.conf.py wsgi:app"
+    python startup_bench.py --imports --app app_enhanced
+"""
+
+import argparse
+import json
+import os
+import shlex
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+# Container HEALTHCHECK --start-period
+DEFAULT_BUDGET = 5.0
+POLL_INTERVAL = 0.01
+
+
+def free_port():
+    """An unused local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def profile_imports(module):
+    """(cumulative_us, self_us, depth, name) for every module imported by `import module`."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=HERE, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(cumulative_us), int(self_us), depth, name.strip()))
+    return rows
+
+
+def print_import_profile(module, rows, top):
+    """Slowest imports by cumulative time, plus the total."""
+    total = next((row[0] for row in rows if row[3] == module), sum(row[1] for row in rows))
+    print(f"\n🐢 import {module}: {total / 1000:.1f} ms, {len(rows)} modules\n")
+    header = f"{'cumulative ms':>14}{'self ms':>10}  module"
+    print(header)
+    print('-' * len(header))
+    for cumulative_us, self_us, depth, name in sorted(rows, reverse=True)[:top]:
+        print(f"{cumulative_us / 1000:>14.1f}{self_us / 1000:>10.1f}  {'  ' * depth}{name}")
+
+
+def time_to_first_status(command, db_path, timeout):
+    """Seconds from launching command until /api/status answers 200."""
+    port = free_port()
+    env = dict(os.environ, SCAREPI_PORT=str(port), SCAREPI_DB_PATH=db_path,
+               PYTHONUNBUFFERED='1')
+    url = f'http://127.0.0.1:{port}/api/status'
+    started = time.perf_counter()
+    # Own session so reloader children and gunicorn workers go down with it
+    process = subprocess.Popen(command, cwd=HERE, env=env, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL, start_new_session=True)
+    try:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"{' '.join(command)} exited with {process.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=1.0) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except (urllib.error.URLError, ConnectionError, socket.timeout):
+                pass
+            time.sleep(POLL_INTERVAL)
+        raise RuntimeError(f"/api/status not ready within {timeout}s")
+    finally:
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+            process.wait(timeout=10)
+        except ProcessLookupError:
+            pass
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+            process.wait()
+
+
+def run_bench(command, runs, budget, timeout, db_path=None):
+    """Time runs cold starts; returns the results dict."""
+    samples = []
+    for run in range(runs):
+        # A fresh database each run unless one is given, so every start migrates
+        if db_path:
+            seconds = time_to_first_status(command, db_path, timeout)
+        else:
+            with tempfile.TemporaryDirectory(prefix='scarepi_startup_') as directory:
+                seconds = time_to_first_status(
+                    command, os.path.join(directory, 'scarepi_audience.db'), timeout)
+        samples.append(seconds)
+        print(f"  run {run + 1}/{runs}: {seconds * 1000:.0f} ms")
+    return {
+        'command': ' '.join(command),
+        'runs': runs,
+        'budget_s': budget,
+        'samples_s': [round(sample, 4) for sample in samples],
+        'min_s': round(min(samples), 4),
+        'median_s': round(statistics.median(samples), 4),
+        'max_s': round(max(samples), 4),
+        # Every restart has to beat the healthcheck, so judge the slowest one
+        'passed': max(samples) <= budget
+    }
+
+
+def main():
+    """Parse arguments and run the startup benchmark or import profile."""
+    parser = argparse.ArgumentParser(description='ScarePi startup-time benchmark')
+    parser.add_argument('--app', default='app_docker',
+                        choices=['app_docker', 'app_enhanced', 'app_mock'],
+                        help='App module to start (default: app_docker)')
+    parser.add_argument('--command', help='Start this command instead, e.g. a gunicorn line')
+    parser.add_argument('--runs', type=int, default=5, help='Number of cold starts')
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET,
+                        help='Seconds allowed to the first /api/status 200')
+    parser.add_argument('--timeout', type=float, default=60.0, help='Give up on a run after this')
+    parser.add_argument('--db', help='Database to start against (default: a fresh temp file)')
+    parser.add_argument('--imports', action='store_true',
+                        help='Profile module import time instead of timing startup')
+    parser.add_argument('--top', type=int, default=25, help='Imports to list with --imports')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    args = parser.parse_args()
+
+    if args.imports:
+        print_import_profile(args.app, profile_imports(args.app), args.top)
+        return 0
+
+    command = shlex.split(args.command) if args.command else [sys.executable, f'{args.app}.py']
+    print(f"🚀 Timing {args.runs} cold start(s) of: {' '.join(command)}")
+    results = run_bench(command, args.runs, args.budget, args.timeout, args.db)
+    print(f"\n⏱️ First /api/status 200 after {results['median_s'] * 1000:.0f} ms median, "
+          f"{results['max_s'] * 1000:.0f} ms worst (budget {args.budget * 1000:.0f} ms)")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results saved to {args.output}")
+    if not results['passed']:
+        print("❌ Startup is over budget!")
+        return 1
+    print("✅ Startup within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,6 +12,8 @@ class EnhancedScarePiController {
             total_scares: 0,
             show_duration: '0:00:00'
         };
+        this.eventSource = null;
+        this.pollTimers = [];
         this.init();
     }
 
@@ -259,7 +261,6 @@ class EnhancedScarePiController {
 
     async showQRCode() {
         try {
-            const response = await fetch('/qr');
             const qrWindow = window.open('', '_blank', 'width=600,height=800');
             qrWindow.document.write(`
                 <html>
@@ -318,7 +319,7 @@ class EnhancedScarePiController {
                         <div class="qr-container">
                             <h1>📱 ScarePi QR Code 🎃</h1>
                             <div class="qr-code">
-                                <img src="${response.url}" alt="ScarePi QR Code">
+                                <img src="/qr.png" alt="ScarePi QR Code">
                             </div>
                             <div class="instructions">
                                 <p>📱 Scan this QR code to join our Halloween show audience!</p>
@@ -413,41 +414,7 @@ class EnhancedScarePiController {
         try {
             const response = await fetch('/api/status');
             const data = await response.json();
-            
-            // Update system status
-            this.systemStatus = data.scarepi_initialized ? 'Connected' : 'Disconnected';
-            const systemStatusEl = document.getElementById('systemStatus');
-            if (systemStatusEl) {
-                systemStatusEl.textContent = this.systemStatus;
-                systemStatusEl.style.color = data.scarepi_initialized ? '#44ff44' : '#ff4444';
-            }
-            
-            // Update motion status
-            this.motionEnabled = data.motion_enabled;
-            this.updateMotionUI();
-            
-            // Update show status
-            this.showActive = data.show_active;
-            this.updateShowStatus();
-            
-            // Update last update time
-            const lastUpdateEl = document.getElementById('lastUpdate');
-            if (lastUpdateEl) {
-                lastUpdateEl.textContent = new Date().toLocaleTimeString();
-            }
-            
-            // Update main status indicator
-            const statusDot = document.querySelector('.status-dot');
-            const statusText = document.getElementById('statusText');
-            
-            if (data.scarepi_initialized) {
-                statusDot?.classList.add('connected');
-                if (statusText) statusText.textContent = 'System Online';
-            } else {
-                statusDot?.classList.remove('connected');
-                if (statusText) statusText.textContent = 'System Offline';
-            }
-            
+            this.applyStatus(data);
         } catch (error) {
             console.error('Status update failed:', error);
             const systemStatusEl = document.getElementById('systemStatus');
@@ -458,46 +425,158 @@ class EnhancedScarePiController {
         }
     }
 
+    applyStatus(data) {
+        // Update system status
+        this.systemStatus = data.scarepi_initialized ? 'Connected' : 'Disconnected';
+        const systemStatusEl = document.getElementById('systemStatus');
+        if (systemStatusEl) {
+            systemStatusEl.textContent = this.systemStatus;
+            systemStatusEl.style.color = data.scarepi_initialized ? '#44ff44' : '#ff4444';
+        }
+        
+        // Update motion status
+        this.motionEnabled = data.motion_enabled;
+        this.updateMotionUI();
+        
+        // Update show status
+        this.showActive = data.show_active;
+        this.updateShowStatus();
+        
+        // Update last update time
+        const lastUpdateEl = document.getElementById('lastUpdate');
+        if (lastUpdateEl) {
+            lastUpdateEl.textContent = new Date().toLocaleTimeString();
+        }
+        
+        // Update main status indicator
+        const statusDot = document.querySelector('.status-dot');
+        const statusText = document.getElementById('statusText');
+        
+        if (data.scarepi_initialized) {
+            statusDot?.classList.add('connected');
+            if (statusText) statusText.textContent = 'System Online';
+        } else {
+            statusDot?.classList.remove('connected');
+            if (statusText) statusText.textContent = 'System Offline';
+        }
+    }
+
     async updateAudienceStats() {
         try {
             const response = await fetch('/api/audience/stats');
             const data = await response.json();
-            
-            this.audienceStats = data;
-            
-            // Update audience count
-            const audienceCountEl = document.getElementById('audienceCount');
-            if (audienceCountEl) {
-                audienceCountEl.textContent = data.total_audience || 0;
-            }
-            
-            // Update scare count
-            const scareCountEl = document.getElementById('scareCount');
-            if (scareCountEl) {
-                scareCountEl.textContent = data.total_scares || 0;
-            }
-            
-            // Update show time
-            const showTimeEl = document.getElementById('showTime');
-            if (showTimeEl) {
-                showTimeEl.textContent = data.show_duration || '0:00:00';
-            }
-            
+            this.applyAudienceStats(data);
         } catch (error) {
             console.error('Audience stats update failed:', error);
         }
     }
 
+    applyAudienceStats(data) {
+        this.audienceStats = data;
+        
+        // Update audience count
+        const audienceCountEl = document.getElementById('audienceCount');
+        if (audienceCountEl) {
+            audienceCountEl.textContent = data.total_audience || 0;
+        }
+        
+        // Update scare count
+        const scareCountEl = document.getElementById('scareCount');
+        if (scareCountEl) {
+            scareCountEl.textContent = data.total_scares || 0;
+        }
+        
+        // Update show time
+        const showTimeEl = document.getElementById('showTime');
+        if (showTimeEl) {
+            showTimeEl.textContent = data.show_duration || '0:00:00';
+        }
+        
+        // Keep the show clock ticking locally between pushes
+        this.showSeconds = this.parseDuration(data.show_duration);
+    }
+
+    parseDuration(text) {
+        const parts = (text || '0:00:00').split(':').map(Number);
+        return parts.reduce((total, part) => total * 60 + (part || 0), 0);
+    }
+
+    formatDuration(seconds) {
+        const h = Math.floor(seconds / 3600);
+        const m = String(Math.floor((seconds % 3600) / 60)).padStart(2, '0');
+        const s = String(seconds % 60).padStart(2, '0');
+        return `${h}:${m}:${s}`;
+    }
+
     startStatusUpdates() {
-        // Update status every 2 seconds
+        // Prefer server push; fall back to polling when EventSource is unavailable
+        if (window.EventSource) {
+            this.connectEvents();
+        } else {
+            this.startPolling();
+        }
+        
         setInterval(() => {
+            if (this.showActive && this.showSeconds !== undefined) {
+                this.showSeconds += 1;
+                const showTimeEl = document.getElementById('showTime');
+                if (showTimeEl) {
+                    showTimeEl.textContent = this.formatDuration(this.showSeconds);
+                }
+            }
+        }, 1000);
+    }
+
+    connectEvents() {
+        this.eventSource = new EventSource('/api/events');
+        
+        this.eventSource.addEventListener('open', () => {
+            this.stopPolling();
+        });
+        
+        this.eventSource.addEventListener('status', (e) => {
+            this.applyStatus(JSON.parse(e.data));
+        });
+        
+        this.eventSource.addEventListener('audience', (e) => {
+            this.applyAudienceStats(JSON.parse(e.data));
+        });
+        
+        this.eventSource.addEventListener('motion', () => {
+            this.showMessage('👻 Motion detected!', 'info');
+        });
+        
+        this.eventSource.addEventListener('scare', (e) => {
+            const data = JSON.parse(e.data);
+            if (data.stage === 'started') {
+                this.showMessage('🎃 Scare sequence running!', 'info');
+            }
+        });
+        
+        this.eventSource.addEventListener('error', () => {
+            // EventSource reconnects on its own; poll until it does
+            this.startPolling();
+        });
+    }
+
+    startPolling() {
+        if (this.pollTimers.length) {
+            return;
+        }
+        // Update status every 2 seconds
+        this.pollTimers.push(setInterval(() => {
             this.updateStatus();
-        }, 2000);
+        }, 2000));
         
         // Update audience stats every 5 seconds
-        setInterval(() => {
+        this.pollTimers.push(setInterval(() => {
             this.updateAudienceStats();
-        }, 5000);
+        }, 5000));
+    }
+
+    stopPolling() {
+        this.pollTimers.forEach((timer) => clearInterval(timer));
+        this.pollTimers = [];
     }
 
     showMessage(message, type = 'info') {
@@ -540,12 +619,47 @@ class EnhancedScarePiController {
         }, 3000);
     }
 
-    exportAudienceData() {
+    async exportAudienceData() {
         this.showMessage('📊 Exporting audience data...', 'info');
-        // Implement CSV export functionality
-        setTimeout(() => {
+        try {
+            // Admin only: a plain navigation can't send the token header, so fetch and save the blob
+            let response = await this.fetchAudienceExport(localStorage.getItem('scarepiAdminToken'));
+            if (response.status === 403) {
+                const token = window.prompt('Admin token (SCAREPI_ADMIN_TOKEN) for the audience export:');
+                if (!token) {
+                    this.showMessage('Export needs the admin token', 'error');
+                    return;
+                }
+                response = await this.fetchAudienceExport(token);
+                if (response.ok) {
+                    localStorage.setItem('scarepiAdminToken', token);
+                }
+            }
+            if (!response.ok) {
+                const data = await response.json().catch(() => ({}));
+                this.showMessage(data.message || data.error || 'Export failed', 'error');
+                return;
+            }
+
+            const url = URL.createObjectURL(await response.blob());
+            const disposition = response.headers.get('Content-Disposition') || '';
+            const link = document.createElement('a');
+            link.href = url;
+            link.download = (disposition.match(/filename=([^;]+)/) || [])[1] || 'scarepi_audience.csv';
+            document.body.appendChild(link);
+            link.click();
+            link.remove();
+            URL.revokeObjectURL(url);
             this.showMessage('📥 Audience data exported successfully!', 'success');
-        }, 1000);
+        } catch (error) {
+            this.showMessage('Network error: ' + error.message, 'error');
+        }
+    }
+
+    fetchAudienceExport(token) {
+        return fetch('/api/audience/export?format=csv', {
+            headers: token ? { 'X-ScarePi-Admin-Token': token } : {}
+        });
     }
 
     exportAnalytics() {
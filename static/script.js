@@ -4,6 +4,8 @@ class ScarePiController {
     constructor() {
         this.motionEnabled = false;
         this.systemStatus = 'unknown';
+        this.eventSource = null;
+        this.pollTimer = null;
         this.init();
     }
 
@@ -127,31 +129,7 @@ class ScarePiController {
         try {
             const response = await fetch('/api/status');
             const data = await response.json();
-            
-            // Update system status
-            this.systemStatus = data.scarepi_initialized ? 'Connected' : 'Disconnected';
-            document.getElementById('systemStatus').textContent = this.systemStatus;
-            document.getElementById('systemStatus').style.color = data.scarepi_initialized ? '#44ff44' : '#ff4444';
-            
-            // Update motion status
-            this.motionEnabled = data.motion_enabled;
-            this.updateMotionUI();
-            
-            // Update last update time
-            document.getElementById('lastUpdate').textContent = new Date().toLocaleTimeString();
-            
-            // Update main status indicator
-            const statusDot = document.querySelector('.status-dot');
-            const statusText = document.getElementById('statusText');
-            
-            if (data.scarepi_initialized) {
-                statusDot.classList.add('connected');
-                statusText.textContent = 'System Online';
-            } else {
-                statusDot.classList.remove('connected');
-                statusText.textContent = 'System Offline';
-            }
-            
+            this.applyStatus(data);
         } catch (error) {
             console.error('Status update failed:', error);
             document.getElementById('systemStatus').textContent = 'Error';
@@ -159,13 +137,74 @@ class ScarePiController {
         }
     }
 
+    applyStatus(data) {
+        // Update system status
+        this.systemStatus = data.scarepi_initialized ? 'Connected' : 'Disconnected';
+        document.getElementById('systemStatus').textContent = this.systemStatus;
+        document.getElementById('systemStatus').style.color = data.scarepi_initialized ? '#44ff44' : '#ff4444';
+        
+        // Update motion status
+        this.motionEnabled = data.motion_enabled;
+        this.updateMotionUI();
+        
+        // Update last update time
+        document.getElementById('lastUpdate').textContent = new Date().toLocaleTimeString();
+        
+        // Update main status indicator
+        const statusDot = document.querySelector('.status-dot');
+        const statusText = document.getElementById('statusText');
+        
+        if (data.scarepi_initialized) {
+            statusDot.classList.add('connected');
+            statusText.textContent = 'System Online';
+        } else {
+            statusDot.classList.remove('connected');
+            statusText.textContent = 'System Offline';
+        }
+    }
+
     startStatusUpdates() {
+        // Prefer server push; fall back to polling when EventSource is unavailable
+        if (!window.EventSource) {
+            this.startPolling();
+            return;
+        }
+        
+        this.eventSource = new EventSource('/api/events');
+        
+        this.eventSource.addEventListener('open', () => {
+            this.stopPolling();
+        });
+        
+        this.eventSource.addEventListener('status', (e) => {
+            this.applyStatus(JSON.parse(e.data));
+        });
+        
+        this.eventSource.addEventListener('motion', () => {
+            this.showMessage('👻 Motion detected!', 'info');
+        });
+        
+        this.eventSource.addEventListener('error', () => {
+            // EventSource reconnects on its own; poll until it does
+            this.startPolling();
+        });
+    }
+
+    startPolling() {
+        if (this.pollTimer) {
+            return;
+        }
         // Update status every 2 seconds
-        setInterval(() => {
+        this.pollTimer = setInterval(() => {
             this.updateStatus();
         }, 2000);
     }
 
+    stopPolling() {
+        clearInterval(this.pollTimer);
+        this.pollTimer = null;
+    }
+
     showMessage(message, type = 'info') {
         // Create a temporary message element
         const messageEl = document.createElement('div');
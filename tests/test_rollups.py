@@ -0,0 +1,42 @@
+"""Timeseries bucketing across midnight for steps that don't divide the day."""
+
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scarepi_db import ScareDatabase, migrate  # noqa: E402
+from scarepi_rollups import read_timeseries  # noqa: E402
+
+
+def _db_with_events(tmp_path, stamps):
+    db = ScareDatabase(str(tmp_path / 'rollups.db'))
+    migrate(db)
+    with db.transaction() as cursor:
+        cursor.executemany('INSERT INTO show_analytics (event_type, timestamp) VALUES (?, ?)',
+                           [('scare_sequence', stamp) for stamp in stamps])
+    return db
+
+
+def test_hour_step_crossing_midnight(tmp_path):
+    stamps = ['2025-10-30 21:10:00', '2025-10-30 23:59:00', '2025-10-31 00:30:00',
+              '2025-10-31 04:00:00', '2025-10-31 09:45:00']
+    db = _db_with_events(tmp_path, stamps)
+    result = read_timeseries(db, 'hour', since=datetime(2025, 10, 30, 20),
+                             until=datetime(2025, 10, 31, 10), step=5)
+    db.close()
+    assert sum(result['series']['scare_sequence']) == len(stamps)
+    # Five-hour buckets run straight through midnight (21:00-02:00 holds three events)
+    assert result['buckets'] == ['2025-10-30T16:00:00Z', '2025-10-30T21:00:00Z',
+                                 '2025-10-31T02:00:00Z', '2025-10-31T07:00:00Z']
+    assert result['series']['scare_sequence'] == [0, 3, 1, 1]
+
+
+def test_minute_step_crossing_midnight(tmp_path):
+    stamps = ['2025-10-30 23:50:00', '2025-10-31 00:05:00', '2025-10-31 00:20:00']
+    db = _db_with_events(tmp_path, stamps)
+    result = read_timeseries(db, 'minute', since=datetime(2025, 10, 30, 23, 30),
+                             until=datetime(2025, 10, 31, 0, 30), step=7)
+    db.close()
+    assert sum(result['series']['scare_sequence']) == len(stamps)
@@ -0,0 +1,11 @@
+#!/usr/bin/env python3
+"""
+ScarePi WSGI entry point
+Each gunicorn worker imports this and initializes its own ScarePi; show state
+is shared through the database and one worker is elected hardware controller.
+"""
+
+from app_docker import app, init_scarepi
+
+if not init_scarepi():
+    raise RuntimeError("Failed to initialize Docker ScarePi")